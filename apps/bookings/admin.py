@@ -1,9 +1,20 @@
 from django.contrib import admin
+from django.db import transaction
 from django.utils.html import format_html
 from django.urls import reverse
+from apps.operator.exports import export_action
+from apps.cottages.cache import availability_namespace
+from . import occupancy
+from .cache import bookings_namespace
 from .models import Booking, BookingStatus
 
 
+def _bump_caches(cottage_ids):
+    for cottage_id in cottage_ids:
+        availability_namespace(cottage_id).bump()
+    bookings_namespace.bump()
+
+
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
 
@@ -15,9 +26,10 @@ class BookingAdmin(admin.ModelAdmin):
         'status', 'check_in', 'check_out', 'created_at',
         'cottage', 'guests'
     ]
+    # Поиск — apps.operator.search (триграммные индексы), см. get_search_results
     search_fields = [
-        'user__email', 'user__first_name', 'user__last_name',
-        'cottage__name', 'special_requests'
+        'guest_name', 'guest_email', 'user__email', 'user__first_name',
+        'user__last_name', 'user__phone', 'cottage__name'
     ]
     ordering = ['-created_at']
 
@@ -47,7 +59,17 @@ class BookingAdmin(admin.ModelAdmin):
 
     date_hierarchy = 'check_in'
 
+    def get_search_results(self, request, queryset, search_term):
+        from apps.operator.search import booking_condition
+        
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(booking_condition(search_term)), False
+
     def user_info(self, obj):
+        if obj.user is None:
+            # Гостевая бронь: найдется поиском по имени или email гостя
+            return format_html('{}<br><small>{}</small>', obj.client_name, obj.guest_email or '')
         url = reverse('admin:users_user_change', args=[obj.user.id])
         return format_html(
             '<a href="{}">{} {}</a><br><small>{}</small>',
@@ -78,27 +100,32 @@ class BookingAdmin(admin.ModelAdmin):
     # Кастомные действия
     actions = [
         'confirm_bookings', 'cancel_bookings', 'complete_bookings',
-        'send_confirmation_emails'
+        'send_confirmation_emails', export_action('bookings')
     ]
 
+    def _set_status(self, queryset, status):
+        # update() минует сигналы — ночи занятости и кэши обновляются здесь
+        with transaction.atomic():
+            rows = list(queryset.values_list('id', 'cottage_id'))
+            booking_ids = [booking_id for booking_id, _ in rows]
+            updated = Booking.objects.filter(id__in=booking_ids).update(status=status)
+            occupancy.set_status(booking_ids, status)
+            # После коммита: иначе кэш успели бы заполнить старыми данными
+            transaction.on_commit(lambda: _bump_caches({cottage_id for _, cottage_id in rows}))
+        return updated
+
     def confirm_bookings(self, request, queryset):
-        updated = queryset.filter(status=BookingStatus.PENDING).update(
-            status=BookingStatus.CONFIRMED
-        )
+        updated = self._set_status(queryset.filter(status=BookingStatus.PENDING), BookingStatus.CONFIRMED)
         self.message_user(request, f'{updated} бронирований подтверждено.')
     confirm_bookings.short_description = "Подтвердить бронирования"
 
     def cancel_bookings(self, request, queryset):
-        updated = queryset.exclude(status=BookingStatus.CANCELLED).update(
-            status=BookingStatus.CANCELLED
-        )
+        updated = self._set_status(queryset.exclude(status=BookingStatus.CANCELLED), BookingStatus.CANCELLED)
         self.message_user(request, f'{updated} бронирований отменено.')
     cancel_bookings.short_description = "Отменить выбранные бронирования"
 
     def complete_bookings(self, request, queryset):
-        updated = queryset.filter(status=BookingStatus.CONFIRMED).update(
-            status=BookingStatus.COMPLETED
-        )
+        updated = self._set_status(queryset.filter(status=BookingStatus.CONFIRMED), BookingStatus.COMPLETED)
         self.message_user(request, f'{updated} бронирований завершено.')
     complete_bookings.short_description = "Завершить выбранные бронирования"
 
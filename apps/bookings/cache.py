@@ -0,0 +1,17 @@
+"""
+Кэш списков бронирований (страницы бронирований в Telegram-боте).
+
+Поколение семейства увеличивается сигналом при любом изменении брони,
+поэтому закэшированные страницы не нужно удалять по одной.
+"""
+from django.conf import settings
+
+from apps.core.cache import CacheNamespace, TieredCache
+
+bookings_cache = TieredCache(
+    'bookings',
+    max_entries=settings.CATALOG_L1_MAX_ENTRIES,
+    timeout=settings.CATALOG_L1_TIMEOUT,
+)
+
+bookings_namespace = CacheNamespace('bookings', bookings_cache)
@@ -2,6 +2,7 @@ from django import forms
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from datetime import date, timedelta
+from . import holds
 from .models import Booking, BookingStatus
 
 
@@ -37,6 +38,10 @@ class BookingForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         self.cottage = kwargs.pop('cottage', None)
         self.user = kwargs.pop('user', None)
+        # Владелец удержания дат в Redis (apps.bookings.holds)
+        self.hold_owner = kwargs.pop('hold_owner', None)
+        if self.hold_owner is None and self.user is not None:
+            self.hold_owner = f'user:{self.user.pk}'
         super().__init__(*args, **kwargs)
         
         # Делаем поля обязательными
@@ -110,6 +115,19 @@ class BookingForm(forms.ModelForm):
         
         # Проверяем доступность коттеджа
         if self.cottage and check_in and check_out:
+            # Сначала удержание в Redis: конкурент отсекается без запроса к БД
+            if self.hold_owner:
+                # Без Redis занятость проверит запрос ниже — второй запрос не нужен
+                hold = holds.place_hold(self.cottage.pk, check_in, check_out, self.hold_owner, check_booked=False)
+                if hold == holds.HOLD_TAKEN:
+                    raise ValidationError(
+                        _('Эти даты сейчас бронирует другой гость. Попробуйте позже или выберите другие даты.')
+                    )
+                if hold == holds.HOLD_BOOKED:
+                    raise ValidationError(
+                        _('Выбранные даты недоступны. Пожалуйста, выберите другие даты.')
+                    )
+
             # Проверяем пересечения с существующими бронированиями
             conflicting_bookings = Booking.objects.filter(
                 cottage=self.cottage,
@@ -119,6 +137,8 @@ class BookingForm(forms.ModelForm):
             )
             
             if conflicting_bookings.exists():
+                if self.hold_owner:
+                    holds.release_hold(self.cottage.pk, self.hold_owner)
                 raise ValidationError(
                     _('Выбранные даты недоступны. Пожалуйста, выберите другие даты.')
                 )
@@ -0,0 +1,193 @@
+"""
+Временные удержания дат (holds) на время оформления брони.
+
+Пока гость заполняет форму, его даты удерживаются в Redis на
+BOOKING_HOLD_TTL секунд. Конкурент получает отказ сразу, из памяти,
+не доходя до запроса конфликтов в PostgreSQL. Окончательная проверка
+по-прежнему остается за БД (BookingForm.clean).
+
+Проверка и установка удержания — один Lua-скрипт, то есть атомарная
+операция: скрипт сверяет диапазон со снимком занятости коттеджа
+(брони из БД) и с чужими живыми удержаниями, а затем записывает свое.
+
+- booking_holds:{<cottage_id>} — hash владелец → "начало:конец:истекает_мс";
+- booking_occupancy:{<cottage_id>}:g<поколение> — список "начало:конец"
+  занятых диапазонов. Поколение — availability_namespace, его увеличивают
+  сигналы бронирований, поэтому устаревший снимок не читается.
+
+Даты хранятся как date.toordinal(), выезд не входит в диапазон. Hash-tag
+{cottage_id} держит оба ключа в одном слоте Redis Cluster.
+
+Без Redis (LocMemCache в тестах и разработке) удержания хранятся в
+памяти процесса. При ошибке Redis удержание не блокирует бронирование:
+это оптимизация, а не гарантия.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from apps.core.cache import _redis_connection
+from apps.cottages.cache import availability_namespace
+
+from .models import Booking, BookingStatus
+
+logger = logging.getLogger(__name__)
+
+HOLD_OK = 'ok'
+HOLD_BOOKED = 'booked'
+HOLD_TAKEN = 'held'
+
+_RESULTS = {1: HOLD_OK, 0: HOLD_BOOKED, 2: HOLD_TAKEN}
+
+# KEYS: удержания, снимок занятости. ARGV: владелец, начало, конец, TTL (мс).
+# -1 — снимка нет: Python загружает его из БД и повторяет вызов.
+PLACE_HOLD_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    return -1
+end
+local start, finish = tonumber(ARGV[2]), tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = clock[1] * 1000 + math.floor(clock[2] / 1000)
+for _, range in ipairs(redis.call('LRANGE', KEYS[2], 0, -1)) do
+    local s, e = string.match(range, '(%d+):(%d+)')
+    if tonumber(s) < finish and tonumber(e) > start then
+        return 0
+    end
+end
+local holds = redis.call('HGETALL', KEYS[1])
+for i = 1, #holds, 2 do
+    local s, e, expires = string.match(holds[i + 1], '(%d+):(%d+):(%d+)')
+    if tonumber(expires) <= now then
+        redis.call('HDEL', KEYS[1], holds[i])
+    elseif holds[i] ~= ARGV[1] and tonumber(s) < finish and tonumber(e) > start then
+        return 2
+    end
+end
+redis.call('HSET', KEYS[1], ARGV[1], start .. ':' .. finish .. ':' .. (now + tonumber(ARGV[4])))
+redis.call('PEXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+# Пустой список в Redis не существует — снимок всегда содержит заглушку
+_EMPTY_RANGE = '0:0'
+
+_local_holds = {}
+_local_lock = threading.Lock()
+_script = {'instance': None}
+
+
+def _holds_key(cottage_id):
+    return f'booking_holds:{{{cottage_id}}}'
+
+
+def _occupancy_key(cottage_id):
+    generation = availability_namespace(cottage_id).generation()
+    return f'booking_occupancy:{{{cottage_id}}}:g{generation}'
+
+
+def _booked_ranges(cottage_id):
+    return list(
+        Booking.objects.filter(
+            cottage_id=cottage_id,
+            status__in=[BookingStatus.PENDING, BookingStatus.CONFIRMED],
+            check_out__gt=timezone.localdate(),
+        ).values_list('check_in', 'check_out')
+    )
+
+
+def _load_occupancy(redis, key, cottage_id):
+    ranges = [f'{check_in.toordinal()}:{check_out.toordinal()}' for check_in, check_out in _booked_ranges(cottage_id)]
+    pipe = redis.pipeline()
+    pipe.delete(key)
+    pipe.rpush(key, _EMPTY_RANGE, *ranges)
+    pipe.expire(key, settings.BOOKING_OCCUPANCY_TIMEOUT)
+    pipe.execute()
+
+
+def place_hold(cottage_id, check_in, check_out, owner, check_booked=True):
+    """
+    Удерживает [check_in, check_out) за owner (продлевает свое удержание).
+    HOLD_OK, HOLD_BOOKED (даты заняты бронью) или HOLD_TAKEN (чужое удержание).
+
+    Без Redis занятость бронями проверяется запросом к БД; check_booked=False
+    пропускает его, если вызывающий сразу проверяет пересечения сам.
+    """
+    redis = _redis_connection()
+    if redis is None:
+        return _place_local_hold(cottage_id, check_in, check_out, owner, check_booked)
+
+    try:
+        if _script['instance'] is None:
+            _script['instance'] = redis.register_script(PLACE_HOLD_SCRIPT)
+        occupancy_key = _occupancy_key(cottage_id)
+        keys = [_holds_key(cottage_id), occupancy_key]
+        args = [owner, check_in.toordinal(), check_out.toordinal(), settings.BOOKING_HOLD_TTL * 1000]
+        result = _script['instance'](keys=keys, args=args, client=redis)
+        if result == -1:
+            _load_occupancy(redis, occupancy_key, cottage_id)
+            result = _script['instance'](keys=keys, args=args, client=redis)
+        return _RESULTS.get(result, HOLD_OK)
+    except RedisError as e:
+        logger.warning(f"Booking hold skipped, Redis unavailable: {e}")
+        return HOLD_OK
+
+
+def release_hold(cottage_id, owner):
+    redis = _redis_connection()
+    if redis is None:
+        with _local_lock:
+            _local_holds.get(cottage_id, {}).pop(owner, None)
+        return
+    try:
+        redis.hdel(_holds_key(cottage_id), owner)
+    except RedisError as e:
+        logger.warning(f"Booking hold release failed: {e}")
+
+
+def held_ranges(cottage_id, exclude_owner=None):
+    """Живые чужие удержания коттеджа: [(check_in, check_out), ...] в ordinal."""
+    now = int(time.time() * 1000)
+    redis = _redis_connection()
+    if redis is None:
+        with _local_lock:
+            holds = dict(_local_holds.get(cottage_id, {}))
+    else:
+        try:
+            holds = {
+                owner.decode(): tuple(int(part) for part in value.decode().split(':'))
+                for owner, value in redis.hgetall(_holds_key(cottage_id)).items()
+            }
+        except RedisError as e:
+            logger.warning(f"Booking holds unavailable: {e}")
+            return []
+    return [
+        (start, finish) for owner, (start, finish, expires) in holds.items()
+        if owner != exclude_owner and expires > now
+    ]
+
+
+def is_held(cottage_id, check_in, check_out, exclude_owner=None):
+    start, finish = check_in.toordinal(), check_out.toordinal()
+    return any(s < finish and e > start for s, e in held_ranges(cottage_id, exclude_owner))
+
+
+def _place_local_hold(cottage_id, check_in, check_out, owner, check_booked=True):
+    start, finish = check_in.toordinal(), check_out.toordinal()
+    if check_booked:
+        for s, e in _booked_ranges(cottage_id):
+            if s.toordinal() < finish and e.toordinal() > start:
+                return HOLD_BOOKED
+    now = int(time.time() * 1000)
+    with _local_lock:
+        holds = _local_holds.setdefault(cottage_id, {})
+        for other, (s, e, expires) in list(holds.items()):
+            if expires <= now:
+                del holds[other]
+            elif other != owner and s < finish and e > start:
+                return HOLD_TAKEN
+        holds[owner] = (start, finish, now + settings.BOOKING_HOLD_TTL * 1000)
+    return HOLD_OK
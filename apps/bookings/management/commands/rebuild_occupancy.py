@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.bookings.occupancy import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает таблицу занятости (ночи бронирований) из бронирований'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cottage', type=int, help='Только бронирования этого коттеджа')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.OCCUPANCY_REBUILD_CHUNK_SIZE,
+            help='Сколько бронирований пересобирать за одну транзакцию',
+        )
+
+    def handle(self, *args, **options):
+        nights = rebuild(options['chunk_size'], cottage_id=options['cottage'])
+        self.stdout.write(self.style.SUCCESS(f'Записано ночей: {nights}'))
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+# Триграммные GIN-индексы для поиска оператора (apps.operator.search):
+# ILIKE '%...%' и нечеткое сравнение (%>) идут по индексу, а не перебором.
+TRIGRAM_INDEXES = [
+    ('idx_booking_guest_name_trgm', 'bookings_booking', 'guest_name'),
+    ('idx_booking_guest_email_trgm', 'bookings_booking', 'guest_email'),
+    ('idx_user_email_trgm', 'users_user', 'email'),
+    ('idx_user_first_name_trgm', 'users_user', 'first_name'),
+    ('idx_user_last_name_trgm', 'users_user', 'last_name'),
+    ('idx_user_phone_trgm', 'users_user', 'phone_normalized'),
+    ('idx_callback_first_name_trgm', 'leads_callbackrequest', 'first_name'),
+    ('idx_callback_last_name_trgm', 'leads_callbackrequest', 'last_name'),
+    ('idx_callback_email_trgm', 'leads_callbackrequest', 'email'),
+    ('idx_callback_phone_trgm', 'leads_callbackrequest', 'phone_normalized'),
+    ('idx_cottage_name_trgm', 'cottages_cottage', 'name'),
+]
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY нельзя выполнять в транзакции
+    atomic = False
+
+    dependencies = [
+        ('bookings', '0004_booking_keyset_indexes'),
+        ('users', '0004_phone_normalized'),
+        ('leads', '0004_phone_normalized'),
+        ('cottages', '0002_optimize_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+            reverse_sql=migrations.RunSQL.noop
+        ),
+    ] + [
+        migrations.RunSQL(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops);",
+            reverse_sql=f"DROP INDEX CONCURRENTLY IF EXISTS {name};"
+        )
+        for name, table, column in TRIGRAM_INDEXES
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cottages', '0002_optimize_indexes'),
+        ('bookings', '0005_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingNight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает подтверждения'), ('confirmed', 'Подтверждено'), ('cancelled', 'Отменено'), ('completed', 'Завершено')], max_length=20, verbose_name='Статус')),
+                ('revenue', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Выручка за ночь')),
+                ('booking', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='nights_set', to='bookings.booking', verbose_name='Бронирование')),
+                ('cottage', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='booking_nights', to='cottages.cottage', verbose_name='Коттедж')),
+            ],
+            options={
+                'verbose_name': 'Ночь бронирования',
+                'verbose_name_plural': 'Ночи бронирований',
+                'indexes': [models.Index(fields=['cottage', 'date'], name='booking_night_cottage_idx'), models.Index(fields=['date', 'status'], name='booking_night_date_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='bookingnight',
+            constraint=models.UniqueConstraint(fields=('booking', 'date'), name='booking_night_unique'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+from datetime import timedelta
+from decimal import ROUND_DOWN, Decimal
+
+from django.db import migrations
+
+CHUNK_SIZE = 1000
+
+
+def backfill(apps, schema_editor):
+    """
+    Ночи существующих броней — как apps.bookings.occupancy.rebuild, но на
+    исторических моделях: пачками по id, остаток цены на последнюю ночь.
+    """
+    Booking = apps.get_model('bookings', 'Booking')
+    BookingNight = apps.get_model('bookings', 'BookingNight')
+    db = schema_editor.connection.alias
+    bookings = (
+        Booking.objects.using(db)
+        .only('id', 'cottage_id', 'check_in', 'check_out', 'total_price', 'status')
+        .order_by('id')
+    )
+
+    chunk = list(bookings[:CHUNK_SIZE])
+    while chunk:
+        nights = []
+        for booking in chunk:
+            count = (booking.check_out - booking.check_in).days
+            if count <= 0:
+                continue
+            total = Decimal(str(booking.total_price or 0))
+            nightly = (total / count).quantize(Decimal('0.01'), rounding=ROUND_DOWN)
+            nights.extend(
+                BookingNight(
+                    booking_id=booking.pk,
+                    cottage_id=booking.cottage_id,
+                    date=booking.check_in + timedelta(days=offset),
+                    status=booking.status,
+                    revenue=total - nightly * (count - 1) if offset == count - 1 else nightly,
+                )
+                for offset in range(count)
+            )
+        BookingNight.objects.using(db).bulk_create(nights, batch_size=CHUNK_SIZE, ignore_conflicts=True)
+        chunk = list(bookings.filter(id__gt=chunk[-1].pk)[:CHUNK_SIZE])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_booking_nights'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -67,6 +67,12 @@ class Booking(models.Model):
         verbose_name = 'Бронирование'
         verbose_name_plural = 'Бронирования'
         ordering = ['-created_at']
+        # Keyset-пагинация (created_at, id) в боте: без фильтра и с фильтрами
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='booking_created_id_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='booking_status_created_idx'),
+            models.Index(fields=['cottage', '-created_at', '-id'], name='booking_cottage_created_idx'),
+        ]
     
     def __str__(self):
         if self.user:
@@ -95,8 +101,68 @@ class Booking(models.Model):
             return self.guest_name
         return "Уважаемый клиент"
     
+    @property
+    def client_name(self):
+        """Имя или email клиента для уведомлений (гостевые брони без user)"""
+        if self.user:
+            return self.user.get_full_name() or self.user.email
+        return self.guest_name or self.guest_email or 'Гость'
+    
+    @property
+    def client_phone(self):
+        if self.user:
+            return self.user.phone
+        return None
+    
     def save(self, *args, **kwargs):
         if not self.total_price:
             nights = (self.check_out - self.check_in).days
             self.total_price = self.cottage.price_per_night * nights
         super().save(*args, **kwargs)
+
+
+class BookingNight(models.Model):
+    """
+    Ночь брони: строка на каждую дату [check_in, check_out) коттеджа.
+    Поддерживается из apps.bookings.occupancy, пересборка — rebuild_occupancy.
+    """
+    booking = models.ForeignKey(
+        Booking,
+        on_delete=models.CASCADE,
+        related_name='nights_set',
+        db_index=False,
+        verbose_name='Бронирование'
+    )
+    cottage = models.ForeignKey(
+        Cottage,
+        on_delete=models.CASCADE,
+        related_name='booking_nights',
+        db_index=False,
+        verbose_name='Коттедж'
+    )
+    date = models.DateField(verbose_name='Дата')
+    status = models.CharField(
+        max_length=20,
+        choices=BookingStatus.choices,
+        verbose_name='Статус'
+    )
+    revenue = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name='Выручка за ночь'
+    )
+
+    class Meta:
+        verbose_name = 'Ночь бронирования'
+        verbose_name_plural = 'Ночи бронирований'
+        constraints = [
+            models.UniqueConstraint(fields=['booking', 'date'], name='booking_night_unique'),
+        ]
+        # Календарь коттеджа и отчеты по диапазону дат всех коттеджей
+        indexes = [
+            models.Index(fields=['cottage', 'date'], name='booking_night_cottage_idx'),
+            models.Index(fields=['date', 'status'], name='booking_night_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.cottage_id} {self.date} ({self.booking_id})"
@@ -0,0 +1,113 @@
+"""
+Таблица занятости BookingNight: строка на каждую ночь брони (коттедж, дата)
+со статусом брони и выручкой за ночь.
+
+Поддерживается инкрементально:
+- сигнал post_save пересобирает ночи сохраненной брони (новая бронь —
+  один INSERT, смена только статуса — один UPDATE);
+- удаление брони или коттеджа удаляет ночи каскадом;
+- массовые смены статуса (queryset.update / bulk_update) минуют сигналы
+  и переносят статус в ночи через set_status() / sync_statuses() в той же
+  транзакции.
+
+Полная пересборка (backfill после миграции или после правок в обход
+ORM) — команда rebuild_occupancy. Календари, статистика и отчеты читают
+занятость диапазоном по индексу (cottage, date), не разворачивая диапазоны
+бронирований.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import ROUND_DOWN, Decimal
+
+from django.db import transaction
+
+from .models import Booking, BookingNight, BookingStatus
+
+# Статусы, которые занимают даты, и статусы проданных ночей
+ACTIVE_STATUSES = (BookingStatus.PENDING, BookingStatus.CONFIRMED)
+SOLD_STATUSES = (BookingStatus.CONFIRMED, BookingStatus.COMPLETED)
+
+_CENT = Decimal('0.01')
+_STATUS_FIELDS = {'status', 'updated_at'}
+
+
+def booking_nights(booking):
+    """Ночи брони; остаток от деления total_price приходится на последнюю ночь."""
+    count = (booking.check_out - booking.check_in).days
+    if count <= 0:
+        return []
+    total = Decimal(str(booking.total_price or 0))
+    nightly = (total / count).quantize(_CENT, rounding=ROUND_DOWN)
+    last = total - nightly * (count - 1)
+    return [
+        BookingNight(
+            booking_id=booking.pk,
+            cottage_id=booking.cottage_id,
+            date=booking.check_in + timedelta(days=offset),
+            status=booking.status,
+            revenue=last if offset == count - 1 else nightly,
+        )
+        for offset in range(count)
+    ]
+
+
+def sync_booking(booking, created=False, update_fields=None):
+    if update_fields and set(update_fields) <= _STATUS_FIELDS:
+        set_status([booking.pk], booking.status)
+        return
+    # Без savepoint: внутри чужой транзакции это лишний запрос
+    with transaction.atomic(savepoint=False):
+        if not created:
+            BookingNight.objects.filter(booking_id=booking.pk).delete()
+        BookingNight.objects.bulk_create(booking_nights(booking))
+
+
+def set_status(booking_ids, status):
+    return BookingNight.objects.filter(booking_id__in=list(booking_ids)).update(status=status)
+
+
+def sync_statuses(bookings):
+    """Переносит статусы броней, сохраненных bulk_update, в их ночи."""
+    by_status = defaultdict(list)
+    for booking in bookings:
+        by_status[booking.status].append(booking.pk)
+    for status, booking_ids in by_status.items():
+        set_status(booking_ids, status)
+
+
+def rebuild(chunk_size, cottage_id=None):
+    """
+    Пересобирает ночи всех броней (или одного коттеджа) пачками по id.
+    Каждая пачка — своя транзакция, поэтому читатели не видят пустой таблицы.
+    Возвращает число записанных ночей.
+    """
+    queryset = Booking.objects.only('id', 'cottage_id', 'check_in', 'check_out', 'total_price', 'status')
+    if cottage_id is not None:
+        queryset = queryset.filter(cottage_id=cottage_id)
+    queryset = queryset.order_by('id')
+
+    total = 0
+    last_id = 0
+    while True:
+        chunk = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        nights = [night for booking in chunk for night in booking_nights(booking)]
+        with transaction.atomic():
+            BookingNight.objects.filter(booking_id__in=[booking.pk for booking in chunk]).delete()
+            BookingNight.objects.bulk_create(nights, batch_size=chunk_size)
+        total += len(nights)
+        last_id = chunk[-1].pk
+    return total
+
+
+def occupied_dates(cottage_id, date_from, date_to=None, exclude_booking=None):
+    """Даты коттеджа, занятые PENDING/CONFIRMED бронями, от date_from (до date_to)."""
+    queryset = BookingNight.objects.filter(
+        cottage_id=cottage_id, date__gte=date_from, status__in=ACTIVE_STATUSES
+    )
+    if date_to is not None:
+        queryset = queryset.filter(date__lt=date_to)
+    if exclude_booking is not None:
+        queryset = queryset.exclude(booking_id=exclude_booking)
+    return queryset.order_by('date').values_list('date', flat=True).distinct()
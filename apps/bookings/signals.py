@@ -1,11 +1,35 @@
+from functools import partial
+
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from .models import Booking, BookingStatus
+from apps.cottages.cache import availability_namespace
+from .cache import bookings_namespace
+from . import occupancy
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _bump_caches(cottage_id):
+    availability_namespace(cottage_id).bump()
+    bookings_namespace.bump()
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def bump_availability_version(sender, instance, **kwargs):
+    # После коммита: иначе ETag закрепил бы ответ без новой брони
+    transaction.on_commit(partial(_bump_caches, instance.cottage_id))
+
+
+# Ночи удаленной брони удаляются каскадом
+@receiver(post_save, sender=Booking)
+def sync_booking_nights(sender, instance, created, update_fields=None, **kwargs):
+    occupancy.sync_booking(instance, created, update_fields)
+
+
 @receiver(post_save, sender=Booking)
 def booking_notification_signal(sender, instance, created, **kwargs):
     try:
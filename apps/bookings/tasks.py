@@ -0,0 +1,89 @@
+"""
+Жизненный цикл бронирований по расписанию (Celery beat).
+
+- подтвержденные брони после даты выезда становятся COMPLETED;
+- неподтвержденные (PENDING) старше BOOKING_PENDING_TTL_HOURS или с уже
+  прошедшей датой заезда отменяются и освобождают даты.
+
+Обновление идет пачками по BOOKING_SWEEP_CHUNK_SIZE: каждая пачка —
+короткая транзакция с SELECT ... FOR UPDATE SKIP LOCKED, поэтому строки,
+которые сейчас правит оператор, пропускаются до следующего запуска, а
+блокировки не держатся дольше одной пачки.
+
+queryset.update() не вызывает сигналы, поэтому статус ночей в таблице
+занятости, кэши доступности и страниц бронирований обновляются здесь, а
+уведомления отправляются одной сводкой за запуск.
+"""
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.cottages.cache import availability_namespace
+
+from . import occupancy
+from .cache import bookings_namespace
+from .models import Booking, BookingStatus
+
+logger = logging.getLogger(__name__)
+
+# Сколько отмененных броней перечислить в сводке (размер сообщения Celery ограничен)
+LIFECYCLE_SUMMARY_SAMPLE = 20
+
+
+def _sweep(queryset, new_status, chunk_size):
+    """Переводит строки queryset в new_status пачками; возвращает их id."""
+    swept = []
+    while True:
+        with transaction.atomic():
+            rows = list(
+                queryset.select_for_update(skip_locked=True)
+                .order_by('id')
+                .values_list('id', 'cottage_id')[:chunk_size]
+            )
+            if not rows:
+                break
+            booking_ids = [booking_id for booking_id, _ in rows]
+            Booking.objects.filter(id__in=booking_ids).update(status=new_status, updated_at=timezone.now())
+            occupancy.set_status(booking_ids, new_status)
+        # После коммита: иначе кэш успели бы заполнить старыми данными
+        for cottage_id in {cottage_id for _, cottage_id in rows}:
+            availability_namespace(cottage_id).bump()
+        bookings_namespace.bump()
+        swept.extend(booking_ids)
+    return swept
+
+
+@shared_task
+def sweep_booking_lifecycle():
+    now = timezone.now()
+    today = timezone.localdate()
+    chunk_size = settings.BOOKING_SWEEP_CHUNK_SIZE
+
+    completed = _sweep(
+        Booking.objects.filter(status=BookingStatus.CONFIRMED, check_out__lte=today),
+        BookingStatus.COMPLETED,
+        chunk_size,
+    )
+    expired = _sweep(
+        Booking.objects.filter(status=BookingStatus.PENDING).filter(
+            Q(created_at__lt=now - timedelta(hours=settings.BOOKING_PENDING_TTL_HOURS))
+            | Q(check_in__lt=today)
+        ),
+        BookingStatus.CANCELLED,
+        chunk_size,
+    )
+
+    if completed or expired:
+        from apps.notifications.tasks import send_email_notification, send_lifecycle_summary
+
+        send_lifecycle_summary.delay(len(completed), len(expired), expired[:LIFECYCLE_SUMMARY_SAMPLE])
+        for booking_id in expired:
+            send_email_notification.delay(booking_id, "cancelled")
+
+    logger.info(f"Booking lifecycle sweep: completed={len(completed)}, expired={len(expired)}")
+    return {'completed': len(completed), 'expired': len(expired)}
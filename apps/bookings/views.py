@@ -8,15 +8,19 @@ from django.utils.decorators import method_decorator
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
+from django.conf import settings
 from django.utils.translation import gettext as _
 from django.views.generic import TemplateView
 from django.views import View
-from datetime import timedelta, datetime
+from django.http import JsonResponse
+from datetime import datetime
 import logging
+from . import holds, occupancy
 from .models import Booking, BookingStatus
 from .serializers import BookingSerializer, BookingCreateSerializer
 from .forms import BookingForm
 from apps.cottages.models import Cottage
+from apps.core.query_budget import query_budget
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +30,7 @@ logger = logging.getLogger(__name__)
 @method_decorator(ratelimit(key='ip', rate='20/h', method='PUT'), name='update')
 @method_decorator(ratelimit(key='ip', rate='20/h', method='PATCH'), name='partial_update')
 @method_decorator(ratelimit(key='ip', rate='5/h', method='DELETE'), name='destroy')
+@query_budget(8)
 class BookingViewSet(viewsets.ModelViewSet):
     queryset = Booking.objects.all()
     permission_classes = [IsAuthenticated]
@@ -36,9 +41,12 @@ class BookingViewSet(viewsets.ModelViewSet):
         return BookingSerializer
     
     def get_queryset(self):
+        queryset = Booking.objects.select_related('cottage').prefetch_related(
+            'cottage__images', 'cottage__amenities__amenity'
+        )
         if self.request.user.is_staff:
-            return Booking.objects.all()
-        return Booking.objects.filter(user=self.request.user)
+            return queryset
+        return queryset.filter(user=self.request.user)
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -56,15 +64,21 @@ class BookingViewSet(viewsets.ModelViewSet):
         )
 
 
+@query_budget(6)
 class MyBookingsView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        bookings = Booking.objects.filter(user=request.user).order_by('-created_at')
+        bookings = Booking.objects.filter(user=request.user).select_related(
+            'cottage'
+        ).prefetch_related(
+            'cottage__images', 'cottage__amenities__amenity'
+        ).order_by('-created_at')
         serializer = BookingSerializer(bookings, many=True)
         return Response(serializer.data)
 
 
+@query_budget(10)
 class BookingCreateView(LoginRequiredMixin, TemplateView):
     template_name = 'bookings/create.html'
     
@@ -91,7 +105,7 @@ class BookingCreateView(LoginRequiredMixin, TemplateView):
                 if check_out:
                     form.fields['check_out'].initial = check_out
                 
-                booked_dates = self.get_booked_dates(cottage_id)
+                booked_dates = self.get_booked_dates(cottage_id, hold_owner=f'user:{self.request.user.pk}')
                 context['booked_dates'] = booked_dates
                     
             except Cottage.DoesNotExist:
@@ -103,23 +117,19 @@ class BookingCreateView(LoginRequiredMixin, TemplateView):
         
         return context
     
-    def get_booked_dates(self, cottage_id):
-        """Получает забронированные даты для коттеджа"""
-        from datetime import date, timedelta
+    def get_booked_dates(self, cottage_id, hold_owner=None):
+        """Забронированные и удерживаемые другими гостями (не hold_owner) даты коттеджа"""
+        from datetime import date
         
-        bookings = Booking.objects.filter(
-            cottage_id=cottage_id,
-            status__in=[BookingStatus.CONFIRMED, BookingStatus.PENDING]
-        ).exclude(
-            check_out__lte=date.today()  # Исключаем уже завершенные бронирования
-        )
+        booked_dates = [
+            day.strftime('%Y-%m-%d') for day in occupancy.occupied_dates(cottage_id, date.today())
+        ]
         
-        booked_dates = []
-        for booking in bookings:
-            current_date = booking.check_in
-            while current_date <= booking.check_out:
-                booked_dates.append(current_date.strftime('%Y-%m-%d'))
-                current_date += timedelta(days=1)
+        # Даты, которые прямо сейчас оформляют другие гости
+        for start, finish in holds.held_ranges(int(cottage_id), exclude_owner=hold_owner):
+            booked_dates.extend(
+                date.fromordinal(day).strftime('%Y-%m-%d') for day in range(start, finish)
+            )
         
         logger.debug(f"Забронированные даты для коттеджа {cottage_id}: {booked_dates}")
         return booked_dates
@@ -141,6 +151,7 @@ class BookingCreateView(LoginRequiredMixin, TemplateView):
         if form.is_valid():
             try:
                 booking = form.save()
+                holds.release_hold(cottage.pk, form.hold_owner)
                 return redirect('users:bookings')
             except Exception as e:
                 messages.error(request, _('Error creating booking: %(error)s') % {'error': str(e)})
@@ -152,6 +163,33 @@ class BookingCreateView(LoginRequiredMixin, TemplateView):
         return render(request, self.template_name, context)
 
 
+class BookingHoldView(LoginRequiredMixin, View):
+    """Удержание дат на время оформления брони (apps.bookings.holds)"""
+    
+    def post(self, request, *args, **kwargs):
+        try:
+            cottage_id = int(request.POST.get('cottage'))
+            check_in = datetime.strptime(request.POST.get('check_in', ''), '%Y-%m-%d').date()
+            check_out = datetime.strptime(request.POST.get('check_out', ''), '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return JsonResponse({'error': _('Invalid dates')}, status=400)
+        if check_out <= check_in:
+            return JsonResponse({'error': _('Invalid dates')}, status=400)
+        
+        result = holds.place_hold(cottage_id, check_in, check_out, f'user:{request.user.pk}')
+        if result != holds.HOLD_OK:
+            return JsonResponse({'held': False, 'reason': result}, status=409)
+        return JsonResponse({'held': True, 'ttl': settings.BOOKING_HOLD_TTL})
+    
+    def delete(self, request, *args, **kwargs):
+        try:
+            cottage_id = int(request.GET.get('cottage'))
+        except (TypeError, ValueError):
+            return JsonResponse({'error': _('Cottage not specified for booking')}, status=400)
+        holds.release_hold(cottage_id, f'user:{request.user.pk}')
+        return JsonResponse({'held': False})
+
+
 class BookingDetailView(LoginRequiredMixin, TemplateView):
     template_name = 'bookings/detail.html'
     
@@ -188,23 +226,10 @@ class BookingDetailView(LoginRequiredMixin, TemplateView):
     def get_booked_dates(self, cottage_id, current_booking_id):
         from datetime import date
         
-        bookings = Booking.objects.filter(
-            cottage_id=cottage_id,
-            status__in=['confirmed', 'pending']
-        ).exclude(
-            id=current_booking_id
-        ).exclude(
-            check_out__lte=date.today()
-        )
-        
-        booked_dates = []
-        for booking in bookings:
-            current_date = booking.check_in
-            while current_date < booking.check_out:
-                booked_dates.append(current_date.strftime('%Y-%m-%d'))
-                current_date += timedelta(days=1)
-        
-        return booked_dates
+        return [
+            day.strftime('%Y-%m-%d')
+            for day in occupancy.occupied_dates(cottage_id, date.today(), exclude_booking=current_booking_id)
+        ]
 
 
 
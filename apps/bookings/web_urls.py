@@ -5,6 +5,7 @@ app_name = 'bookings'
 
 urlpatterns = [
     path('create/', views.BookingCreateView.as_view(), name='create'),
+    path('holds/', views.BookingHoldView.as_view(), name='hold'),
     path(
         '<int:booking_id>/', 
         views.BookingDetailView.as_view(), 
@@ -5,3 +5,9 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
     verbose_name = 'Основные функции'
+
+    def ready(self):
+        # Регистрирует метрики, даже если процесс еще не открывал соединений
+        from . import metrics  # noqa: F401
+        from .profiling import install_celery_hooks
+        install_celery_hooks()
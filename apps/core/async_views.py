@@ -0,0 +1,70 @@
+"""
+Помощники для async-view под ASGI.
+
+В Django 4.2 login_required, user_passes_test и condition не работают
+с корутинами, а DRF не поддерживает async-view. Здесь — их минимальные
+аналоги с тем же поведением для клиентов.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import HttpResponseNotModified, JsonResponse
+from django.utils.http import parse_etags, quote_etag
+from django.views import View
+from rest_framework.exceptions import NotAuthenticated
+
+
+async def aget_user(request):
+    def resolve():
+        # request.user ленивый: первое обращение читает сессию и БД синхронно
+        user = request.user
+        user.is_authenticated
+        return user
+
+    return await sync_to_async(resolve)()
+
+
+class AsyncAPIView(View):
+    """Async-замена APIView для чтения: обработчики — корутины, доступ — как у IsAuthenticated."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return JsonResponse({'detail': str(NotAuthenticated.default_detail)}, status=403)
+        return await super().dispatch(request, *args, **kwargs)
+
+
+def async_user_passes_test(test_func):
+    """Аналог login_required + user_passes_test: иначе — редирект на LOGIN_URL."""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            user = await aget_user(request)
+            if not user.is_authenticated or not test_func(user):
+                return redirect_to_login(request.get_full_path())
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def not_modified(request, etag):
+    """HttpResponseNotModified, если If-None-Match совпал с etag, иначе None."""
+    etag = quote_etag(etag)
+    if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    # If-None-Match сравнивается слабо (RFC 9110): W/"x" совпадает с "x"
+    matched = '*' in if_none_match or any(tag.removeprefix('W/') == etag for tag in if_none_match)
+    if request.method in ('GET', 'HEAD') and matched:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+    return None
+
+
+def json_response(data, etag=None, **kwargs):
+    response = JsonResponse(
+        data, safe=False, json_dumps_params={'ensure_ascii': False}, **kwargs
+    )
+    if etag is not None:
+        response['ETag'] = quote_etag(etag)
+    return response
@@ -0,0 +1,594 @@
+"""
+Двухуровневый кэш: L1 — LRU с TTL внутри процесса (воркера gunicorn),
+L2 — общий Redis (CACHES['default']).
+
+Инвалидация публикуется в Redis pub/sub (TIERED_CACHE_CHANNEL), и каждый
+процесс удаляет устаревшие ключи из своего L1 за миллисекунды. Если
+подписка прервалась, L1 очищается целиком: пропущенные сообщения
+не должны оставлять устаревшие данные.
+
+TieredCache.get_or_compute() защищает дорогие вычисления от "стада"
+одновременных пересчетов при истечении ключа.
+
+CacheNamespace — семейство ключей с номером поколения в имени:
+инвалидация всего семейства — один INCR вместо delete_pattern (SCAN).
+
+Методы с префиксом ``a`` — для async-view под ASGI: L2 читается через
+redis.asyncio без блокировки event loop, формат ключей и значений тот же,
+что у django-redis.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import InvalidCacheBackendError
+from django_redis.exceptions import ConnectionInterrupted
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+_registry = {}
+_listener = {'pid': None, 'thread': None}
+_listener_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+_release_script = {'instance': None}
+# Метка процесса в сообщениях инвалидации. Не PID: у контейнеров свои
+# пространства PID, и номера процессов в них совпадают
+_origin = uuid.uuid4().hex
+
+
+def _reset_origin():
+    global _origin
+    _origin = uuid.uuid4().hex
+
+
+os.register_at_fork(after_in_child=_reset_origin)
+
+# Снимает блокировку, только если в ней наш токен: блокировка могла истечь
+# (CACHE_LOCK_TIMEOUT) и перейти к другому воркеру
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class LocalLRUCache:
+    """Потокобезопасный LRU-кэш с TTL, ограниченный по числу записей."""
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        with self._lock:
+            self._data[key] = (time.monotonic() + timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TieredCache:
+    def __init__(self, name, max_entries, timeout):
+        self.name = name
+        self.local = LocalLRUCache(max_entries, timeout)
+        self._local_locks = {}
+        self._local_locks_guard = threading.Lock()
+        _registry[name] = self
+
+    def get(self, key, default=None):
+        _ensure_listener()
+        value = self.local.get(key)
+        if value is not _MISSING:
+            return value
+
+        try:
+            value = cache.get(key, _MISSING)
+        except (ConnectionInterrupted, InvalidCacheBackendError) as e:
+            logger.warning(f"Cache read error: {e}")
+            return default
+
+        if value is _MISSING:
+            return default
+        self.local.set(key, value)
+        return value
+
+    def set(self, key, value, timeout):
+        self.local.set(key, value, timeout)
+        try:
+            cache.set(key, value, timeout)
+        except (ConnectionInterrupted, InvalidCacheBackendError) as e:
+            logger.warning(f"Cache write error: {e}")
+
+    def delete(self, *keys):
+        self.local.delete(*keys)
+        try:
+            cache.delete_many(keys)
+        except (ConnectionInterrupted, InvalidCacheBackendError) as e:
+            logger.warning(f"Cache delete error: {e}")
+        publish_invalidation(self.name, keys)
+
+    def get_or_compute(self, key, compute, timeout, stale_timeout=None, shared=True):
+        """
+        Значение из кэша или результат compute() с защитой от "стада":
+
+        - пересчитывает только владелец блокировки (SET NX в Redis,
+          для shared=False — блокировка внутри процесса);
+        - пока идет пересчет, остальные получают устаревшее значение
+          (оно хранится еще stale_timeout секунд после истечения);
+        - незадолго до истечения ключ с растущей вероятностью
+          пересчитывается заранее (XFetch).
+
+        shared=False хранит значение только в L1 — для объектов,
+        которые нельзя сериализовать в Redis.
+        """
+        stale_timeout = timeout if stale_timeout is None else stale_timeout
+        envelope = self._get_envelope(key, shared)
+
+        if envelope is not None and not _should_refresh(envelope):
+            return envelope['value']
+
+        if envelope is not None and shared:
+            # Другой воркер мог уже пересчитать значение в Redis
+            fresher = self._read_shared(key)
+            if fresher is not None and fresher['expires'] > envelope['expires']:
+                self.local.set(key, fresher)
+                if not _should_refresh(fresher):
+                    return fresher['value']
+                envelope = fresher
+
+        token = self._acquire(key, shared)
+        if token:
+            try:
+                return self._recompute(key, compute, timeout, stale_timeout, shared)
+            finally:
+                self._release(key, shared, token)
+
+        if envelope is not None:
+            return envelope['value']
+
+        envelope = self._wait_for(key, shared)
+        if envelope is not None:
+            return envelope['value']
+        # Владелец блокировки не успел — считаем сами, не дожидаясь дальше
+        return self._recompute(key, compute, timeout, stale_timeout, shared)
+
+    def _get_envelope(self, key, shared):
+        envelope = self.local.get(key)
+        if _is_envelope(envelope):
+            return envelope
+        if not shared:
+            return None
+        envelope = self._read_shared(key)
+        if envelope is not None:
+            self.local.set(key, envelope)
+        return envelope
+
+    def _read_shared(self, key):
+        try:
+            envelope = cache.get(key)
+        except (ConnectionInterrupted, InvalidCacheBackendError) as e:
+            logger.warning(f"Cache read error: {e}")
+            return None
+        return envelope if _is_envelope(envelope) else None
+
+    def _recompute(self, key, compute, timeout, stale_timeout, shared):
+        started = time.time()
+        value = compute()
+        finished = time.time()
+        envelope = {
+            'value': value,
+            'expires': finished + timeout,
+            'delta': finished - started,
+        }
+        hard_timeout = timeout + stale_timeout
+        self.local.set(key, envelope, hard_timeout)
+        if shared:
+            try:
+                cache.set(key, envelope, hard_timeout)
+            except (ConnectionInterrupted, InvalidCacheBackendError) as e:
+                logger.warning(f"Cache write error: {e}")
+        return value
+
+    def _local_lock(self, key):
+        with self._local_locks_guard:
+            return self._local_locks.setdefault(key, threading.Lock())
+
+    def _acquire(self, key, shared):
+        """Токен владельца блокировки или None, если она занята."""
+        if not shared:
+            return self._local_lock(key).acquire(blocking=False) or None
+        token = uuid.uuid4().hex
+        try:
+            return token if cache.add(f'{key}:lock', token, settings.CACHE_LOCK_TIMEOUT) else None
+        except (ConnectionInterrupted, InvalidCacheBackendError) as e:
+            logger.warning(f"Cache lock error: {e}")
+            return token
+
+    def _release(self, key, shared, token):
+        if not shared:
+            self._local_lock(key).release()
+            return
+        try:
+            _release_lock(f'{key}:lock', token)
+        except (ConnectionInterrupted, InvalidCacheBackendError, RedisError) as e:
+            logger.warning(f"Cache lock error: {e}")
+
+    def _wait_for(self, key, shared):
+        if not shared:
+            lock = self._local_lock(key)
+            if lock.acquire(timeout=settings.CACHE_LOCK_WAIT):
+                lock.release()
+            return self._get_envelope(key, shared)
+
+        deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            envelope = self._get_envelope(key, shared)
+            if envelope is not None:
+                return envelope
+        return None
+
+    async def aget_or_compute(self, key, compute, timeout, stale_timeout=None):
+        """
+        Асинхронный get_or_compute() для значений в Redis (shared=True):
+        compute — корутинная функция, ожидание блокировки не занимает поток.
+        """
+        stale_timeout = timeout if stale_timeout is None else stale_timeout
+        _ensure_listener()
+        envelope = self.local.get(key)
+        if not _is_envelope(envelope):
+            envelope = await self._aread_shared(key)
+            if envelope is not None:
+                self.local.set(key, envelope)
+
+        if envelope is not None and not _should_refresh(envelope):
+            return envelope['value']
+
+        token = uuid.uuid4().hex
+        if await _acache_add(f'{key}:lock', token, settings.CACHE_LOCK_TIMEOUT, default=True):
+            try:
+                return await self._arecompute(key, compute, timeout, stale_timeout)
+            finally:
+                await _acache_release(f'{key}:lock', token)
+
+        if envelope is not None:
+            return envelope['value']
+
+        deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            envelope = await self._aread_shared(key)
+            if envelope is not None:
+                self.local.set(key, envelope)
+                return envelope['value']
+        return await self._arecompute(key, compute, timeout, stale_timeout)
+
+    async def _aread_shared(self, key):
+        envelope = await _acache_get(key)
+        return envelope if _is_envelope(envelope) else None
+
+    async def _arecompute(self, key, compute, timeout, stale_timeout):
+        started = time.time()
+        value = await compute()
+        finished = time.time()
+        envelope = {
+            'value': value,
+            'expires': finished + timeout,
+            'delta': finished - started,
+        }
+        self.local.set(key, envelope, timeout + stale_timeout)
+        await _acache_set(key, envelope, timeout + stale_timeout)
+        return value
+
+
+GENERATION_KEY = 'generation:{}'
+
+
+class CacheNamespace:
+    """
+    Ключи вида ``{name}:g{поколение}:{части}``. bump() увеличивает
+    поколение (INCR в Redis), и все старые ключи семейства перестают
+    читаться; они истекают сами по TTL. Текущее поколение кэшируется
+    в L1 и сбрасывается во всех процессах через pub/sub.
+    """
+
+    def __init__(self, name, tiered):
+        self.name = name
+        self.tiered = tiered
+        self.generation_key = GENERATION_KEY.format(name)
+
+    def generation(self):
+        generation = self.tiered.local.get(self.generation_key)
+        if generation is not _MISSING:
+            return generation
+
+        _ensure_listener()
+        try:
+            generation = cache.get(self.generation_key)
+            if generation is None:
+                # Начинаем с текущего времени, а не с 1: если счетчик вытеснят
+                # из Redis, новые ключи не совпадут со старыми
+                cache.add(self.generation_key, int(time.time()), None)
+                generation = cache.get(self.generation_key)
+        except (ConnectionInterrupted, InvalidCacheBackendError) as e:
+            logger.warning(f"Cache generation read error: {e}")
+            generation = None
+        if generation is None:
+            return 0
+
+        self.tiered.local.set(self.generation_key, int(generation))
+        return int(generation)
+
+    async def ageneration(self):
+        generation = self.tiered.local.get(self.generation_key)
+        if generation is not _MISSING:
+            return generation
+
+        _ensure_listener()
+        generation = await _acache_get(self.generation_key)
+        if generation is None:
+            await _acache_add(self.generation_key, int(time.time()), None)
+            generation = await _acache_get(self.generation_key)
+        if generation is None:
+            return 0
+
+        self.tiered.local.set(self.generation_key, int(generation))
+        return int(generation)
+
+    def key(self, *parts):
+        return self._format_key(self.generation(), parts)
+
+    async def akey(self, *parts):
+        return self._format_key(await self.ageneration(), parts)
+
+    def _format_key(self, generation, parts):
+        suffix = ':'.join(str(part) for part in parts)
+        return f'{self.name}:g{generation}:{suffix}'
+
+    def bump(self):
+        try:
+            try:
+                cache.incr(self.generation_key)
+            except ValueError:
+                cache.add(self.generation_key, int(time.time()), None)
+                cache.incr(self.generation_key)
+        except (ConnectionInterrupted, InvalidCacheBackendError) as e:
+            logger.warning(f"Cache generation bump error: {e}")
+        self.tiered.local.delete(self.generation_key)
+        publish_invalidation(self.tiered.name, [self.generation_key])
+
+
+def generations_etag(namespaces, *extra):
+    """Сильный ETag из текущих поколений: меняется при любой инвалидации семейства."""
+    generations = [namespace.generation() for namespace in namespaces]
+    return _etag(namespaces, generations, extra)
+
+
+async def agenerations_etag(namespaces, *extra):
+    generations = [await namespace.ageneration() for namespace in namespaces]
+    return _etag(namespaces, generations, extra)
+
+
+def _etag(namespaces, generations, extra):
+    parts = [
+        f'{namespace.name}:{generation}'
+        for namespace, generation in zip(namespaces, generations)
+    ]
+    parts.extend(str(part) for part in extra)
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+def _is_envelope(value):
+    return isinstance(value, dict) and 'expires' in value and 'value' in value
+
+
+def _should_refresh(envelope):
+    """XFetch: вероятность досрочного пересчета растет к моменту истечения."""
+    jitter = -envelope['delta'] * settings.CACHE_EARLY_REFRESH_BETA * math.log(
+        random.random() or 1e-12
+    )
+    return time.time() + jitter >= envelope['expires']
+
+
+def _redis_connection():
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+    except NotImplementedError:
+        # Кэш не на Redis (тесты, LocMemCache) — работаем только с локальным L1
+        return None
+
+
+def _release_lock(key, token):
+    redis = _redis_connection()
+    if redis is None:
+        if cache.get(key) == token:
+            cache.delete(key)
+        return
+    if _release_script['instance'] is None:
+        _release_script['instance'] = redis.register_script(RELEASE_LOCK_SCRIPT)
+    _release_script['instance'](
+        keys=[cache.client.make_key(key)], args=[cache.client.encode(token)], client=redis,
+    )
+
+
+def _async_redis():
+    """
+    Клиент redis.asyncio для текущего event loop. None, если кэш не на
+    django-redis: тогда используются async-методы Django (в потоке).
+    """
+    client_wrapper = getattr(cache, 'client', None)
+    if not hasattr(client_wrapper, 'make_key'):
+        return None
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        from redis import asyncio as redis_asyncio
+
+        location = settings.CACHES['default']['LOCATION']
+        if isinstance(location, (list, tuple)):
+            location = location[0]
+        client = redis_asyncio.Redis.from_url(location)
+        _async_clients[loop] = client
+    return client
+
+
+async def _acache_get(key, default=None):
+    client = _async_redis()
+    try:
+        if client is None:
+            return await cache.aget(key, default)
+        value = await client.get(cache.client.make_key(key))
+    except (RedisError, OSError, ConnectionInterrupted) as e:
+        logger.warning(f"Cache read error: {e}")
+        return default
+    return default if value is None else cache.client.decode(value)
+
+
+async def _acache_set(key, value, timeout):
+    client = _async_redis()
+    try:
+        if client is None:
+            await cache.aset(key, value, timeout)
+        else:
+            await client.set(cache.client.make_key(key), cache.client.encode(value), ex=timeout)
+    except (RedisError, OSError, ConnectionInterrupted) as e:
+        logger.warning(f"Cache write error: {e}")
+
+
+async def _acache_add(key, value, timeout, default=False):
+    client = _async_redis()
+    try:
+        if client is None:
+            return await cache.aadd(key, value, timeout)
+        return bool(await client.set(
+            cache.client.make_key(key), cache.client.encode(value), ex=timeout, nx=True
+        ))
+    except (RedisError, OSError, ConnectionInterrupted) as e:
+        logger.warning(f"Cache write error: {e}")
+        return default
+
+
+async def _acache_release(key, token):
+    """Асинхронный _release_lock(): удаляет ключ, только если в нем token."""
+    client = _async_redis()
+    try:
+        if client is None:
+            if await cache.aget(key) == token:
+                await cache.adelete(key)
+        else:
+            await client.eval(
+                RELEASE_LOCK_SCRIPT, 1, cache.client.make_key(key), cache.client.encode(token)
+            )
+    except (RedisError, OSError, ConnectionInterrupted) as e:
+        logger.warning(f"Cache delete error: {e}")
+
+
+async def aclaim_key(key, timeout):
+    """
+    Атомарно занимает ключ (SET NX) — для идемпотентной обработки событий.
+    При недоступном Redis возвращает True: лучше обработать дубль, чем потерять событие.
+    """
+    return await _acache_add(key, 1, timeout, default=True)
+
+
+def publish_invalidation(name, keys):
+    message = json.dumps({'cache': name, 'keys': list(keys), 'origin': _origin})
+    try:
+        connection = _redis_connection()
+        if connection is not None:
+            connection.publish(settings.TIERED_CACHE_CHANNEL, message)
+    except Exception as e:
+        logger.warning(f"Cache invalidation publish error: {e}")
+
+
+def _handle_message(data):
+    try:
+        payload = json.loads(data)
+    except (TypeError, ValueError):
+        return
+    if payload.get('origin') == _origin:
+        return
+    target = _registry.get(payload.get('cache'))
+    if target is not None:
+        target.local.delete(*payload.get('keys', []))
+
+
+def _clear_all_local():
+    for tiered in _registry.values():
+        tiered.local.clear()
+
+
+def _listen():
+    backoff = 1
+    while True:
+        try:
+            connection = _redis_connection()
+            if connection is None:
+                return
+            pubsub = connection.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(settings.TIERED_CACHE_CHANNEL)
+            _clear_all_local()
+            backoff = 1
+            for message in pubsub.listen():
+                if message.get('type') == 'message':
+                    _handle_message(message['data'])
+        except Exception as e:
+            logger.warning(f"Cache invalidation subscriber error: {e}")
+        _clear_all_local()
+        time.sleep(backoff)
+        backoff = min(backoff * 2, 30)
+
+
+def _ensure_listener():
+    # После fork() в воркере gunicorn поток подписки нужно запустить заново
+    pid = os.getpid()
+    if _listener['pid'] == pid:
+        return
+    with _listener_lock:
+        if _listener['pid'] == pid:
+            return
+        thread = threading.Thread(target=_listen, name='cache-invalidation', daemon=True)
+        thread.start()
+        _listener.update(pid=pid, thread=thread)
@@ -0,0 +1,37 @@
+"""
+PostgreSQL-бэкенд Django с метриками соединений.
+
+Поведение не меняется: замеряется только установка нового соединения
+и неудачные проверки здоровья постоянных соединений (CONN_HEALTH_CHECKS).
+Если перед БД стоит PgBouncer, в время установки входит ожидание
+свободного серверного соединения в его пуле.
+"""
+import time
+
+from django.conf import settings
+from django.db.backends.postgresql import base
+
+from apps.core.metrics import (
+    DB_CONNECTION_SETUP_SECONDS,
+    DB_CONNECTIONS_OPENED,
+    DB_HEALTH_CHECK_FAILURES,
+)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def _metric_labels(self):
+        return {'alias': self.alias, 'process_type': settings.PROCESS_TYPE}
+
+    def get_new_connection(self, conn_params):
+        started = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        labels = self._metric_labels()
+        DB_CONNECTION_SETUP_SECONDS.labels(**labels).observe(time.perf_counter() - started)
+        DB_CONNECTIONS_OPENED.labels(**labels).inc()
+        return connection
+
+    def is_usable(self):
+        usable = super().is_usable()
+        if not usable:
+            DB_HEALTH_CHECK_FAILURES.labels(**self._metric_labels()).inc()
+        return usable
@@ -0,0 +1,108 @@
+"""
+Маршрутизация чтений на реплики.
+
+По умолчанию все запросы идут на primary. Чтение с реплики включается явно
+через ``use_replica()`` / ``@read_replica`` для кода, который терпит
+отставание репликации: поиск, статистика, отчеты, запросы бота.
+
+Не включайте реплику там, где результат кладется в общий кэш или уходит
+с ETag: после bump поколения отстающая реплика закрепила бы старые данные
+под новым ключом.
+
+Read-your-writes: любая запись в рамках области (запрос, ``use_replica``)
+закрепляет последующие чтения этой области за primary, а
+``PrimaryPinMiddleware`` продлевает закрепление на следующие запросы
+пользователя через cookie.
+"""
+import asyncio
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+class PrimaryPin:
+    # Изменяемый объект, а не флаг в ContextVar: запись может произойти
+    # в потоке sync_to_async, а проверка — в исходном контексте
+    __slots__ = ('active', 'wrote')
+
+    def __init__(self, active=False):
+        self.active = active
+        self.wrote = False
+
+
+_replica_allowed = ContextVar('db_replica_allowed', default=False)
+_primary_pin = ContextVar('db_primary_pin', default=None)
+
+
+@contextmanager
+def primary_pin_scope(active=False):
+    """Область read-your-writes (обычно HTTP-запрос)."""
+    pin = PrimaryPin(active)
+    token = _primary_pin.set(pin)
+    try:
+        yield pin
+    finally:
+        _primary_pin.reset(token)
+
+
+@contextmanager
+def use_replica():
+    replica_token = _replica_allowed.set(True)
+    pin_token = _primary_pin.set(PrimaryPin()) if _primary_pin.get() is None else None
+    try:
+        yield
+    finally:
+        if pin_token is not None:
+            _primary_pin.reset(pin_token)
+        _replica_allowed.reset(replica_token)
+
+
+def read_replica(func):
+    """Декоратор для sync и async функций (в т.ч. view): чтения — с реплики."""
+    if asyncio.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with use_replica():
+                return await func(*args, **kwargs)
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with use_replica():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def pin_to_primary():
+    pin = _primary_pin.get()
+    if pin is not None:
+        pin.active = pin.wrote = True
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        pin = _primary_pin.get()
+        if replicas and _replica_allowed.get() and not (pin and pin.active):
+            return random.choice(replicas)
+        # Явно primary, чтобы связи объекта, прочитанного с реплики, не уходили туда же
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
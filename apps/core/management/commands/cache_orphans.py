@@ -0,0 +1,68 @@
+import re
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from apps.core.cache import GENERATION_KEY
+
+NAMESPACED_KEY_RE = re.compile(r'^(?P<name>[^:]+):g(?P<generation>\d+):')
+
+
+class Command(BaseCommand):
+    help = 'Показывает ключи кэша, оставшиеся от старых поколений (CacheNamespace)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--delete',
+            action='store_true',
+            help='Удалить найденные ключи, не дожидаясь истечения TTL',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Размер пакета SCAN и удаления',
+        )
+
+    def handle(self, *args, **options):
+        if not hasattr(cache, 'iter_keys'):
+            self.stdout.write(self.style.ERROR('❌ Кэш не на Redis: обход ключей недоступен'))
+            return
+
+        batch_size = options['batch_size']
+        generations = {}
+        stats = defaultdict(lambda: {'current': 0, 'orphaned': 0})
+        orphaned = []
+
+        # SCAN здесь допустим: команда запускается вручную, не на пути запроса
+        for key in cache.iter_keys('*:g*', itersize=batch_size):
+            match = NAMESPACED_KEY_RE.match(key)
+            if not match:
+                continue
+            name = match['name']
+            if name not in generations:
+                generations[name] = cache.get(GENERATION_KEY.format(name))
+
+            current = generations[name]
+            if current is not None and int(match['generation']) == int(current):
+                stats[name]['current'] += 1
+            else:
+                stats[name]['orphaned'] += 1
+                orphaned.append(key)
+
+        for name, counts in sorted(stats.items()):
+            if counts['orphaned']:
+                self.stdout.write(
+                    f"{name}: поколение {generations[name]}, "
+                    f"актуальных {counts['current']}, устаревших {counts['orphaned']}"
+                )
+
+        self.stdout.write(
+            f'Семейств: {len(stats)}, устаревших ключей: {len(orphaned)}'
+        )
+
+        if options['delete'] and orphaned:
+            for start in range(0, len(orphaned), batch_size):
+                cache.delete_many(orphaned[start:start + batch_size])
+            self.stdout.write(self.style.SUCCESS(f'✅ Удалено ключей: {len(orphaned)}'))
@@ -0,0 +1,86 @@
+"""
+Метрики приложения для Prometheus.
+
+Web отдает их через /metrics, Celery и бот — через отдельный HTTP-порт
+(METRICS_PORT). При нескольких процессах (gunicorn, prefork Celery)
+нужен PROMETHEUS_MULTIPROC_DIR: каждый процесс пишет свои значения
+в общий каталог, а экспорт их суммирует.
+
+/metrics раскрывает хосты БД, пулы и имена view, поэтому доступен только
+персоналу и прямым (не через прокси) запросам из METRICS_ALLOWED_NETWORKS —
+так Prometheus ходит на web:8000 внутри сети docker-compose.
+"""
+import ipaddress
+import logging
+import os
+
+from django.conf import settings
+from django.http import Http404
+from django_prometheus.exports import ExportToDjangoView
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    multiprocess,
+    start_http_server,
+)
+
+logger = logging.getLogger(__name__)
+
+DB_CONNECTION_SETUP_SECONDS = Histogram(
+    'db_connection_setup_seconds',
+    'Время установки нового соединения с БД (ожидание пула + handshake)',
+    ['alias', 'process_type'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+DB_CONNECTIONS_OPENED = Counter(
+    'db_connections_opened_total',
+    'Количество открытых соединений с БД',
+    ['alias', 'process_type'],
+)
+DB_HEALTH_CHECK_FAILURES = Counter(
+    'db_connection_health_check_failures_total',
+    'Постоянные соединения, не прошедшие проверку перед переиспользованием',
+    ['alias', 'process_type'],
+)
+
+
+def _internal_request(request):
+    # Запрос через nginx пришел бы с внутреннего адреса прокси
+    if 'HTTP_X_FORWARDED_FOR' in request.META or 'HTTP_X_REAL_IP' in request.META:
+        return False
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network) for network in settings.METRICS_ALLOWED_NETWORKS)
+
+
+def metrics_view(request):
+    """ExportToDjangoView для персонала и внутренних запросов, остальным — 404."""
+    if not (request.user.is_staff or _internal_request(request)):
+        raise Http404
+    return ExportToDjangoView(request)
+
+
+def metrics_registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def start_metrics_server(port):
+    """Поднимает HTTP-экспорт метрик для процессов без Django-роутинга."""
+    if not port:
+        return
+    start_http_server(port, registry=metrics_registry())
+    logger.info(f"Метрики Prometheus доступны на порту {port}")
+
+
+def mark_process_dead(pid):
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,173 @@
+import logging
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .db.routers import primary_pin_scope
+from .profiling import SamplingProfiler, is_profiling_requested, save_profile
+from .query_budget import QueryBudgetExceeded, QueryRecorder, get_view_budget
+from .response_cache import (
+    build_response,
+    get_response_cache_policy,
+    is_cacheable_request,
+    is_cacheable_response,
+    page_cache,
+    response_cache_key,
+    store_response,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMiddleware:
+    """
+    Записывает все SQL-запросы запроса, проверяет бюджет view и ищет N+1.
+    В тестах (QUERY_BUDGET_STRICT) нарушение бюджета — исключение,
+    в продакшене — предупреждение в лог со стеком виновного запроса.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_BUDGET_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        request.query_recorder = recorder
+        with recorder.capture():
+            response = self.get_response(request)
+
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(recorder.count)
+
+        if recorder.over_budget or recorder.n_plus_one:
+            label = f"{request.method} {request.path}"
+            report = recorder.report(label)
+            if recorder.over_budget and settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(report)
+            logger.warning(report)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        recorder = getattr(request, 'query_recorder', None)
+        if recorder is not None:
+            recorder.max_queries = get_view_budget(view_func)
+
+
+class PrimaryPinMiddleware:
+    """
+    Read-your-writes между запросами: если запрос что-то записал в БД,
+    чтения пользователя DB_PRIMARY_PIN_SECONDS идут на primary, даже во view
+    с ``read_replica``. Без реплик не подключается.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        cookie = settings.DB_PRIMARY_PIN_COOKIE
+        with primary_pin_scope(active=cookie in request.COOKIES) as pin:
+            response = self.get_response(request)
+
+        if pin.wrote:
+            response.set_cookie(
+                cookie, '1',
+                max_age=settings.DB_PRIMARY_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует запрос персонала с заголовком ``X-Profile: 1`` или
+    параметром ``?_profile``. При PROFILING_ENABLED=False не подключается.
+
+    Семплер снимает стек потока, в котором выполняется view, поэтому он
+    запускается в process_view и только для синхронных view. Корутина
+    async-view выполняется в потоке event loop вместе с чужими запросами —
+    такой профиль не отнести к одному запросу. Для async-view профиль не
+    снимается, ответ получает заголовок ``X-Profile-Skipped``.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not is_profiling_requested(request) or not request.user.is_staff:
+            return self.get_response(request)
+
+        request._profiling_requested = True
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler = getattr(request, '_profiler', None)
+            if profiler is not None:
+                profiler.stop()
+
+        if profiler is None:
+            # View не вызывалась (404, ответ раньше view) или async-view
+            if getattr(request, '_profiling_skipped', None):
+                response['X-Profile-Skipped'] = request._profiling_skipped
+            return response
+        profile_id = save_profile(
+            'request',
+            f"{request.method} {request.path}",
+            profiler,
+            user=request.user.email,
+            status=response.status_code,
+        )
+        response['X-Profile-Id'] = profile_id
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not getattr(request, '_profiling_requested', False):
+            return None
+        if iscoroutinefunction(view_func):
+            request._profiling_skipped = 'async view'
+        else:
+            # Синхронная view выполняется в этом же потоке — его и семплируем
+            request._profiler = SamplingProfiler().start()
+        return None
+
+
+class ResponseCacheMiddleware:
+    """
+    Отдает анонимным посетителям готовые ответы view с ``cache_response``.
+    Должен стоять после LocaleMiddleware (язык входит в ключ)
+    и после CsrfViewMiddleware (выставляет cookie для подставленного токена).
+    """
+
+    def __init__(self, get_response):
+        if not settings.RESPONSE_CACHE_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        pending = getattr(request, '_response_cache_pending', None)
+        if pending is not None and is_cacheable_response(request, response):
+            key, timeout = pending
+            store_response(key, response, timeout)
+            response['X-Response-Cache'] = 'MISS'
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        policy = get_response_cache_policy(view_func)
+        if policy is None or not is_cacheable_request(request):
+            return None
+
+        key = response_cache_key(request, policy.namespaces(view_kwargs))
+        cached = page_cache.get(key)
+        if cached is not None:
+            return build_response(request, cached)
+        request._response_cache_pending = (key, policy.timeout)
+        return None
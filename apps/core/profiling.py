@@ -0,0 +1,206 @@
+"""
+Семплирующий профайлер по запросу.
+
+Фоновый поток раз в PROFILING_INTERVAL секунд снимает стек профилируемого
+потока (sys._current_frames) и копит "свернутые" стеки в формате
+flamegraph.pl / speedscope. Профили хранятся в кэше с ограничением
+по количеству (PROFILING_MAX_PROFILES) и времени (PROFILING_RETENTION).
+
+Индекс профилей в Redis — sorted set по времени создания: добавление и
+обрезка по времени и количеству выполняются одной транзакцией, поэтому
+параллельные сохранения не теряют записи, а записи истекших профилей
+удаляются вместе с ними.
+"""
+import json
+import logging
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from .cache import _redis_connection
+
+logger = logging.getLogger(__name__)
+
+INDEX_KEY = 'profiling:index'
+PROFILE_KEY = 'profiling:profile:{}'
+MAX_DEPTH = 128
+
+_task_profilers = {}
+_local_index_lock = threading.Lock()
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    filename = code.co_filename
+    base_dir = str(settings.BASE_DIR)
+    if filename.startswith(base_dir):
+        filename = filename[len(base_dir) + 1:]
+    elif 'site-packages' in filename:
+        filename = filename.split('site-packages', 1)[1].lstrip('/\\')
+    return f"{code.co_name} ({filename}:{frame.f_lineno})"
+
+
+def _collapse(frame):
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class SamplingProfiler:
+    def __init__(self, interval=None):
+        self.interval = interval or settings.PROFILING_INTERVAL
+        self.samples = Counter()
+        self.duration = 0.0
+        self._thread_id = None
+        self._stopped = threading.Event()
+        self._sampler = None
+
+    def start(self):
+        self._thread_id = threading.get_ident()
+        self._started = time.perf_counter()
+        self._sampler = threading.Thread(
+            target=self._run, name='sampling-profiler', daemon=True
+        )
+        self._sampler.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._sampler.join()
+        self.duration = time.perf_counter() - self._started
+        return self
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self.samples[_collapse(frame)] += 1
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def summarize(stacks, limit=25):
+    """Топ функций по собственному (self) и суммарному (total) числу семплов."""
+    own = Counter()
+    total = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        own[frames[-1]] += count
+        for frame in set(frames):
+            total[frame] += count
+    return {
+        'self': own.most_common(limit),
+        'total': total.most_common(limit),
+    }
+
+
+def save_profile(kind, name, profiler, **meta):
+    profile_id = uuid.uuid4().hex[:12]
+    summary = {
+        'id': profile_id,
+        'kind': kind,
+        'name': name,
+        'created_at': timezone.now().isoformat(),
+        'duration': round(profiler.duration, 4),
+        'samples': sum(profiler.samples.values()),
+        'interval': profiler.interval,
+        **meta,
+    }
+    retention = settings.PROFILING_RETENTION
+    try:
+        cache.set(
+            PROFILE_KEY.format(profile_id),
+            {**summary, 'stacks': dict(profiler.samples)},
+            retention,
+        )
+        redis = _redis_connection()
+        if redis is None:
+            overflow = _add_to_local_index(summary, retention)
+        else:
+            overflow = _add_to_redis_index(redis, summary, retention)
+        cache.delete_many([PROFILE_KEY.format(expired['id']) for expired in overflow])
+    except Exception as e:
+        logger.warning(f"Не удалось сохранить профиль {profile_id}: {e}")
+    return profile_id
+
+
+def _add_to_redis_index(redis, summary, retention):
+    """Добавляет профиль в индекс; возвращает вытесненные по количеству."""
+    now = time.time()
+    pipe = redis.pipeline()
+    pipe.zadd(INDEX_KEY, {json.dumps(summary): now})
+    pipe.zremrangebyscore(INDEX_KEY, '-inf', now - retention)
+    pipe.zrange(INDEX_KEY, 0, -settings.PROFILING_MAX_PROFILES - 1)
+    pipe.zremrangebyrank(INDEX_KEY, 0, -settings.PROFILING_MAX_PROFILES - 1)
+    pipe.expire(INDEX_KEY, retention)
+    return [json.loads(member) for member in pipe.execute()[2]]
+
+
+def _add_to_local_index(summary, retention):
+    # Кэш не на Redis (тесты, разработка): индекс в одном процессе
+    with _local_index_lock:
+        index = cache.get(INDEX_KEY) or []
+        index.insert(0, summary)
+        cache.set(INDEX_KEY, index[:settings.PROFILING_MAX_PROFILES], retention)
+    return index[settings.PROFILING_MAX_PROFILES:]
+
+
+def list_profiles():
+    redis = _redis_connection()
+    if redis is not None:
+        try:
+            since = time.time() - settings.PROFILING_RETENTION
+            return [json.loads(member) for member in redis.zrevrangebyscore(INDEX_KEY, '+inf', since)]
+        except RedisError as e:
+            logger.warning(f"Не удалось прочитать индекс профилей: {e}")
+            return []
+    # Профиль мог истечь или быть вытеснен из кэша раньше записи индекса
+    index = cache.get(INDEX_KEY) or []
+    present = cache.get_many([PROFILE_KEY.format(profile['id']) for profile in index])
+    return [profile for profile in index if PROFILE_KEY.format(profile['id']) in present]
+
+
+def get_profile(profile_id):
+    return cache.get(PROFILE_KEY.format(profile_id))
+
+
+def is_profiling_requested(request):
+    return (
+        request.META.get('HTTP_X_PROFILE') == '1'
+        or '_profile' in request.GET
+    )
+
+
+def _start_task_profile(task_id=None, task=None, **kwargs):
+    if task is not None and task.name in settings.PROFILING_CELERY_TASKS:
+        _task_profilers[task_id] = SamplingProfiler().start()
+
+
+def _stop_task_profile(task_id=None, task=None, state=None, **kwargs):
+    profiler = _task_profilers.pop(task_id, None)
+    if profiler is not None:
+        profiler.stop()
+        save_profile('task', task.name, profiler, task_id=task_id, state=state)
+
+
+def install_celery_hooks():
+    """Подключает профилирование Celery-задач из PROFILING_CELERY_TASKS."""
+    if not settings.PROFILING_ENABLED or not settings.PROFILING_CELERY_TASKS:
+        return
+    from celery.signals import task_postrun, task_prerun
+
+    task_prerun.connect(_start_task_profile, weak=False, dispatch_uid='profiling_prerun')
+    task_postrun.connect(_stop_task_profile, weak=False, dispatch_uid='profiling_postrun')
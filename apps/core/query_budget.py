@@ -0,0 +1,147 @@
+"""
+Учет SQL-запросов в рамках одного HTTP-запроса.
+
+- ``query_budget(n)`` объявляет бюджет запросов рядом с view;
+- ``QueryRecorder`` записывает все запросы и ищет повторяющиеся
+  "формы" запросов (отпечатки N+1);
+- ``assert_query_budget(n)`` — помощник для тестов.
+"""
+import logging
+import re
+import time
+import traceback
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST_RE = re.compile(r'\bIN \((?:%s, )*%s\)', re.IGNORECASE)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def fingerprint(sql):
+    """Приводит SQL к "форме": без литералов и с схлопнутыми IN (...)."""
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    return _WHITESPACE_RE.sub(' ', sql).strip()
+
+
+def query_budget(max_queries):
+    """Объявляет максимальное число SQL-запросов для view (функции или класса)."""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def get_view_budget(view_func):
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is not None:
+        return budget
+    # as_view() у Django и DRF хранит исходный класс в view_class / cls
+    view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+    return getattr(view_class, 'query_budget', None)
+
+
+def _project_stack():
+    frames = traceback.extract_stack()[:-3]
+    base_dir = str(settings.BASE_DIR)
+    project_frames = [
+        frame for frame in frames
+        if frame.filename.startswith(base_dir) and 'site-packages' not in frame.filename
+    ]
+    return ''.join(traceback.format_list(project_frames or frames[-10:]))
+
+
+class QueryRecorder:
+    def __init__(self, max_queries=None, n_plus_one_threshold=None):
+        self.max_queries = max_queries
+        if n_plus_one_threshold is None:
+            n_plus_one_threshold = settings.QUERY_BUDGET_N_PLUS_ONE_THRESHOLD
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.queries = []
+        self.fingerprints = Counter()
+        self.stacks = {}
+        self.over_budget_stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, time.perf_counter() - started)
+
+    def record(self, sql, duration):
+        shape = fingerprint(sql)
+        self.fingerprints[shape] += 1
+        self.queries.append((sql, duration))
+
+        # Стек снимаем только в момент нарушения, чтобы не платить за каждый запрос
+        if self.fingerprints[shape] == self.n_plus_one_threshold:
+            self.stacks[shape] = _project_stack()
+        if self.max_queries is not None and len(self.queries) == self.max_queries + 1:
+            self.over_budget_stack = _project_stack()
+
+    @contextmanager
+    def capture(self):
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(self))
+            yield self
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(duration for _, duration in self.queries)
+
+    @property
+    def over_budget(self):
+        return self.max_queries is not None and self.count > self.max_queries
+
+    @property
+    def n_plus_one(self):
+        return [
+            (shape, count) for shape, count in self.fingerprints.most_common()
+            if count >= self.n_plus_one_threshold
+        ]
+
+    def report(self, label=''):
+        lines = []
+        if self.over_budget:
+            lines.append(
+                f"{label}: {self.count} SQL-запросов при бюджете {self.max_queries}"
+            )
+            if self.over_budget_stack:
+                lines.append(f"Запрос сверх бюджета:\n{self.over_budget_stack}")
+        for shape, count in self.n_plus_one:
+            lines.append(f"{label}: N+1, {count} одинаковых запросов: {shape}")
+            lines.append(self.stacks.get(shape, ''))
+        return '\n'.join(lines)
+
+
+@contextmanager
+def assert_query_budget(max_queries, n_plus_one_threshold=None, allow_n_plus_one=False):
+    """
+    Тестовый помощник:
+
+        with assert_query_budget(3):
+            client.get('/cottages/page/')
+    """
+    recorder = QueryRecorder(max_queries, n_plus_one_threshold)
+    with recorder.capture():
+        yield recorder
+    if recorder.over_budget or (recorder.n_plus_one and not allow_n_plus_one):
+        raise QueryBudgetExceeded(recorder.report('assert_query_budget'))
@@ -0,0 +1,115 @@
+"""
+Кэш целых ответов публичных страниц для анонимных GET-запросов.
+
+View объявляет кэширование декоратором ``cache_response(timeout, tags)``.
+Ключ — путь, нормализованная строка запроса, язык и текущие поколения
+тегов (CacheNamespace): сигналы каталога увеличивают поколение, и
+зависящие от него страницы перестают читаться из кэша.
+
+CSRF-токен в кэше заменяется заглушкой и подставляется заново для
+каждого посетителя.
+"""
+import hashlib
+import re
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.translation import get_language
+
+from .cache import CacheNamespace, TieredCache
+
+CSRF_PLACEHOLDER = '__response_cache_csrf_token__'
+_CSRF_INPUT_RE = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+# Метки рекламных кампаний не меняют содержимое страницы
+_IGNORED_PARAMS = ('utm_', 'fbclid', 'gclid', 'yclid', '_openstat')
+
+page_cache = TieredCache(
+    'pages',
+    max_entries=settings.RESPONSE_CACHE_L1_MAX_ENTRIES,
+    timeout=settings.CATALOG_L1_TIMEOUT,
+)
+pages_namespace = CacheNamespace('pages', page_cache)
+
+
+class ResponseCachePolicy:
+    def __init__(self, timeout, tags=()):
+        self.timeout = timeout
+        self.tags = tags
+
+    def namespaces(self, view_kwargs):
+        return self.tags(**view_kwargs) if callable(self.tags) else list(self.tags)
+
+
+def cache_response(timeout, tags=()):
+    """
+    Кэширует ответы view анонимным посетителям. tags — список
+    CacheNamespace или функция от kwargs URL, возвращающая такой список.
+    """
+    def decorator(view):
+        view.response_cache = ResponseCachePolicy(timeout, tags)
+        return view
+    return decorator
+
+
+def get_response_cache_policy(view_func):
+    policy = getattr(view_func, 'response_cache', None)
+    if policy is not None:
+        return policy
+    view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+    return getattr(view_class, 'response_cache', None)
+
+
+def normalized_query_string(query_dict):
+    items = sorted(
+        (key, value)
+        for key, values in query_dict.lists()
+        if not key.startswith(_IGNORED_PARAMS)
+        for value in values
+    )
+    return urlencode(items)
+
+
+def is_cacheable_request(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    # Сессия или flash-сообщения — ответ может быть персональным
+    return (
+        settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def is_cacheable_response(request, response):
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return False
+    if 'private' in response.get('Cache-Control', '') or 'no-store' in response.get('Cache-Control', ''):
+        return False
+    session = getattr(request, 'session', None)
+    return session is None or not session.modified
+
+
+def response_cache_key(request, namespaces):
+    tags = ','.join(f'{namespace.name}:{namespace.generation()}' for namespace in namespaces)
+    raw = f'{request.path}?{normalized_query_string(request.GET)}|{tags}'
+    return pages_namespace.key(get_language(), hashlib.md5(raw.encode()).hexdigest())
+
+
+def store_response(key, response, timeout):
+    content = response.content.decode(response.charset)
+    page_cache.set(key, {
+        'content': _CSRF_INPUT_RE.sub(rf'\g<1>{CSRF_PLACEHOLDER}\g<2>', content),
+        'content_type': response['Content-Type'],
+    }, timeout)
+
+
+def build_response(request, cached):
+    content = cached['content']
+    if CSRF_PLACEHOLDER in content:
+        # get_token() заодно помечает cookie csrftoken для CsrfViewMiddleware
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request))
+    response = HttpResponse(content, content_type=cached['content_type'])
+    response['X-Response-Cache'] = 'HIT'
+    return response
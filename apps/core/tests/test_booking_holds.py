@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.bookings import holds
+from apps.bookings.forms import BookingForm
+from apps.bookings.models import Booking, BookingStatus
+from apps.cottages.models import Cottage
+
+
+@pytest.fixture
+def cottage(db):
+    holds._local_holds.clear()
+    return Cottage.objects.create(
+        name='Лесной', description='У озера', address='Озерная, 1',
+        capacity=4, price_per_night=5000,
+    )
+
+
+def _form(cottage, user, check_in, check_out):
+    return BookingForm(
+        {'check_in': check_in, 'check_out': check_out, 'guests': 2},
+        cottage=cottage, user=user,
+    )
+
+
+def test_hold_blocks_competing_checkout(cottage, django_assert_num_queries):
+    User = get_user_model()
+    first = User.objects.create_user('first', 'first@example.com', 'x')
+    second = User.objects.create_user('second', 'second@example.com', 'x')
+    check_in = timezone.localdate() + timedelta(days=10)
+    check_out = check_in + timedelta(days=3)
+
+    assert _form(cottage, first, check_in, check_out).is_valid()
+
+    # Пересечение с чужим удержанием отсекается без единого запроса к БД
+    form = _form(cottage, second, check_in + timedelta(days=1), check_out + timedelta(days=1))
+    with django_assert_num_queries(0):
+        assert not form.is_valid()
+    assert 'другой гость' in str(form.errors)
+
+    # Свое удержание продлевается, соседние даты свободны
+    assert _form(cottage, first, check_in, check_out).is_valid()
+    assert _form(cottage, second, check_out, check_out + timedelta(days=2)).is_valid()
+
+    holds.release_hold(cottage.pk, f'user:{first.pk}')
+    assert holds.place_hold(cottage.pk, check_in, check_out, f'user:{second.pk}') == holds.HOLD_OK
+
+
+def test_hold_expires_and_respects_bookings(cottage, settings):
+    check_in = timezone.localdate() + timedelta(days=5)
+    check_out = check_in + timedelta(days=2)
+    Booking.objects.bulk_create([Booking(
+        cottage=cottage, guest_name='Гость', guests=2, total_price=10000,
+        status=BookingStatus.CONFIRMED, check_in=check_in, check_out=check_out,
+    )])
+    assert holds.place_hold(cottage.pk, check_in, check_out, 'user:1') == holds.HOLD_BOOKED
+
+    settings.BOOKING_HOLD_TTL = 0
+    later = check_out + timedelta(days=1)
+    assert holds.place_hold(cottage.pk, later, later + timedelta(days=1), 'user:1') == holds.HOLD_OK
+    assert holds.held_ranges(cottage.pk) == []
+    assert holds.place_hold(cottage.pk, later, later + timedelta(days=1), 'user:2') == holds.HOLD_OK
+
+
+def test_hold_endpoint_and_availability(cottage, client):
+    User = get_user_model()
+    other = User.objects.create_user('other', 'other@example.com', 'x')
+    check_in = timezone.localdate() + timedelta(days=20)
+    check_out = check_in + timedelta(days=2)
+    holds.place_hold(cottage.pk, check_in, check_out, f'user:{other.pk}')
+
+    client.force_login(User.objects.create_user('guest', 'guest@example.com', 'x'))
+    dates = {'check_in': check_in.isoformat(), 'check_out': check_out.isoformat()}
+    response = client.post(reverse('bookings:hold'), {'cottage': cottage.pk, **dates})
+    assert response.status_code == 409
+    assert response.json()['reason'] == holds.HOLD_TAKEN
+
+    response = client.get(reverse('cottages:availability', args=[cottage.pk]), dates)
+    assert response.json()['available'] is False
+    assert response.json()['held'] is True
+
+    holds.release_hold(cottage.pk, f'user:{other.pk}')
+    response = client.post(reverse('bookings:hold'), {'cottage': cottage.pk, **dates})
+    assert response.json() == {'held': True, 'ttl': 600}
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from apps.bookings.cache import bookings_namespace
+from apps.bookings.models import Booking, BookingStatus
+from apps.bookings.tasks import sweep_booking_lifecycle
+from apps.cottages.cache import availability_namespace
+from apps.cottages.models import Cottage
+
+
+@pytest.fixture
+def notifications(monkeypatch):
+    from apps.notifications import tasks
+
+    sent = {'summary': [], 'email': []}
+    monkeypatch.setattr(tasks.send_lifecycle_summary, 'delay', lambda *args: sent['summary'].append(args))
+    monkeypatch.setattr(tasks.send_email_notification, 'delay', lambda *args: sent['email'].append(args))
+    return sent
+
+
+def test_sweep_completes_past_stays_and_expires_stale_holds(db, settings, notifications, monkeypatch):
+    from apps.bookings import tasks
+
+    monkeypatch.setattr(tasks, 'LIFECYCLE_SUMMARY_SAMPLE', 1)
+    settings.BOOKING_SWEEP_CHUNK_SIZE = 2
+    settings.BOOKING_PENDING_TTL_HOURS = 24
+    cottage = Cottage.objects.create(
+        name='Лесной', description='У озера', address='Озерная, 1',
+        capacity=4, price_per_night=5000,
+    )
+    today = timezone.localdate()
+
+    def booking(status, check_in, nights=2):
+        return Booking(
+            cottage=cottage, guest_name='Гость', guests=2, total_price=10000, status=status,
+            check_in=check_in, check_out=check_in + timedelta(days=nights),
+        )
+
+    past = Booking.objects.bulk_create([booking(BookingStatus.CONFIRMED, today - timedelta(days=5)) for _ in range(3)])
+    current, stale, fresh, missed = Booking.objects.bulk_create([
+        booking(BookingStatus.CONFIRMED, today - timedelta(days=1)),
+        booking(BookingStatus.PENDING, today + timedelta(days=10)),
+        booking(BookingStatus.PENDING, today + timedelta(days=10)),
+        booking(BookingStatus.PENDING, today - timedelta(days=1)),
+    ])
+    Booking.objects.filter(id=stale.id).update(created_at=timezone.now() - timedelta(hours=25))
+    availability_key = availability_namespace(cottage.id).key('dates')
+    page_key = bookings_namespace.key('bot')
+
+    assert sweep_booking_lifecycle() == {'completed': 3, 'expired': 2}
+
+    statuses = dict(Booking.objects.values_list('id', 'status'))
+    assert all(statuses[b.id] == BookingStatus.COMPLETED for b in past)
+    assert statuses[current.id] == BookingStatus.CONFIRMED
+    assert statuses[fresh.id] == BookingStatus.PENDING
+    assert statuses[stale.id] == statuses[missed.id] == BookingStatus.CANCELLED
+
+    # update() минует сигналы — кэши сброшены самим обходом
+    assert availability_namespace(cottage.id).key('dates') != availability_key
+    assert bookings_namespace.key('bot') != page_key
+    # В сводку уходит число отмененных и ограниченная выборка id
+    assert notifications['summary'] == [(3, 2, [min(stale.id, missed.id)])]
+    assert sorted(notifications['email']) == sorted([(stale.id, 'cancelled'), (missed.id, 'cancelled')])
+
+    assert sweep_booking_lifecycle() == {'completed': 0, 'expired': 0}
+    assert len(notifications['summary']) == 1
@@ -0,0 +1,138 @@
+import importlib
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.bookings import occupancy
+from apps.bookings.models import Booking, BookingNight, BookingStatus
+from apps.bookings.tasks import sweep_booking_lifecycle
+from apps.cottages.models import Cottage
+
+
+@pytest.fixture
+def cottage(db, monkeypatch):
+    from apps.notifications import tasks
+
+    for task in (tasks.send_telegram_notification, tasks.send_email_notification, tasks.send_lifecycle_summary):
+        monkeypatch.setattr(task, 'delay', lambda *args: None)
+    return Cottage.objects.create(
+        name='Лесной', description='У озера', address='Озерная, 1',
+        capacity=4, price_per_night=5000,
+    )
+
+
+def _nights(booking):
+    return list(BookingNight.objects.filter(booking=booking).order_by('date').values_list('date', 'status', 'revenue'))
+
+
+def test_nights_follow_booking_create_edit_cancel_and_delete(cottage):
+    check_in = timezone.localdate() + timedelta(days=10)
+    booking = Booking.objects.create(
+        cottage=cottage, guest_name='Гость', guests=2, total_price=Decimal('10000.00'),
+        check_in=check_in, check_out=check_in + timedelta(days=3),
+    )
+    # Остаток от деления — на последнюю ночь, сумма равна стоимости брони
+    assert _nights(booking) == [
+        (check_in, BookingStatus.PENDING, Decimal('3333.33')),
+        (check_in + timedelta(days=1), BookingStatus.PENDING, Decimal('3333.33')),
+        (check_in + timedelta(days=2), BookingStatus.PENDING, Decimal('3333.34')),
+    ]
+    assert list(occupancy.occupied_dates(cottage.id, check_in + timedelta(days=1))) == [
+        check_in + timedelta(days=1), check_in + timedelta(days=2),
+    ]
+
+    booking.check_in += timedelta(days=1)
+    booking.check_out += timedelta(days=1)
+    booking.status = BookingStatus.CONFIRMED
+    booking.save()
+    assert [night[0] for night in _nights(booking)] == [check_in + timedelta(days=offset) for offset in (1, 2, 3)]
+
+    booking.status = BookingStatus.CANCELLED
+    booking.save(update_fields=['status'])
+    assert {night[1] for night in _nights(booking)} == {BookingStatus.CANCELLED}
+    assert not occupancy.occupied_dates(cottage.id, check_in).exists()
+
+    booking.delete()
+    assert not BookingNight.objects.exists()
+
+
+def test_bulk_transitions_update_night_statuses(cottage):
+    today = timezone.localdate()
+    past, stale = Booking.objects.bulk_create([
+        Booking(
+            cottage=cottage, guest_name='Гость', guests=2, total_price=10000, status=status,
+            check_in=check_in, check_out=check_in + timedelta(days=2),
+        )
+        for status, check_in in [
+            (BookingStatus.CONFIRMED, today - timedelta(days=5)),
+            (BookingStatus.PENDING, today - timedelta(days=1)),
+        ]
+    ])
+    occupancy.rebuild(chunk_size=1)
+
+    sweep_booking_lifecycle()
+
+    assert {night[1] for night in _nights(past)} == {BookingStatus.COMPLETED}
+    assert {night[1] for night in _nights(stale)} == {BookingStatus.CANCELLED}
+
+
+def test_admin_action_updates_nights_and_caches(cottage, client, django_user_model, django_capture_on_commit_callbacks):
+    from apps.bookings.cache import bookings_namespace
+    from apps.cottages.cache import availability_namespace
+
+    check_in = timezone.localdate() + timedelta(days=3)
+    booking = Booking.objects.create(
+        cottage=cottage, guest_name='Гость', guests=2, total_price=10000,
+        check_in=check_in, check_out=check_in + timedelta(days=2),
+    )
+    availability_key = availability_namespace(cottage.id).key('dates')
+    page_key = bookings_namespace.key('bot')
+    client.force_login(django_user_model.objects.create_superuser('admin', 'admin@example.com', 'x'))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post(reverse('admin:bookings_booking_changelist'), {'action': 'cancel_bookings', '_selected_action': [booking.id]})
+
+    assert {night[1] for night in _nights(booking)} == {BookingStatus.CANCELLED}
+    assert availability_namespace(cottage.id).key('dates') != availability_key
+    assert bookings_namespace.key('bot') != page_key
+
+
+def test_rebuild_command_restores_missing_nights(cottage):
+    check_in = timezone.localdate() + timedelta(days=3)
+    booking = Booking.objects.create(
+        cottage=cottage, guest_name='Гость', guests=2, total_price=10000,
+        status=BookingStatus.CONFIRMED, check_in=check_in, check_out=check_in + timedelta(days=2),
+    )
+    # Правка в обход ORM-сигналов
+    Booking.objects.filter(pk=booking.pk).update(check_out=check_in + timedelta(days=4))
+    BookingNight.objects.filter(date=check_in).delete()
+
+    call_command('rebuild_occupancy', cottage=cottage.id, chunk_size=10)
+
+    assert [night[0] for night in _nights(booking)] == [check_in + timedelta(days=offset) for offset in range(4)]
+    assert sum(night[2] for night in _nights(booking)) == Decimal(10000)
+
+
+def test_migration_backfills_existing_bookings(cottage, monkeypatch):
+    migration = importlib.import_module('apps.bookings.migrations.0007_backfill_booking_nights')
+    check_in = timezone.localdate() + timedelta(days=3)
+    bookings = Booking.objects.bulk_create([
+        Booking(
+            cottage=cottage, guest_name='Гость', guests=2, total_price=Decimal('1000.00'),
+            status=BookingStatus.CONFIRMED, check_in=check_in + timedelta(days=5 * i),
+            check_out=check_in + timedelta(days=5 * i + 3),
+        )
+        for i in range(3)
+    ])
+    monkeypatch.setattr(migration, 'CHUNK_SIZE', 2)
+
+    migration.backfill(apps, type('SchemaEditor', (), {'connection': connection}))
+
+    assert BookingNight.objects.count() == 9
+    assert [night[2] for night in _nights(bookings[2])] == [Decimal('333.33'), Decimal('333.33'), Decimal('333.34')]
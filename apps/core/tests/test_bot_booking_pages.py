@@ -0,0 +1,100 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+from django.utils import timezone
+
+from apps.bookings.cache import bookings_namespace
+from apps.bookings.models import Booking, BookingStatus
+from apps.core.query_budget import assert_query_budget
+from apps.cottages.models import Cottage
+from apps.telegram_bot import data
+from apps.telegram_bot.booking_pages import (
+    NEXT, PAGE_SIZE, PREV, BookingFilters, callback_data, decode_cursor, encode_cursor, parse_callback,
+)
+
+
+@pytest.fixture
+def bookings(db):
+    cottage = Cottage.objects.create(
+        name='Лесной', description='У озера', address='Озерная, 1',
+        capacity=4, price_per_night=5000,
+    )
+    check_in = date(2026, 7, 1)
+    Booking.objects.bulk_create([
+        Booking(
+            cottage=cottage, guest_name=f'Гость {n}', guests=2, total_price=10000,
+            check_in=check_in + timedelta(days=2 * n), check_out=check_in + timedelta(days=2 * n + 2),
+            status=BookingStatus.CONFIRMED if n % 2 else BookingStatus.PENDING,
+        )
+        for n in range(12)
+    ])
+    # Одинаковое время создания: порядок внутри страницы держится на id
+    Booking.objects.update(created_at=timezone.now())
+    return list(Booking.objects.order_by('-id').values_list('id', flat=True))
+
+
+def test_callback_data_round_trip_fits_telegram_limit():
+    created_at = timezone.now()
+    cursor = encode_cursor(created_at, 2_000_000_000)
+    assert decode_cursor(cursor) == (created_at, 2_000_000_000)
+
+    filters = BookingFilters.from_args(['cancelled', '123456', '2026-12-31'])
+    payload = callback_data(PREV, filters, cursor)
+    assert len(payload.encode()) <= 64
+
+    direction, parsed, parsed_cursor = parse_callback(payload)
+    assert (direction, parsed_cursor) == (PREV, cursor)
+    assert parsed.pack() == filters.pack()
+
+    with pytest.raises(ValueError):
+        BookingFilters.from_args(['вчера'])
+
+
+def test_pages_walk_forward_and_back_with_one_query_each(bookings):
+    filters = BookingFilters()
+    with assert_query_budget(1):
+        first = data._booking_page(filters, '', NEXT, 5)
+    assert [row['id'] for row in first['rows']] == bookings[:5]
+    assert first['has_next'] and not first['has_prev']
+
+    with assert_query_budget(1):
+        second = data._booking_page(filters, first['rows'][-1]['cursor'], NEXT, 5)
+    assert [row['id'] for row in second['rows']] == bookings[5:10]
+    assert second['has_next'] and second['has_prev']
+
+    last = data._booking_page(filters, second['rows'][-1]['cursor'], NEXT, 5)
+    assert [row['id'] for row in last['rows']] == bookings[10:]
+    assert not last['has_next']
+
+    back = data._booking_page(filters, second['rows'][0]['cursor'], PREV, 5)
+    assert back == first
+
+
+def test_pages_apply_status_cottage_and_date_filters(bookings):
+    pending = data._booking_page(BookingFilters(status=BookingStatus.PENDING), '', NEXT, 10)
+    assert {row['status'] for row in pending['rows']} == {BookingStatus.PENDING}
+    assert len(pending['rows']) == 6
+
+    on_date = BookingFilters.from_args(['2026-07-04'])
+    assert [row['check_in'] for row in data._booking_page(on_date, '', NEXT, 10)['rows']] == ['2026-07-03']
+
+    assert data._booking_page(BookingFilters(cottage_id=999), '', NEXT, 10)['rows'] == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cached_page_is_reset_by_booking_change(bookings):
+    filters = BookingFilters()
+    first = asyncio.run(data.booking_page(filters))
+    with assert_query_budget(0):
+        assert asyncio.run(data.booking_page(filters)) == first
+
+    bookings_namespace.bump()
+    Booking.objects.filter(id=bookings[0]).update(status=BookingStatus.CANCELLED)
+    assert asyncio.run(data.booking_page(filters))['rows'][0]['status'] == BookingStatus.CANCELLED
+
+
+def test_page_for_shared_cache_is_read_from_primary(bookings, settings):
+    # Реплики нет среди баз теста: чтение с нее завершилось бы ошибкой
+    settings.DATABASE_REPLICAS = ['replica_1']
+    assert len(data._booking_page(BookingFilters(), '', NEXT, PAGE_SIZE)['rows']) == PAGE_SIZE
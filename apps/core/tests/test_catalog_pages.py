@@ -0,0 +1,111 @@
+import pytest
+from django.core.cache import cache
+from django.utils import translation
+
+from apps.core.query_budget import assert_query_budget
+from apps.core.response_cache import CSRF_PLACEHOLDER
+from apps.cottages.models import Amenity, Cottage, CottageAmenity, CottageImage
+
+
+@pytest.fixture
+def cottage(db):
+    cottage = Cottage.objects.create(
+        name='Лесной', description='У озера', address='Озерная, 1',
+        capacity=4, price_per_night=5000,
+    )
+    CottageImage.objects.create(cottage=cottage, image='cottages/second.jpg', order=2)
+    CottageImage.objects.create(cottage=cottage, image='cottages/first.jpg', order=1)
+    CottageAmenity.objects.create(cottage=cottage, amenity=Amenity.objects.create(name='Баня'))
+    return cottage
+
+
+def test_detail_page_is_served_from_cache_without_queries(client, cottage):
+    first = client.get(f'/cottages/{cottage.id}/')
+    assert first.status_code == 200
+
+    with assert_query_budget(0):
+        second = client.get(f'/cottages/{cottage.id}/')
+    assert second.status_code == 200
+
+    content = second.content.decode()
+    assert content.index('first.jpg') < content.index('second.jpg')
+    assert 'Баня' in content
+
+
+def test_detail_snapshot_is_plain_data_in_shared_cache(client, cottage):
+    from apps.cottages.cache import cottage_snapshot_cache_key
+
+    client.get(f'/cottages/{cottage.id}/')
+
+    envelope = cache.get(cottage_snapshot_cache_key(cottage.id))
+    assert envelope['value']['name'] == 'Лесной'
+    assert [image['order'] for image in envelope['value']['images']] == [1, 2]
+
+
+def test_detail_fragment_is_cached_per_language(client, cottage):
+    from apps.cottages.cache import cottage_detail_html_cache_key
+
+    client.get(f'/cottages/{cottage.id}/')
+    with translation.override('en'):
+        client.get(f'/cottages/{cottage.id}/', HTTP_ACCEPT_LANGUAGE='en')
+
+    assert cache.get(cottage_detail_html_cache_key(cottage.id, 'ru')) is not None
+    assert cottage_detail_html_cache_key(cottage.id, 'ru') != cottage_detail_html_cache_key(cottage.id, 'en')
+
+
+def test_detail_page_reflects_updates_and_missing_cottages(client, cottage, django_capture_on_commit_callbacks):
+    client.get(f'/cottages/{cottage.id}/')
+    with django_capture_on_commit_callbacks(execute=True):
+        cottage.name = 'Горный'
+        cottage.save()
+
+    assert 'Горный' in client.get(f'/cottages/{cottage.id}/').content.decode()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        cottage.is_active = False
+        cottage.save()
+    assert client.get(f'/cottages/{cottage.id}/').status_code == 404
+
+
+def test_listing_grid_is_served_to_anonymous_users_without_queries(client, cottage):
+    assert client.get('/cottages/page/?min_price=1000').status_code == 200
+
+    with assert_query_budget(0):
+        response = client.get('/cottages/page/?min_price=1000')
+    assert 'Лесной' in response.content.decode()
+    assert 'Баня' in response.content.decode()
+
+    assert 'Лесной' not in client.get('/cottages/page/?min_price=9000').content.decode()
+
+
+def test_listing_grid_is_invalidated_by_catalog_changes(client, cottage, django_capture_on_commit_callbacks):
+    client.get('/cottages/page/')
+    with django_capture_on_commit_callbacks(execute=True):
+        cottage.name = 'Горный'
+        cottage.save()
+
+    assert 'Горный' in client.get('/cottages/page/').content.decode()
+
+
+def test_anonymous_pages_are_served_from_response_cache(client, cottage, django_capture_on_commit_callbacks):
+    first = client.get(f'/cottages/{cottage.id}/?utm_source=mail')
+    assert first['X-Response-Cache'] == 'MISS'
+
+    second = client.get(f'/cottages/{cottage.id}/')
+    assert second['X-Response-Cache'] == 'HIT'
+    assert 'name="csrfmiddlewaretoken" value="' in second.content.decode()
+    assert CSRF_PLACEHOLDER not in second.content.decode()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        cottage.name = 'Горный'
+        cottage.save()
+    third = client.get(f'/cottages/{cottage.id}/')
+    assert third['X-Response-Cache'] == 'MISS'
+    assert 'Горный' in third.content.decode()
+
+
+def test_response_cache_is_bypassed_with_session_cookie(client, cottage, django_user_model):
+    client.get('/cottages/page/')
+    client.force_login(django_user_model.objects.create_user('guest', 'guest@example.com', 'x'))
+
+    assert 'X-Response-Cache' not in client.get('/cottages/page/')
@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from apps.bookings.models import Booking, BookingStatus
+from apps.core.query_budget import assert_query_budget
+from apps.cottages.models import Cottage
+
+
+@pytest.fixture
+def user(db, django_user_model):
+    return django_user_model.objects.create_user('guest', 'guest@example.com', 'x')
+
+
+@pytest.fixture
+def cottage(db):
+    return Cottage.objects.create(
+        name='Лесной', description='У озера', address='Озерная, 1',
+        capacity=4, price_per_night=5000,
+    )
+
+
+def test_cottage_list_answers_304_before_serialization(client, user, cottage, django_capture_on_commit_callbacks):
+    client.force_login(user)
+    response = client.get('/api/v1/cottages/')
+    etag = response['ETag']
+    assert response.status_code == 200
+    assert not etag.startswith('W/')
+
+    # Единственный запрос — загрузка пользователя сессии
+    with assert_query_budget(1):
+        response = client.get('/api/v1/cottages/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+    with django_capture_on_commit_callbacks(execute=True):
+        cottage.name = 'Горный'
+        cottage.save()
+    assert client.get('/api/v1/cottages/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_cottage_list_has_a_single_route():
+    from django.urls import resolve, reverse
+
+    from apps.cottages import urls
+    from apps.cottages.views import CottageListView
+
+    names = [getattr(pattern, 'name', None) for pattern in urls.urlpatterns + urls.router.urls]
+    assert names.count('cottage-list') == 1
+    assert resolve(reverse('cottages_api:cottage-list')).func.view_class is CottageListView
+
+
+def test_cottage_detail_and_images_share_the_detail_etag(client, user, cottage):
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from apps.cottages.views import CottageViewSet
+
+    client.force_login(user)
+    etag = client.get(f'/api/v1/cottages/{cottage.id}/images/')['ETag']
+    assert client.get(f'/api/v1/cottages/{cottage.id}/images/', HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    # /api/v1/cottages/<id>/ перекрыт HTML-страницей, retrieve вызываем напрямую
+    request = APIRequestFactory().get('/', HTTP_IF_NONE_MATCH=etag)
+    force_authenticate(request, user)
+    response = CottageViewSet.as_view({'get': 'retrieve'})(request, pk=cottage.id)
+    assert response.status_code == 304
+
+
+def test_availability_etag_changes_with_bookings(client, cottage, django_user_model, monkeypatch, django_capture_on_commit_callbacks):
+    from apps.notifications import tasks
+
+    # Уведомления о бронировании не относятся к тесту и требуют брокер
+    monkeypatch.setattr(tasks.send_telegram_notification, 'delay', lambda *args: None)
+    monkeypatch.setattr(tasks.send_email_notification, 'delay', lambda *args: None)
+    operator = django_user_model.objects.create_user('operator', 'operator@example.com', 'x', is_staff=True)
+    client.force_login(operator)
+    url = f'/operator/api/cottage/{cottage.id}/availability/'
+
+    etag = client.get(url)['ETag']
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    check_in = timezone.now().date() + timedelta(days=3)
+    with django_capture_on_commit_callbacks(execute=True):
+        Booking.objects.create(
+            cottage=cottage, user=operator, check_in=check_in, check_out=check_in + timedelta(days=2),
+            guests=2, total_price=10000, status=BookingStatus.CONFIRMED,
+        )
+        # До коммита новой брони не видно, и ETag остается прежним
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert check_in.isoformat() in response.json()['unavailable_dates']
+
+
+def test_async_search_and_availability_require_login(client, user, cottage):
+    assert client.get('/api/v1/cottages/search/?q=Лес').status_code == 403
+
+    client.force_login(user)
+    response = client.get('/api/v1/cottages/search/?q=Лес')
+    assert [item['name'] for item in response.json()] == ['Лесной']
+
+    check_in = timezone.now().date() + timedelta(days=1)
+    response = client.get(
+        f'/api/v1/cottages/{cottage.id}/availability/',
+        {'check_in': check_in.isoformat(), 'check_out': (check_in + timedelta(days=2)).isoformat()},
+    )
+    assert response.json()['available'] is True
+    assert client.get(f'/api/v1/cottages/{cottage.id}/availability/').status_code == 400
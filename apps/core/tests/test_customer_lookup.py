@@ -0,0 +1,64 @@
+import pytest
+from django.core.management import call_command
+
+from apps.core.query_budget import assert_query_budget
+from apps.leads.models import CallbackRequest
+from apps.users.customers import find_customer, resolve_customer
+from apps.users.models import User
+from apps.users.phones import normalize_phone
+
+
+@pytest.mark.parametrize('raw', [
+    '8 (916) 123-45-67', '+7 916 123 45 67', '79161234567', '9161234567', '0079161234567',
+])
+def test_russian_formats_normalize_to_e164(raw):
+    assert normalize_phone(raw) == '+79161234567'
+
+
+@pytest.mark.parametrize('raw', ['', None, '12345', '+0123456789', 'позвоните'])
+def test_unrecognized_phones_are_rejected(raw):
+    assert normalize_phone(raw) is None
+
+
+def test_resolver_finds_customer_by_any_phone_format_in_one_query(db):
+    user = User.objects.create_user('client', 'client@example.com', 'x', phone='8 916 123-45-67')
+    assert user.phone_normalized == '+79161234567'
+
+    with assert_query_budget(1):
+        assert find_customer('+7 (916) 1234567') == user
+
+    resolved = resolve_customer('Иван', 'Петров', '9161234567', 'new@example.com')
+    assert resolved == user
+    assert (resolved.first_name, resolved.email) == ('Иван', 'new@example.com')
+    assert User.objects.count() == 1
+
+
+def test_resolver_creates_customer_with_e164_phone(db):
+    user = resolve_customer('Анна', 'Смирнова', '8 (903) 000-11-22')
+    assert (user.username, user.phone) == ('client_79030001122', '+79030001122')
+    assert find_customer(email='CLIENT_79030001122@example.com') == user
+
+    with pytest.raises(ValueError):
+        resolve_customer('Анна', 'Смирнова', '123')
+
+
+def test_backfill_normalizes_existing_rows(db):
+    user = User.objects.create_user('legacy', 'legacy@example.com', 'x', phone='8-916-765-43-21')
+    lead = CallbackRequest.objects.create(first_name='Олег', last_name='Ким', phone='+7 999 111 22 33')
+    User.objects.filter(id=user.id).update(phone_normalized=None)
+    CallbackRequest.objects.filter(id=lead.id).update(phone_normalized=None)
+
+    call_command('backfill_phones', batch_size=1)
+
+    user.refresh_from_db()
+    lead.refresh_from_db()
+    assert user.phone_normalized == '+79167654321'
+    assert lead.phone_normalized == '+79991112233'
+
+
+def test_admin_search_matches_phone_in_any_format(client, db):
+    client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+    CallbackRequest.objects.create(first_name='Олег', last_name='Ким', phone='+79991112233')
+    response = client.get('/admin/leads/callbackrequest/', {'q': '8 (999) 111-22-33'})
+    assert response.status_code == 200
+    assert response.context['cl'].result_count == 1
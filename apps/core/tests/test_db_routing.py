@@ -0,0 +1,48 @@
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from apps.core.db.routers import PrimaryReplicaRouter, primary_pin_scope, read_replica, use_replica
+from apps.core.middleware import PrimaryPinMiddleware
+from apps.cottages.models import Cottage
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica_1']
+    return settings
+
+
+def test_reads_use_primary_outside_replica_scope(replicas):
+    assert PrimaryReplicaRouter().db_for_read(Cottage) == 'default'
+
+
+def test_read_replica_routes_reads_until_first_write(replicas):
+    router = PrimaryReplicaRouter()
+
+    @read_replica
+    def handler():
+        before = router.db_for_read(Cottage)
+        assert router.db_for_write(Cottage) == 'default'
+        return before, router.db_for_read(Cottage)
+
+    assert handler() == ('replica_1', 'default')
+
+
+def test_pinned_request_reads_primary(replicas):
+    with primary_pin_scope(active=True), use_replica():
+        assert PrimaryReplicaRouter().db_for_read(Cottage) == 'default'
+
+
+def test_middleware_pins_user_after_write(replicas, db, django_user_model):
+    def write_view(request):
+        django_user_model.objects.create_user('operator', 'op@example.com', 'x')
+        return HttpResponse()
+
+    middleware = PrimaryPinMiddleware(write_view)
+    response = middleware(RequestFactory().post('/bookings/'))
+    cookie = response.cookies[replicas.DB_PRIMARY_PIN_COOKIE]
+    assert cookie['max-age'] == replicas.DB_PRIMARY_PIN_SECONDS
+
+    read_only = PrimaryPinMiddleware(lambda request: HttpResponse())
+    assert not read_only(RequestFactory().get('/cottages/')).cookies
@@ -0,0 +1,138 @@
+import csv
+import io
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.bookings.models import Booking, BookingStatus
+from apps.cottages.models import Cottage
+from apps.leads.models import CallbackRequest
+from apps.payments.models import Payment
+
+
+@pytest.fixture
+def operator_client(client, db):
+    client.force_login(get_user_model().objects.create_superuser('admin', 'admin@example.com', 'x'))
+    return client
+
+
+@pytest.fixture
+def bookings(db):
+    cottage = Cottage.objects.create(
+        name='Лесной', description='У озера', address='Озерная, 1',
+        capacity=4, price_per_night=5000,
+    )
+    start = timezone.localdate()
+    return Booking.objects.bulk_create([
+        Booking(
+            cottage=cottage, guest_name=f'Гость {i}', guests=2, total_price=10000,
+            status=BookingStatus.CONFIRMED if i % 2 else BookingStatus.PENDING,
+            check_in=start + timedelta(days=10 * i), check_out=start + timedelta(days=10 * i + 2),
+        )
+        for i in range(5)
+    ])
+
+
+def _content(response):
+    if not response.is_async:
+        return b''.join(response.streaming_content)
+
+    # async_to_sync оставляет запросы к БД в потоке теста, внутри его транзакции
+    async def collect():
+        return b''.join([chunk async for chunk in response.streaming_content])
+
+    return async_to_sync(collect)()
+
+
+def _read(response):
+    return list(csv.reader(io.StringIO(_content(response).decode('utf-8-sig'))))
+
+
+def test_bookings_export_streams_filtered_rows(operator_client, bookings, settings):
+    settings.EXPORT_CHUNK_SIZE = 2
+    start = timezone.localdate()
+    response = operator_client.get(reverse('operator_web:export', args=['bookings']), {
+        'date_from': (start + timedelta(days=10)).isoformat(),
+        'status': BookingStatus.CONFIRMED,
+    })
+
+    assert response.status_code == 200
+    assert response.streaming
+    assert response['Content-Disposition'].startswith('attachment; filename="bookings-')
+    rows = _read(response)
+    assert rows[0][:3] == ['ID', 'Коттедж', 'Заезд']
+    assert [int(row[0]) for row in rows[1:]] == [bookings[1].id, bookings[3].id]
+    assert rows[1][11] == 'Гость 1'
+
+
+def test_export_iterator_matches_the_server(operator_client, async_client, bookings, settings):
+    # Django 4.2 читает целиком async-итератор под WSGI и синхронный под ASGI
+    settings.EXPORT_CHUNK_SIZE = 2
+    url = reverse('operator_web:export', args=['bookings'])
+    async_client.force_login(get_user_model().objects.get())
+
+    async def fetch():
+        return await async_client.get(url)
+
+    wsgi, asgi = operator_client.get(url), async_to_sync(fetch)()
+
+    assert not wsgi.is_async and asgi.is_async
+    content = _content(wsgi)
+    assert content == _content(asgi)
+    assert content.decode('utf-8-sig').count('\r\n') == len(bookings) + 1
+
+
+def test_export_validates_input(operator_client, db):
+    assert operator_client.get(reverse('operator_web:export', args=['users'])).status_code == 404
+    url = reverse('operator_web:export', args=['callbacks'])
+    assert operator_client.get(url, {'date_from': '01.01.2025'}).status_code == 400
+    assert operator_client.get(url, {'format': 'pdf'}).status_code == 400
+
+
+def test_background_export_writes_file(operator_client, async_client, bookings, settings, tmp_path, monkeypatch):
+    from apps.notifications import tasks
+    from apps.operator.tasks import export_to_file
+
+    settings.EXPORTS_ROOT = tmp_path
+    Payment.objects.create(booking=bookings[0], amount=Decimal(10000), payment_method='card', transaction_id='tx_1')
+    queued, notified = [], []
+    monkeypatch.setattr(export_to_file, 'delay', lambda *args: queued.append(args))
+    monkeypatch.setattr(tasks.send_export_ready, 'delay', lambda *args: notified.append(args))
+
+    response = operator_client.get(reverse('operator_web:export', args=['payments']), {'background': 1})
+    assert response.status_code == 202
+    assert queued == [('payments', {}, 'csv', get_user_model().objects.get().id)]
+
+    result = export_to_file(*queued[0])
+    assert result['rows'] == 1
+    assert notified == [(queued[0][3], result['file'], 1)]
+    download = operator_client.get(reverse('operator_web:export_download', args=[result['file']]))
+    assert b'tx_1' in _content(download)
+    assert download['Content-Length'] == str((tmp_path / result['file']).stat().st_size)
+
+    async_client.force_login(get_user_model().objects.get())
+
+    async def fetch():
+        return await async_client.get(reverse('operator_web:export_download', args=[result['file']]))
+
+    streamed = async_to_sync(fetch)()
+    assert streamed.is_async and b'tx_1' in _content(streamed)
+    assert streamed['Content-Length'] == download['Content-Length']
+    assert operator_client.get(reverse('operator_web:export_download', args=['..passwd'])).status_code == 404
+
+
+def test_admin_action_exports_selection(operator_client, db):
+    leads = CallbackRequest.objects.bulk_create([
+        CallbackRequest(first_name='Анна', last_name=f'Петрова{i}', phone='+79160000000') for i in range(3)
+    ])
+    response = operator_client.post(reverse('admin:leads_callbackrequest_changelist'), {
+        'action': 'export_callbacks_csv',
+        '_selected_action': [leads[0].id, leads[2].id],
+    })
+    rows = _read(response)
+    assert [row[1] for row in rows[1:]] == ['Петрова0', 'Петрова2']
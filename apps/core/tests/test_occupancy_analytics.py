@@ -0,0 +1,133 @@
+from datetime import date
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from apps.bookings import occupancy
+from apps.bookings.models import Booking, BookingStatus
+from apps.cottages.models import Cottage
+from apps.operator.analytics import occupancy_report
+
+
+@pytest.fixture
+def cottages(db):
+    def cottage(name):
+        return Cottage.objects.create(
+            name=name, description='У озера', address='Озерная, 1', capacity=4, price_per_night=5000,
+        )
+
+    lake, forest = cottage('Озерный'), cottage('Лесной')
+
+    def booking(cottage, status, check_in, check_out, total_price):
+        return Booking(
+            cottage=cottage, guest_name='Гость', guests=2, status=status,
+            check_in=check_in, check_out=check_out, total_price=total_price,
+        )
+
+    Booking.objects.bulk_create([
+        # Через границу месяцев: 2 ночи в январе, 1 в феврале
+        booking(lake, BookingStatus.CONFIRMED, date(2025, 1, 30), date(2025, 2, 2), 9000),
+        booking(forest, BookingStatus.COMPLETED, date(2025, 1, 10), date(2025, 1, 12), 10000),
+        booking(forest, BookingStatus.PENDING, date(2025, 1, 20), date(2025, 1, 25), 25000),
+        booking(lake, BookingStatus.CANCELLED, date(2025, 1, 5), date(2025, 1, 8), 15000),
+    ])
+    # bulk_create минует сигналы — ночи как после миграции, через rebuild
+    occupancy.rebuild(chunk_size=100)
+    return lake, forest
+
+
+def test_monthly_occupancy_and_revenue(cottages, django_assert_num_queries, monkeypatch, django_capture_on_commit_callbacks):
+    from apps.notifications import tasks
+
+    monkeypatch.setattr(tasks.send_telegram_notification, 'delay', lambda *args: None)
+    monkeypatch.setattr(tasks.send_email_notification, 'delay', lambda *args: None)
+    lake, forest = cottages
+    with django_assert_num_queries(1):
+        report = occupancy_report(date(2025, 1, 1), date(2025, 3, 1), 'month')
+
+    january, february = report
+    rows = {row['cottage_id']: row for row in january['cottages']}
+    assert rows[lake.id] == {
+        'cottage_id': lake.id, 'cottage': 'Озерный', 'is_active': True, 'nights_available': 31, 'nights_sold': 2,
+        'revenue': '6000.00', 'occupancy': 6.5, 'adr': '3000.00',
+    }
+    assert rows[forest.id]['nights_sold'] == 2
+    assert rows[forest.id]['adr'] == '5000.00'
+    assert january['totals']['revenue'] == '16000.00'
+    assert february['totals']['nights_available'] == 56
+    assert february['totals']['nights_sold'] == 1
+
+    # Периоды из кэша, пока брони не менялись
+    with django_assert_num_queries(0):
+        assert occupancy_report(date(2025, 1, 1), date(2025, 3, 1), 'month') == report
+    # Пересекающийся диапазон: январь из кэша, март считается
+    with django_assert_num_queries(1):
+        assert occupancy_report(date(2025, 1, 1), date(2025, 4, 1), 'month')[0] == january
+
+    # Смена статуса через сигнал: ночи и поколение кэша обновляются сами
+    booking = Booking.objects.get(cottage=forest, status=BookingStatus.PENDING)
+    with django_capture_on_commit_callbacks(execute=True):
+        booking.status = BookingStatus.CONFIRMED
+        booking.save(update_fields=['status', 'updated_at'])
+    january = occupancy_report(date(2025, 1, 1), date(2025, 2, 1), 'month')[0]
+    assert january['totals']['nights_sold'] == 9
+
+
+def test_cottage_changes_reset_cached_periods(cottages, django_capture_on_commit_callbacks):
+    lake, forest = cottages
+    occupancy_report(date(2025, 1, 1), date(2025, 3, 1), 'month')
+
+    with django_capture_on_commit_callbacks(execute=True):
+        lake.name = 'Береговой'
+        lake.save()
+        forest.is_active = False
+        forest.save()
+        added = Cottage.objects.create(
+            name='Новый', description='У озера', address='Озерная, 2', capacity=4, price_per_night=5000,
+        )
+
+    january, february = occupancy_report(date(2025, 1, 1), date(2025, 3, 1), 'month')
+    # Неактивный коттедж остается там, где у него есть продажи, с пометкой
+    assert [(row['cottage'], row['is_active']) for row in january['cottages']] == [
+        ('Береговой', True), ('Лесной', False), ('Новый', True),
+    ]
+    assert january['totals']['revenue'] == '16000.00'
+    assert [row['cottage_id'] for row in february['cottages']] == [lake.id, added.id]
+    assert february['totals']['nights_available'] == 56
+
+
+def test_report_is_read_from_primary(client, cottages, settings):
+    # Реплики нет среди баз теста: чтение с нее завершилось бы ошибкой
+    settings.DATABASE_REPLICAS = ['replica_1']
+    client.force_login(get_user_model().objects.create_superuser('admin', 'admin@example.com', 'x'))
+    response = client.get(reverse('operator_web:analytics_api'), {
+        'date_from': '2025-01-01', 'date_to': '2025-02-01', 'granularity': 'month',
+    })
+    assert response.json()['periods'][0]['totals']['revenue'] == '16000.00'
+
+
+def test_weekly_periods_are_clipped_to_range(cottages):
+    report = occupancy_report(date(2025, 1, 1), date(2025, 1, 13), 'week')
+    assert [(period['period'], period['start'], period['end']) for period in report] == [
+        ('2024-12-30', '2025-01-01', '2025-01-06'),
+        ('2025-01-06', '2025-01-06', '2025-01-13'),
+    ]
+    assert report[0]['totals']['nights_available'] == 10
+    assert report[1]['totals']['nights_sold'] == 2
+
+
+def test_analytics_api_and_page(client, cottages):
+    client.force_login(get_user_model().objects.create_superuser('admin', 'admin@example.com', 'x'))
+    response = client.get(reverse('operator_web:analytics_api'), {
+        'date_from': '2025-01-01', 'date_to': '2025-01-03', 'granularity': 'day',
+    })
+    assert response.status_code == 200
+    assert [period['period'] for period in response.json()['periods']] == ['2025-01-01', '2025-01-02']
+
+    bad = client.get(reverse('operator_web:analytics_api'), {'date_from': '2019-01-01', 'date_to': '2021-01-01', 'granularity': 'day'})
+    assert bad.status_code == 400
+
+    page = client.get(reverse('operator_web:analytics'), {'date_from': '2025-01-01', 'date_to': '2025-02-01'})
+    assert page.status_code == 200
+    assert 'Озерный' in page.content.decode()
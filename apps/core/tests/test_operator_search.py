@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+
+import pytest
+
+from apps.bookings.models import Booking, BookingStatus
+from apps.core.query_budget import assert_query_budget
+from apps.cottages.models import Cottage
+from apps.leads.models import CallbackRequest
+from apps.operator.search import operator_search, rank
+
+
+@pytest.fixture
+def operator(db, django_user_model):
+    return django_user_model.objects.create_user('operator', 'operator@example.com', 'x', is_staff=True)
+
+
+@pytest.fixture
+def data(db, django_user_model):
+    cottage = Cottage.objects.create(
+        name='Лесной', description='У озера', address='Озерная, 1',
+        capacity=4, price_per_night=5000,
+    )
+    client = django_user_model.objects.create_user(
+        'petrov', 'petrov@example.com', 'x', first_name='Иван', last_name='Петров', phone='89161234567',
+    )
+    check_in = date(2026, 7, 1)
+    Booking.objects.bulk_create([
+        Booking(cottage=cottage, user=client, check_in=check_in, check_out=check_in + timedelta(days=2),
+                guests=2, total_price=10000, status=BookingStatus.CONFIRMED),
+        Booking(cottage=cottage, guest_name='Мария Петрова', check_in=check_in + timedelta(days=5),
+                check_out=check_in + timedelta(days=7), guests=2, total_price=10000),
+    ])
+    CallbackRequest.objects.create(first_name='Олег', last_name='Сидоров', phone='+7 999 111 22 33')
+    return client
+
+
+def test_rank_prefers_exact_then_prefix_then_substring():
+    assert rank('петров', 'Петров') == 1.0
+    assert rank('петр', 'Петров') > rank('етро', 'Петров') > rank('петор', 'Петров') > 0
+
+
+def test_search_mixes_users_bookings_and_callbacks(data):
+    results = operator_search('Петров')
+    assert {(result['type'], result['title']) for result in results} >= {
+        ('user', 'Петров Иван'),
+        ('booking', f"#{data.bookings.get().id} Лесной"),
+    }
+    assert results[0]['score'] == 1.0
+
+    callbacks = operator_search('8 (999) 111-22-33')
+    assert [result['type'] for result in callbacks] == ['callback']
+
+    by_phone = operator_search('+7 916 123 45 67')
+    assert {result['type'] for result in by_phone} == {'user', 'booking'}
+
+    assert operator_search('Пе') == []
+
+
+def test_search_endpoint_stays_within_query_budget(client, operator, data):
+    client.force_login(operator)
+    with assert_query_budget(5):
+        response = client.get('/operator/api/search/', {'q': 'Лесной'})
+    assert response.status_code == 200
+    assert [result['type'] for result in response.json()['results']] == ['booking', 'booking']
+
+    client.force_login(data)
+    assert client.get('/operator/api/search/', {'q': 'Лесной'}).status_code == 302
+
+
+def test_booking_admin_search_uses_operator_search(client, data, django_user_model):
+    client.force_login(django_user_model.objects.create_superuser('admin', 'admin@example.com', 'x'))
+    response = client.get('/admin/bookings/booking/', {'q': 'Петрова'})
+    assert response.status_code == 200
+    assert response.context['cl'].result_count == 1
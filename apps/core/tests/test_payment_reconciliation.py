@@ -0,0 +1,88 @@
+import csv
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.bookings.models import Booking, BookingStatus
+from apps.cottages.models import Cottage
+from apps.payments.models import Payment, PaymentStatus
+
+
+@pytest.fixture
+def payments(db, monkeypatch):
+    from apps.notifications import tasks
+
+    monkeypatch.setattr(tasks.send_telegram_notification, 'delay', lambda *args: None)
+    monkeypatch.setattr(tasks.send_email_notification, 'delay', lambda *args: None)
+    cottage = Cottage.objects.create(
+        name='Лесной', description='У озера', address='Озерная, 1',
+        capacity=4, price_per_night=5000,
+    )
+    check_in = timezone.localdate() + timedelta(days=10)
+    bookings = Booking.objects.bulk_create([
+        Booking(
+            cottage=cottage, guest_name=f'Гость {i}', guests=2, total_price=10000,
+            status=BookingStatus.PENDING, check_in=check_in + timedelta(days=3 * i),
+            check_out=check_in + timedelta(days=3 * i + 2),
+        )
+        for i in range(4)
+    ])
+    return Payment.objects.bulk_create([
+        Payment(booking=booking, amount=Decimal(10000), payment_method='card', transaction_id=f'tx_{i}')
+        for i, booking in enumerate(bookings)
+    ])
+
+
+def _report(path):
+    with open(path, newline='', encoding='utf-8') as report:
+        return {(row['transaction_id'], row['kind']) for row in csv.DictReader(report)}
+
+
+def test_csv_statement_fixes_statuses_in_chunks(payments, tmp_path, settings):
+    statement = tmp_path / 'statement.csv'
+    statement.write_text(
+        'transaction_id,status,amount\n'
+        'tx_0,pending,10000.00\n'
+        'tx_1,succeeded,10000.00\n'
+        'tx_2,refunded,9000.00\n'
+        'tx_404,paid,500\n'
+        ',paid,1\n',
+        encoding='utf-8',
+    )
+    report = tmp_path / 'report.csv'
+
+    call_command('reconcile_payments', str(statement), report=str(report), chunk_size=2)
+
+    assert dict(Payment.objects.values_list('transaction_id', 'status')) == {
+        'tx_0': PaymentStatus.PENDING,
+        'tx_1': PaymentStatus.COMPLETED,
+        'tx_2': PaymentStatus.REFUNDED,
+        'tx_3': PaymentStatus.PENDING,
+    }
+    assert Booking.objects.get(payment__transaction_id='tx_1').status == BookingStatus.CONFIRMED
+    assert Booking.objects.get(payment__transaction_id='tx_2').status == BookingStatus.CANCELLED
+    assert _report(report) == {
+        ('tx_1', 'status'), ('tx_2', 'status'), ('tx_2', 'amount'), ('tx_404', 'missing'), ('', 'invalid'),
+    }
+
+
+def test_json_lines_dry_run_only_reports(payments, tmp_path):
+    from apps.payments.tasks import reconcile_payments
+
+    statement = tmp_path / 'statement.jsonl'
+    statement.write_text('\n'.join([
+        json.dumps({'transaction_id': 'tx_3', 'status': 'failed'}),
+        'not json',
+        json.dumps({'transaction_id': 'tx_0', 'status': 'pending'}),
+    ]), encoding='utf-8')
+    report = tmp_path / 'report.csv'
+
+    summary = reconcile_payments(str(statement), str(report), dry_run=True)
+
+    assert summary == {'rows': 3, 'status': 1, 'invalid': 1, 'matched': 1}
+    assert Payment.objects.get(transaction_id='tx_3').status == PaymentStatus.PENDING
+    assert _report(report) == {('tx_3', 'status'), ('', 'invalid')}
@@ -0,0 +1,107 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+
+from apps.bookings.models import Booking, BookingStatus
+from apps.cottages.models import Cottage
+from apps.payments.fake_provider import FakePaymentProvider
+from apps.payments.models import Payment, PaymentEvent, PaymentEventStatus, PaymentStatus
+from apps.payments.tasks import process_payment_events
+
+SECRET = 'test-secret'
+
+
+@pytest.fixture
+def provider(settings, monkeypatch):
+    from apps.notifications import tasks
+    from apps.payments.tasks import process_payment_events
+
+    settings.PAYMENT_WEBHOOK_SECRET = SECRET
+    scheduled = []
+    monkeypatch.setattr(process_payment_events, 'apply_async', lambda **kwargs: scheduled.append(kwargs))
+    monkeypatch.setattr(tasks.send_telegram_notification, 'delay', lambda *args: None)
+    monkeypatch.setattr(tasks.send_email_notification, 'delay', lambda *args: None)
+    provider = FakePaymentProvider(SECRET, seed=7)
+    provider.scheduled = scheduled
+    return provider
+
+
+@pytest.fixture
+def bookings(db):
+    cottage = Cottage.objects.create(
+        name='Лесной', description='У озера', address='Озерная, 1',
+        capacity=4, price_per_night=5000,
+    )
+    check_in = timezone.localdate() + timedelta(days=10)
+    return Booking.objects.bulk_create([
+        Booking(
+            cottage=cottage, guest_name=f'Гость {i}', guests=2, total_price=10000,
+            status=BookingStatus.PENDING, check_in=check_in + timedelta(days=3 * i),
+            check_out=check_in + timedelta(days=3 * i + 2),
+        )
+        for i in range(3)
+    ])
+
+
+@pytest.mark.parametrize('signature', ['nope', 'подпись'])
+def test_webhook_rejects_bad_signature(client, provider, db, signature):
+    response = client.post(
+        '/api/v1/payments/webhook/', data=b'{}', content_type='application/json',
+        HTTP_X_PAYMENT_SIGNATURE=signature,
+    )
+    assert response.status_code == 403
+    assert not PaymentEvent.objects.exists()
+
+
+def test_burst_is_deduplicated_and_applied_in_order(client, provider, bookings, django_capture_on_commit_callbacks):
+    paid, refunded, new = bookings
+    Payment.objects.create(booking=paid, amount=Decimal(10000), payment_method='card', transaction_id='tx_paid')
+    Payment.objects.create(booking=refunded, amount=Decimal(10000), payment_method='card', transaction_id='tx_refund')
+
+    events = (
+        provider.lifecycle('tx_paid', 'payment.processing', 'payment.succeeded')
+        + provider.lifecycle('tx_refund', 'payment.succeeded', 'payment.refunded')
+        # Платежа еще нет: создается по booking_id из события
+        + provider.lifecycle('tx_new', 'payment.succeeded', booking_id=new.id, amount='10000.00')
+        + provider.lifecycle('tx_unknown', 'payment.succeeded')
+    )
+    burst = provider.burst(events, duplicates=0.5)
+    assert len(burst) > len(events)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        responses = provider.deliver(client, burst[:4]) + provider.deliver(client, burst[4:], batch_size=3)
+    assert {response.status_code for response in responses} == {200}
+    assert PaymentEvent.objects.count() == len(events)
+    # Всплеск планирует одну задачу
+    assert len(provider.scheduled) == 1
+
+    assert process_payment_events() == {'applied': 5, 'unmatched': 1}
+
+    payments = dict(Payment.objects.values_list('transaction_id', 'status'))
+    assert payments == {
+        'tx_paid': PaymentStatus.COMPLETED,
+        'tx_refund': PaymentStatus.REFUNDED,
+        'tx_new': PaymentStatus.COMPLETED,
+    }
+    statuses = dict(Booking.objects.values_list('id', 'status'))
+    assert statuses == {
+        paid.id: BookingStatus.CONFIRMED,
+        refunded.id: BookingStatus.CANCELLED,
+        new.id: BookingStatus.CONFIRMED,
+    }
+
+    # Запоздавший повтор старого события не откатывает статус
+    stale = provider.event('tx_refund', 'payment.processing', created=timezone.now() - timedelta(days=1))
+    provider.deliver(client, [stale])
+    assert process_payment_events() == {'skipped': 1}
+    assert Payment.objects.get(transaction_id='tx_refund').status == PaymentStatus.REFUNDED
+    assert not PaymentEvent.objects.filter(status=PaymentEventStatus.RECEIVED).exists()
+
+
+def test_webhook_acknowledges_in_one_query(client, provider, db, django_assert_num_queries):
+    event = provider.event('tx_1', 'payment.succeeded')
+    with django_assert_num_queries(1):
+        provider.deliver(client, [event, event], batch_size=2)
+    assert PaymentEvent.objects.get().event_id == event['id']
@@ -0,0 +1,113 @@
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from apps.core import profiling
+
+
+@pytest.fixture
+def staff_client(client, db, settings):
+    settings.PROFILING_ENABLED = True
+    client.force_login(get_user_model().objects.create_superuser('admin', 'admin@example.com', 'x'))
+    return client
+
+
+def _spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class _Task:
+    # Отправитель сигнала Celery должен быть хэшируемым
+    def __init__(self, name):
+        self.name = name
+
+
+def _profiler(samples):
+    return SimpleNamespace(samples=Counter(samples), duration=0.01, interval=0.005)
+
+
+def test_sampler_records_stacks_of_the_calling_thread():
+    with profiling.SamplingProfiler(interval=0.001) as profiler:
+        _spin(0.05)
+
+    assert profiler.duration >= 0.05
+    assert any('_spin (' in stack for stack in profiler.samples)
+
+
+def test_middleware_profiles_sync_views_of_staff_only(staff_client, client, settings):
+    url = reverse('operator_web:profiles')
+    response = staff_client.get(url, {'_profile': 1})
+    profile_id = response['X-Profile-Id']
+    assert [profile['id'] for profile in profiling.list_profiles()] == [profile_id]
+    assert profiling.get_profile(profile_id)['name'] == f'GET {url}'
+
+    # Без запроса профиля и у обычного пользователя профиль не снимается
+    assert 'X-Profile-Id' not in staff_client.get(url)
+    other = get_user_model().objects.create_user('guest', 'guest@example.com', 'x')
+    client.force_login(other)
+    assert 'X-Profile-Id' not in client.get(url, HTTP_X_PROFILE='1')
+    assert len(profiling.list_profiles()) == 1
+
+
+def test_middleware_skips_async_views(staff_client):
+    # Корутина выполняется в потоке event loop — профиль был бы чужим
+    response = staff_client.get(reverse('operator_web:export', args=['callbacks']), {'format': 'pdf', '_profile': 1})
+    assert response.status_code == 400
+    assert response['X-Profile-Skipped'] == 'async view'
+    assert 'X-Profile-Id' not in response
+    assert profiling.list_profiles() == []
+
+
+def test_profiles_are_pruned_to_max_count(settings):
+    settings.PROFILING_MAX_PROFILES = 2
+    ids = [profiling.save_profile('request', f'GET /{i}', _profiler({'a;b': 1})) for i in range(3)]
+
+    assert [profile['id'] for profile in profiling.list_profiles()] == [ids[2], ids[1]]
+    assert profiling.get_profile(ids[0]) is None
+
+
+def test_expired_profiles_are_dropped_from_the_index():
+    from django.core.cache import cache
+
+    kept, expired = (profiling.save_profile('request', f'GET /{i}', _profiler({'a': 1})) for i in range(2))
+    # Профиль истек раньше индекса
+    cache.delete(profiling.PROFILE_KEY.format(expired))
+
+    assert [profile['id'] for profile in profiling.list_profiles()] == [kept]
+
+
+def test_celery_hooks_profile_only_listed_tasks(settings):
+    from celery.signals import task_postrun, task_prerun
+
+    settings.PROFILING_ENABLED = True
+    settings.PROFILING_CELERY_TASKS = ['apps.demo.tasks.slow']
+    slow, fast = _Task('apps.demo.tasks.slow'), _Task('apps.demo.tasks.fast')
+
+    profiling.install_celery_hooks()
+    try:
+        for task_id, task in (('t1', slow), ('t2', fast)):
+            task_prerun.send(sender=task, task_id=task_id, task=task)
+            task_postrun.send(sender=task, task_id=task_id, task=task, state='SUCCESS')
+    finally:
+        task_prerun.disconnect(dispatch_uid='profiling_prerun')
+        task_postrun.disconnect(dispatch_uid='profiling_postrun')
+
+    assert [(p['kind'], p['name'], p['task_id'], p['state']) for p in profiling.list_profiles()] == [
+        ('task', 'apps.demo.tasks.slow', 't1', 'SUCCESS'),
+    ]
+
+
+def test_profile_views(staff_client):
+    profile_id = profiling.save_profile('request', 'GET /slow', _profiler({'view;query': 3, 'view': 1}))
+
+    assert 'GET /slow' in staff_client.get(reverse('operator_web:profiles')).content.decode()
+    assert staff_client.get(reverse('operator_web:profile_detail', args=[profile_id])).status_code == 200
+    collapsed = staff_client.get(reverse('operator_web:profile_detail', args=[profile_id]), {'format': 'collapsed'})
+    assert sorted(collapsed.content.decode().splitlines()) == ['view 1', 'view;query 3']
+    assert staff_client.get(reverse('operator_web:profile_detail', args=['missing'])).status_code == 404
@@ -0,0 +1,78 @@
+import pytest
+from django.test import Client
+
+from apps.core.query_budget import (
+    QueryBudgetExceeded, assert_query_budget, fingerprint, get_view_budget, query_budget,
+)
+from apps.cottages.models import Cottage, CottageImage
+from apps.cottages.serializers import CottageSerializer
+from apps.users.models import User
+
+
+def test_fingerprint_collapses_literals_and_in_lists():
+    first = fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = \'a\' LIMIT 21')
+    second = fingerprint('SELECT *  FROM t WHERE id IN (%s) AND name = \'bb\' LIMIT 1')
+    assert first == second
+
+
+def test_view_budget_lookup_for_function_and_class_views():
+    @query_budget(3)
+    def view(request):
+        pass
+
+    @query_budget(7)
+    class View:
+        pass
+
+    def as_view():
+        pass
+    as_view.view_class = View
+
+    assert get_view_budget(view) == 3
+    assert get_view_budget(as_view) == 7
+
+
+@pytest.mark.django_db
+def test_assert_query_budget_detects_n_plus_one():
+    Cottage.objects.bulk_create([
+        Cottage(name=f'c{i}', description='d', address='a', capacity=2, price_per_night=100)
+        for i in range(6)
+    ])
+
+    with pytest.raises(QueryBudgetExceeded, match='N\\+1'):
+        with assert_query_budget(100):
+            for cottage in Cottage.objects.all():
+                list(cottage.images.all())
+
+
+@pytest.mark.django_db
+def test_cottage_serializer_uses_prefetched_images():
+    cottages = Cottage.objects.bulk_create([
+        Cottage(name=f'c{i}', description='d', address='a', capacity=2, price_per_night=100)
+        for i in range(6)
+    ])
+    CottageImage.objects.bulk_create([
+        CottageImage(cottage=cottage, image=f'cottages/{cottage.pk}.jpg', is_primary=True)
+        for cottage in cottages
+    ])
+
+    with assert_query_budget(4):
+        queryset = Cottage.objects.prefetch_related('images', 'amenities__amenity')
+        data = CottageSerializer(queryset, many=True).data
+
+    assert all(item['primary_image'] for item in data)
+
+
+@pytest.mark.django_db
+def test_middleware_fails_over_budget_requests(settings, monkeypatch):
+    from apps.cottages import views
+
+    user = User.objects.create_user(username='u', email='u@example.com', password='x')
+    client = Client()
+    client.force_login(user)
+
+    assert client.get('/api/v1/cottages/').status_code == 200
+
+    monkeypatch.setattr(views.CottageListView, 'query_budget', 0)
+    with pytest.raises(QueryBudgetExceeded):
+        client.get('/api/v1/cottages/')
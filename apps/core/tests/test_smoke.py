@@ -7,3 +7,22 @@ def test_index_page_returns_200():
     response = client.get('/')
     assert response.status_code in (200, 302)
 
+
+
+def test_metrics_endpoint_exposes_db_connection_metrics():
+    # Prometheus ходит напрямую из внутренней сети
+    response = Client(REMOTE_ADDR='172.18.0.5').get('/metrics')
+    assert response.status_code == 200
+    body = response.content.decode()
+    assert 'db_connection_setup_seconds' in body
+    assert 'db_connection_health_check_failures_total' in body
+
+
+def test_metrics_endpoint_is_hidden_from_public_and_proxied_requests(db, django_user_model):
+    assert Client(REMOTE_ADDR='203.0.113.7').get('/metrics').status_code == 404
+    # Через прокси адрес внутренний, но запрос внешний
+    assert Client(REMOTE_ADDR='172.18.0.3').get('/metrics', HTTP_X_FORWARDED_FOR='203.0.113.7').status_code == 404
+
+    staff = Client(REMOTE_ADDR='203.0.113.7')
+    staff.force_login(django_user_model.objects.create_user('operator', 'op@example.com', 'x', is_staff=True))
+    assert staff.get('/metrics').status_code == 200
@@ -0,0 +1,46 @@
+import pytest
+from asgiref.sync import async_to_sync
+
+from apps.core.query_budget import assert_query_budget
+from apps.telegram_bot.models import TelegramUser
+from apps.telegram_bot.registry import ais_staff_member, is_staff_member, notification_recipients
+
+
+@pytest.fixture
+def staff(db, django_user_model):
+    operator = django_user_model.objects.create_user('operator', 'op@example.com', 'x', is_staff=True)
+    guest = django_user_model.objects.create_user('guest', 'guest@example.com', 'x')
+    TelegramUser.objects.create(user=operator, telegram_id=101)
+    TelegramUser.objects.create(user=guest, telegram_id=202)
+    return operator
+
+
+def test_staff_checks_hit_database_once(staff):
+    assert is_staff_member(101)
+    with assert_query_budget(0):
+        assert is_staff_member(101)
+        assert not is_staff_member(202)
+        assert async_to_sync(ais_staff_member)(101)
+        assert notification_recipients() == [101]
+
+
+def test_registry_reloads_after_profile_or_user_change(staff, django_capture_on_commit_callbacks):
+    assert notification_recipients() == [101]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        TelegramUser.objects.get(telegram_id=101).delete()
+    assert notification_recipients() == []
+    assert not is_staff_member(101)
+
+    guest = TelegramUser.objects.get(telegram_id=202).user
+    with django_capture_on_commit_callbacks(execute=True):
+        guest.is_staff = True
+        guest.save()
+    assert notification_recipients() == [202]
+
+
+def test_login_does_not_reset_registry(staff, django_capture_on_commit_callbacks):
+    notification_recipients()
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        staff.save(update_fields=['last_login'])
+    assert not callbacks
@@ -0,0 +1,84 @@
+import asyncio
+
+import httpx
+import pytest
+
+from apps.telegram_bot import webhook
+from apps.telegram_bot.bot import CottageBookingBot
+from apps.telegram_bot.models import TelegramUser
+from apps.telegram_bot.testing import FakeTelegramRequest, command_update
+
+SECRET = 'webhook-secret'
+
+
+@pytest.fixture
+def telegram(settings, monkeypatch):
+    settings.TELEGRAM_BOT_TOKEN = '123456:TEST'
+    settings.TELEGRAM_WEBHOOK_SECRET = SECRET
+    request = FakeTelegramRequest()
+    bot = CottageBookingBot(request=request)
+    monkeypatch.setattr(webhook, 'get_bot', lambda: bot)
+    return bot, request
+
+
+@pytest.fixture
+def operator(django_user_model):
+    user = django_user_model.objects.create_user('operator', 'op@example.com', 'x', is_staff=True)
+    return TelegramUser.objects.create(user=user, telegram_id=101)
+
+
+async def _post_updates(application, payloads, secret=SECRET, replies=0, request=None):
+    transport = httpx.ASGITransport(app=webhook.telegram_webhook)
+    async with httpx.AsyncClient(transport=transport, base_url='http://testserver') as client:
+        statuses = [
+            (await client.post(
+                '/telegram/webhook/', json=payload,
+                headers={'X-Telegram-Bot-Api-Secret-Token': secret},
+            )).status_code
+            for payload in payloads
+        ]
+    # Апдейты обрабатываются в фоне — ждем ответов бота
+    for _ in range(100):
+        if request is None or len(request.sent_messages()) >= replies:
+            break
+        await asyncio.sleep(0.05)
+    if application.running:
+        await application.stop()
+        await application.shutdown()
+    return statuses
+
+
+# Не-ASCII байты заголовка — 403, а не 500
+@pytest.mark.parametrize('secret', ['wrong', b'webhook-secr\xe9t'])
+def test_webhook_rejects_wrong_secret(telegram, secret):
+    bot, request = telegram
+    statuses = asyncio.run(_post_updates(bot.application, [command_update(1, 101, '/help')], secret=secret))
+    assert statuses == [403]
+    assert not request.calls
+
+
+@pytest.mark.django_db(transaction=True)
+def test_webhook_processes_recorded_update_once(telegram, operator):
+    bot, request = telegram
+    update = command_update(900001, 101, '/stats')
+
+    statuses = asyncio.run(_post_updates(bot.application, [update, update], replies=1, request=request))
+
+    assert statuses == [200, 200]
+    messages = request.sent_messages()
+    assert len(messages) == 1
+    chat_id, text = messages[0]
+    assert chat_id == 101
+    assert 'Статистика бронирований' in text
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_updates_are_answered_independently(telegram, operator):
+    bot, request = telegram
+    updates = [command_update(1000 + n, 101 if n == 0 else 500 + n, '/bookings') for n in range(6)]
+
+    asyncio.run(_post_updates(bot.application, updates, replies=6, request=request))
+
+    replies = dict(request.sent_messages())
+    assert 'Бронирования' in replies[101]
+    assert all(replies[500 + n] == '❌ Доступ запрещен!' for n in range(1, 6))
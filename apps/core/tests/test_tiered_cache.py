@@ -0,0 +1,188 @@
+import json
+import os
+
+from apps.core import cache as tiered_cache
+from apps.core.cache import CacheNamespace, LocalLRUCache, TieredCache, _handle_message
+
+
+def test_local_lru_evicts_least_recently_used():
+    local = LocalLRUCache(max_entries=2, timeout=60)
+    local.set('a', 1)
+    local.set('b', 2)
+    assert local.get('a') == 1
+    local.set('c', 3)
+
+    assert local.get('b', None) is None
+    assert local.get('a') == 1
+    assert local.get('c') == 3
+
+
+def test_local_lru_respects_ttl():
+    local = LocalLRUCache(max_entries=10, timeout=60)
+    local.set('a', 1, timeout=-1)
+    assert local.get('a', None) is None
+
+
+def test_tiered_cache_reads_through_and_invalidates():
+    tiered = TieredCache('test-tiered', max_entries=10, timeout=60)
+    tiered.set('key', {'value': 1}, 300)
+
+    tiered.local.clear()
+    assert tiered.get('key') == {'value': 1}
+    assert tiered.local.get('key') == {'value': 1}
+
+    tiered.delete('key')
+    assert tiered.get('key') is None
+
+
+def test_pubsub_message_from_other_worker_drops_l1_entry():
+    tiered = TieredCache('test-pubsub', max_entries=10, timeout=60)
+    tiered.local.set('key', 'stale')
+
+    _handle_message(json.dumps({'cache': 'test-pubsub', 'keys': ['key'], 'origin': 'other-container'}))
+
+    assert tiered.local.get('key', None) is None
+
+
+def test_pubsub_ignores_only_own_messages_not_same_pid():
+    tiered = TieredCache('test-pubsub-origin', max_entries=10, timeout=60)
+    tiered.local.set('key', 'fresh')
+
+    _handle_message(json.dumps({'cache': 'test-pubsub-origin', 'keys': ['key'], 'origin': tiered_cache._origin}))
+    assert tiered.local.get('key') == 'fresh'
+
+    # Процесс с тем же PID в другом контейнере — другая метка
+    _handle_message(json.dumps({'cache': 'test-pubsub-origin', 'keys': ['key'], 'pid': os.getpid(), 'origin': 'x'}))
+    assert tiered.local.get('key', None) is None
+
+
+def test_forked_child_gets_its_own_origin():
+    parent_origin = tiered_cache._origin
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.write(write_end, tiered_cache._origin.encode())
+        os._exit(0)
+    os.close(write_end)
+    os.waitpid(pid, 0)
+    child_origin = os.read(read_end, 64).decode()
+    os.close(read_end)
+
+    assert child_origin and child_origin != parent_origin
+
+
+def test_get_or_compute_serves_stale_while_another_worker_recomputes(settings):
+    from django.core.cache import cache
+
+    tiered = TieredCache('test-stampede', max_entries=10, timeout=60)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert tiered.get_or_compute('key', compute, timeout=-1, stale_timeout=300) == 1
+
+    # Значение истекло, но пересчет уже идет в другом воркере (блокировка занята)
+    cache.add('key:lock', 'other-worker', 30)
+    assert tiered.get_or_compute('key', compute, timeout=300) == 1
+    assert len(calls) == 1
+
+    cache.delete('key:lock')
+    assert tiered.get_or_compute('key', compute, timeout=300) == 2
+    assert tiered.get_or_compute('key', compute, timeout=300) == 2
+
+
+def test_get_or_compute_keeps_lock_taken_over_by_another_worker():
+    import asyncio
+
+    from django.core.cache import cache
+
+    tiered = TieredCache('test-lock-owner', max_entries=10, timeout=60)
+
+    def lock_expires_during(key):
+        # Пересчет дольше CACHE_LOCK_TIMEOUT: блокировку забрал другой воркер
+        cache.delete(f'{key}:lock')
+        cache.add(f'{key}:lock', 'other-worker', 30)
+        return 1
+
+    assert tiered.get_or_compute('sync', lambda: lock_expires_during('sync'), timeout=300) == 1
+    assert cache.get('sync:lock') == 'other-worker'
+
+    async def acompute():
+        return lock_expires_during('async')
+
+    assert asyncio.run(tiered.aget_or_compute('async', acompute, timeout=300)) == 1
+    assert cache.get('async:lock') == 'other-worker'
+
+    # Своя блокировка снимается
+    assert tiered.get_or_compute('own', lambda: 2, timeout=300) == 2
+    assert cache.get('own:lock') is None
+
+
+def test_get_or_compute_local_only_values_skip_redis():
+    from django.core.cache import cache
+
+    tiered = TieredCache('test-local', max_entries=10, timeout=60)
+    marker = object()
+
+    assert tiered.get_or_compute('key', lambda: marker, timeout=60, shared=False) is marker
+    assert tiered.get_or_compute('key', lambda: None, timeout=60, shared=False) is marker
+    assert cache.get('key') is None
+
+
+def test_namespace_bump_moves_family_to_new_keys():
+    tiered = TieredCache('test-namespace', max_entries=10, timeout=60)
+    namespace = CacheNamespace('family', tiered)
+    old_key = namespace.key('a', 1)
+    tiered.set(old_key, 'cached', 300)
+
+    namespace.bump()
+
+    new_key = namespace.key('a', 1)
+    assert new_key != old_key
+    assert new_key.startswith('family:g')
+    assert tiered.get(new_key) is None
+
+
+def test_cottage_save_bumps_catalog_generations_after_commit(db, django_capture_on_commit_callbacks):
+    from apps.cottages.cache import cottage_detail_cache_key, cottages_html_cache_key
+    from apps.cottages.models import Cottage
+
+    cottage = Cottage.objects.create(
+        name='Test', description='Test', address='Test',
+        capacity=2, price_per_night=1000,
+    )
+    html_key = cottages_html_cache_key(None, None, 'ru')
+    detail_key = cottage_detail_cache_key(cottage.id)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        cottage.name = 'Renamed'
+        cottage.save()
+        # До коммита читатели видят старые строки и старое поколение
+        assert cottages_html_cache_key(None, None, 'ru') == html_key
+        assert cottage_detail_cache_key(cottage.id) == detail_key
+
+    assert cottages_html_cache_key(None, None, 'ru') != html_key
+    assert cottage_detail_cache_key(cottage.id) != detail_key
+
+
+def test_async_get_or_compute_shares_envelope_with_sync_path():
+    import asyncio
+
+    tiered = TieredCache('test-async', max_entries=10, timeout=60)
+    namespace = CacheNamespace('async-family', tiered)
+
+    async def compute():
+        return {'value': 1}
+
+    async def scenario():
+        key = await namespace.akey('a')
+        assert key == namespace.key('a')
+        return key, await tiered.aget_or_compute(key, compute, timeout=300)
+
+    key, value = asyncio.run(scenario())
+    assert value == {'value': 1}
+
+    tiered.local.clear()
+    assert tiered.get_or_compute(key, lambda: {'value': 2}, timeout=300) == {'value': 1}
@@ -1,8 +1,10 @@
 from django.shortcuts import render
 from django.views.generic import TemplateView
 from django.http import JsonResponse
+from .response_cache import cache_response
 
 
+@cache_response(300)
 class IndexView(TemplateView):
     template_name = 'core/index_2.html'
 
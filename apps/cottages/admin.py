@@ -37,33 +37,21 @@ class CottageAdmin(admin.ModelAdmin):
         if not obj.pk:
             return mark_safe("Сохраните коттедж для просмотра календаря")
         
-        from apps.bookings.models import Booking, BookingStatus
+        from apps.bookings import occupancy
         from datetime import date, timedelta
         
         today = date.today()
         end_date = today + timedelta(days=365)
         
-        bookings = Booking.objects.filter(
-            cottage=obj,
-            status__in=[BookingStatus.PENDING, BookingStatus.CONFIRMED],
-            check_out__gte=today
-        ).order_by('check_in')
+        booked_dates = set(occupancy.occupied_dates(obj.pk, today, end_date))
         
-        calendar_html = self._generate_calendar_html(obj, bookings, today, end_date)
-        logger.debug(f"Генерируем календарь для коттеджа {obj.name}, бронирований: {bookings.count()}")
+        calendar_html = self._generate_calendar_html(obj, booked_dates, today, end_date)
+        logger.debug(f"Генерируем календарь для коттеджа {obj.name}, занятых дат: {len(booked_dates)}")
         return mark_safe(calendar_html)
     
     availability_calendar.short_description = 'Календарь доступности'
     
-    def _generate_calendar_html(self, cottage, bookings, start_date, end_date):
-        booked_dates = set()
-        for booking in bookings:
-            current_date = booking.check_in
-            while current_date <= booking.check_out:  # Включаем последний день
-                booked_dates.add(current_date)
-                current_date += timedelta(days=1)
-        
-        
+    def _generate_calendar_html(self, cottage, booked_dates, start_date, end_date):
         cottage_id = cottage.pk
         container_id = "calendarContainer_" + str(cottage_id)
         button_id = "calendarToggleText_" + str(cottage_id)
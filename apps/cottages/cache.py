@@ -0,0 +1,85 @@
+"""
+Кэш каталога коттеджей: ключи и двухуровневый кэш (L1 в процессе + Redis).
+
+Ключи разбиты на семейства с номером поколения (CacheNamespace):
+список API, HTML-страница каталога и детали каждого коттеджа.
+Инвалидация — invalidate_catalog(), без сканирования Redis. Те же
+поколения служат ETag для условных GET-запросов к API.
+"""
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+
+from apps.core.cache import CacheNamespace, TieredCache
+
+catalog_cache = TieredCache(
+    'catalog',
+    max_entries=settings.CATALOG_L1_MAX_ENTRIES,
+    timeout=settings.CATALOG_L1_TIMEOUT,
+)
+
+list_namespace = CacheNamespace('cottages_list', catalog_cache)
+html_namespace = CacheNamespace('cottages_html', catalog_cache)
+
+
+def detail_namespace(cottage_id):
+    return CacheNamespace(f'cottage_detail_{cottage_id}', catalog_cache)
+
+
+def availability_namespace(cottage_id):
+    # Версия бронирований коттеджа: увеличивается сигналами apps.bookings
+    return CacheNamespace(f'cottage_bookings_{cottage_id}', catalog_cache)
+
+
+def _params_digest(query_params):
+    # hash() строк случаен в каждом процессе — ключ должен совпадать у всех воркеров
+    if hasattr(query_params, 'lists'):
+        items = query_params.lists()
+    else:
+        items = query_params.items()
+    return hashlib.md5(urlencode(sorted(items), doseq=True).encode()).hexdigest()
+
+
+def cottages_list_cache_key(query_params):
+    return list_namespace.key('api', _params_digest(query_params))
+
+
+async def acottages_list_cache_key(query_params):
+    return await list_namespace.akey('api', _params_digest(query_params))
+
+
+def cottage_detail_cache_key(cottage_id):
+    return detail_namespace(cottage_id).key('api')
+
+
+def cottages_html_cache_key(min_price, max_price, language):
+    return html_namespace.key(min_price, max_price, language)
+
+
+# Версия формата снимка: при изменении структуры старые ключи не читаются
+SNAPSHOT_VERSION = 1
+
+
+def cottage_snapshot_cache_key(cottage_id):
+    return detail_namespace(cottage_id).key('snapshot', f'v{SNAPSHOT_VERSION}')
+
+
+async def acottage_snapshot_cache_key(cottage_id):
+    return await detail_namespace(cottage_id).akey('snapshot', f'v{SNAPSHOT_VERSION}')
+
+
+def cottage_detail_html_cache_key(cottage_id, language):
+    return detail_namespace(cottage_id).key('html', language)
+
+
+async def acottage_detail_html_cache_key(cottage_id, language):
+    return await detail_namespace(cottage_id).akey('html', language)
+
+
+def invalidate_catalog(cottage_id=None):
+    """Сбрасывает списки и страницу каталога, а при cottage_id — и детали коттеджа."""
+    list_namespace.bump()
+    html_namespace.bump()
+    if cottage_id is not None:
+        detail_namespace(cottage_id).bump()
@@ -24,11 +24,12 @@ class CottageSerializer(serializers.ModelSerializer):
                  'price_per_night', 'primary_image', 'amenities']
     
     def get_primary_image(self, obj):
-        primary_img = obj.images.filter(is_primary=True).first()
+        # Перебор в Python использует prefetch_related('images') без доп. запросов
+        images = list(obj.images.all())
+        primary_img = next((img for img in images if img.is_primary), None)
         if primary_img:
             return primary_img.image.url
-        first_img = obj.images.first()
-        return first_img.image.url if first_img else None
+        return images[0].image.url if images else None
 
 
 class CottageDetailSerializer(serializers.ModelSerializer):
@@ -1,35 +1,30 @@
+from functools import partial
+
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.core.cache import cache
 from .models import Cottage, CottageImage, CottageAmenity
+from .cache import invalidate_catalog
 
-
-@receiver(post_save, sender=Cottage)
-def clear_cottage_cache_on_save(sender, instance, **kwargs):
-    cache.delete('cottages_list_api')
-    cache.delete(f'cottage_detail_{instance.id}')
-    cache.delete(f'cottage_detail_html_{instance.id}')
-    
-    cache.delete_pattern('cottages_html_*')
+# Поколения каталога — они же теги кэша страниц (apps.core.response_cache):
+# invalidate_catalog() сбрасывает и фрагменты, и готовые ответы.
+# Только после коммита: иначе параллельный читатель сохранит старые строки
+# под новым поколением, и они проживут до следующего сброса
 
 
+@receiver(post_save, sender=Cottage)
 @receiver(post_delete, sender=Cottage)
-def clear_cottage_cache_on_delete(sender, instance, **kwargs):
-    cache.delete('cottages_list_api')
-    cache.delete(f'cottage_detail_{instance.id}')
-    cache.delete(f'cottage_detail_html_{instance.id}')
-    cache.delete_pattern('cottages_html_*')
+def clear_cottage_cache(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_catalog, instance.id))
 
 
 @receiver(post_save, sender=CottageImage)
 @receiver(post_delete, sender=CottageImage)
 def clear_cottage_cache_on_image_change(sender, instance, **kwargs):
-    cache.delete(f'cottage_detail_{instance.cottage.id}')
-    cache.delete(f'cottage_detail_html_{instance.cottage.id}')
+    transaction.on_commit(partial(invalidate_catalog, instance.cottage_id))
 
 
 @receiver(post_save, sender=CottageAmenity)
 @receiver(post_delete, sender=CottageAmenity)
 def clear_cottage_cache_on_amenity_change(sender, instance, **kwargs):
-    cache.delete(f'cottage_detail_{instance.cottage.id}')
-    cache.delete(f'cottage_detail_html_{instance.cottage.id}')
+    transaction.on_commit(partial(invalidate_catalog, instance.cottage_id))
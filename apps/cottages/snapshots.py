@@ -0,0 +1,73 @@
+"""
+Снимок коттеджа для страницы деталей: только простые данные (строки,
+числа, списки), которые сериализуются в Redis через JSON-сериализатор.
+Строится одним запросом с prefetch и кэшируется в семействе
+cottage_detail_<id>, поэтому сбрасывается теми же сигналами каталога.
+"""
+from decimal import Decimal
+
+from .cache import acottage_snapshot_cache_key, catalog_cache, cottage_snapshot_cache_key
+from .models import Cottage
+
+SNAPSHOT_TIMEOUT = 600
+
+
+def build_cottage_snapshot(cottage):
+    return {
+        'id': cottage.id,
+        'name': cottage.name,
+        'description': cottage.description,
+        'address': cottage.address,
+        'capacity': cottage.capacity,
+        'price_per_night': str(cottage.price_per_night),
+        'updated_at': cottage.updated_at.isoformat(),
+        # ordering модели CottageImage — ['order', 'id']
+        'images': [
+            {
+                'id': image.id,
+                'url': image.image.url,
+                'is_primary': image.is_primary,
+                'order': image.order,
+            }
+            for image in cottage.images.all()
+        ],
+        'amenities': sorted(
+            (
+                {'id': item.amenity.id, 'name': item.amenity.name, 'icon': item.amenity.icon}
+                for item in cottage.amenities.all()
+            ),
+            key=lambda amenity: amenity['name'],
+        ),
+    }
+
+
+def _snapshot_queryset(cottage_id):
+    return Cottage.objects.filter(id=cottage_id, is_active=True).prefetch_related(
+        'images', 'amenities__amenity'
+    )
+
+
+def get_cottage_snapshot(cottage_id):
+    """Снимок активного коттеджа или None (отсутствие тоже кэшируется)."""
+    def compute():
+        cottage = _snapshot_queryset(cottage_id).first()
+        return build_cottage_snapshot(cottage) if cottage is not None else None
+
+    return catalog_cache.get_or_compute(
+        cottage_snapshot_cache_key(cottage_id), compute, SNAPSHOT_TIMEOUT
+    )
+
+
+async def aget_cottage_snapshot(cottage_id):
+    async def compute():
+        cottage = await _snapshot_queryset(cottage_id).afirst()
+        return build_cottage_snapshot(cottage) if cottage is not None else None
+
+    return await catalog_cache.aget_or_compute(
+        await acottage_snapshot_cache_key(cottage_id), compute, SNAPSHOT_TIMEOUT
+    )
+
+
+def snapshot_template_context(snapshot):
+    # Decimal, чтобы цена форматировалась с учетом локали, как у модели
+    return {**snapshot, 'price_per_night': Decimal(snapshot['price_per_night'])}
@@ -1,10 +1,10 @@
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
+from rest_framework.routers import SimpleRouter
 from . import views
 
 app_name = 'cottages'
 
-router = DefaultRouter()
+router = SimpleRouter()
 router.register(r'', views.CottageViewSet)
 
 urlpatterns = [
@@ -17,5 +17,7 @@ urlpatterns = [
         views.CottageAvailabilityView.as_view(),
         name='availability'
     ),
+    # Список — async-view; роутер списка не регистрирует
+    path('', views.CottageListView.as_view(), name='cottage-list'),
     path('', include(router.urls)),
 ]
@@ -1,107 +1,96 @@
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.db.models import Q
-from django.core.cache import cache
-from django.core.cache.backends.base import InvalidCacheBackendError
-from django_redis.exceptions import ConnectionInterrupted
 from datetime import datetime, date
 from .models import Cottage
+from apps.bookings import holds
+from apps.bookings.models import Booking, BookingStatus
+from .cache import (
+    acottage_detail_html_cache_key,
+    acottages_list_cache_key,
+    catalog_cache,
+    detail_namespace,
+    html_namespace,
+    list_namespace,
+    cottage_detail_cache_key,
+    cottages_html_cache_key,
+)
 from .serializers import CottageSerializer, CottageDetailSerializer
+from .snapshots import aget_cottage_snapshot, snapshot_template_context
+from asgiref.sync import sync_to_async
 from django.views.generic import TemplateView
-from django.http import JsonResponse
-from django.utils.translation import gettext as _
+from django.http import Http404, JsonResponse
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.utils.decorators import method_decorator
+from django.utils.translation import get_language, gettext as _
+from django.views.decorators.http import condition
+from apps.core.async_views import AsyncAPIView, json_response, not_modified
+from apps.core.cache import agenerations_etag, generations_etag
+from apps.core.response_cache import cache_response
+from apps.core.db.routers import read_replica
+from apps.core.query_budget import query_budget
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class CottageViewSet(viewsets.ReadOnlyModelViewSet):
+def cottage_detail_etag(request, *args, **kwargs):
+    return generations_etag([detail_namespace(kwargs.get('pk'))])
+
+
+def filter_cottages(queryset, params):
+    is_available = params.get('is_available')
+    min_price = params.get('min_price')
+    max_price = params.get('max_price')
+    min_guests = params.get('min_guests')
+    
+    if is_available is not None:
+        queryset = queryset.filter(is_available=is_available.lower() == 'true')
+    if min_price:
+        queryset = queryset.filter(price_per_night__gte=min_price)
+    if max_price:
+        queryset = queryset.filter(price_per_night__lte=max_price)
+    if min_guests:
+        queryset = queryset.filter(max_guests__gte=min_guests)
+    
+    return queryset
+
+
+# Список — async CottageListView, у роутера остаются детали и изображения
+@query_budget(6)
+class CottageViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
     queryset = Cottage.objects.filter(is_active=True).prefetch_related(
         'images', 'amenities__amenity'
     )
     serializer_class = CottageSerializer
     
     def get_queryset(self):
-        cache_key = f"cottages_list_{hash(frozenset(self.request.GET.items()))}"
-        cached_result = None
-        
-        try:
-            cached_result = cache.get(cache_key)
-        except (ConnectionInterrupted, InvalidCacheBackendError) as e:
-            logger.warning(f"Cache read error: {e}")
-        
-        if cached_result is not None:
-            return cached_result
-        
-        queryset = super().get_queryset()
-        
-        is_available = self.request.query_params.get('is_available')
-        min_price = self.request.query_params.get('min_price')
-        max_price = self.request.query_params.get('max_price')
-        min_guests = self.request.query_params.get('min_guests')
-        
-        if is_available is not None:
-            queryset = queryset.filter(is_available=is_available.lower() == 'true')
-        if min_price:
-            queryset = queryset.filter(price_per_night__gte=min_price)
-        if max_price:
-            queryset = queryset.filter(price_per_night__lte=max_price)
-        if min_guests:
-            queryset = queryset.filter(max_guests__gte=min_guests)
-        
-
-        return queryset
+        return filter_cottages(super().get_queryset(), self.request.query_params)
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return CottageDetailSerializer
         return CottageSerializer
     
-    def list(self, request, *args, **kwargs):
-        cache_key = 'cottages_list_api'
-        cottages_data = None
-        
-        try:
-            cottages_data = cache.get(cache_key)
-        except (ConnectionInterrupted, InvalidCacheBackendError) as e:
-            logger.warning(f"Cache read error: {e}")
-        
-        if cottages_data is None:
-            cottages = self.get_queryset()
-            serializer = self.get_serializer(cottages, many=True)
-            cottages_data = serializer.data
-            try:
-                cache.set(cache_key, cottages_data, 300)
-            except (ConnectionInterrupted, InvalidCacheBackendError) as e:
-                logger.warning(f"Cache write error: {e}")
-        
-        return Response(cottages_data)
-    
+    # ETag считается по поколениям кэша: 304 отдается до сериализации и запросов к БД
+    @method_decorator(condition(etag_func=cottage_detail_etag))
     def retrieve(self, request, *args, **kwargs):
         """Детали коттеджа с кэшированием"""
         cottage_id = kwargs.get('pk')
-        cache_key = f'cottage_detail_{cottage_id}'
-        cottage_data = None
-        
-        try:
-            cottage_data = cache.get(cache_key)
-        except (ConnectionInterrupted, InvalidCacheBackendError) as e:
-            logger.warning(f"Cache read error: {e}")
-        
-        if cottage_data is None:
-            cottage = self.get_object()
-            serializer = self.get_serializer(cottage)
-            cottage_data = serializer.data
-            try:
-                cache.set(cache_key, cottage_data, 600)
-            except (ConnectionInterrupted, InvalidCacheBackendError) as e:
-                logger.warning(f"Cache write error: {e}")
+        def compute():
+            serializer = self.get_serializer(self.get_object())
+            return serializer.data
         
+        cottage_data = catalog_cache.get_or_compute(
+            cottage_detail_cache_key(cottage_id), compute, 600
+        )
         return Response(cottage_data)
     
     @action(detail=True, methods=['get'])
+    @method_decorator(condition(etag_func=cottage_detail_etag))
     def images(self, request, pk=None):
         cottage = self.get_object()
         images = cottage.images.all().order_by('order')
@@ -113,15 +102,45 @@ class CottageViewSet(viewsets.ReadOnlyModelViewSet):
         } for img in images])
 
 
-class CottageSearchView(APIView):
+@query_budget(6)
+class CottageListView(AsyncAPIView):
+    """Список коттеджей API (async): ETag и кэш через redis.asyncio, ORM — async."""
     
-    def get(self, request):
+    async def get(self, request):
+        etag = await agenerations_etag([list_namespace])
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        
+        async def compute():
+            queryset = filter_cottages(
+                Cottage.objects.filter(is_active=True).prefetch_related(
+                    'images', 'amenities__amenity'
+                ),
+                request.GET,
+            )
+            cottages = [cottage async for cottage in queryset]
+            return CottageSerializer(cottages, many=True).data
+        
+        cottages_data = await catalog_cache.aget_or_compute(
+            await acottages_list_cache_key(request.GET), compute, 300
+        )
+        return json_response(cottages_data, etag=etag)
+
+
+@query_budget(5)
+class CottageSearchView(AsyncAPIView):
+    
+    @read_replica
+    async def get(self, request):
         query = request.GET.get('q', '')
         min_price = request.GET.get('min_price')
         max_price = request.GET.get('max_price')
         capacity = request.GET.get('capacity')
         
-        cottages = Cottage.objects.filter(is_active=True)
+        cottages = Cottage.objects.filter(is_active=True).prefetch_related(
+            'images', 'amenities__amenity'
+        )
         
         if query:
             cottages = cottages.filter(
@@ -139,17 +158,17 @@ class CottageSearchView(APIView):
         if capacity:
             cottages = cottages.filter(capacity__gte=capacity)
         
-        serializer = CottageSerializer(cottages, many=True)
-        return Response(serializer.data)
+        serializer = CottageSerializer([cottage async for cottage in cottages], many=True)
+        return json_response(serializer.data)
 
 
-class CottageAvailabilityView(APIView):    
-    def get(self, request, cottage_id):
+class CottageAvailabilityView(AsyncAPIView):
+    async def get(self, request, cottage_id):
         check_in = request.GET.get('check_in')
         check_out = request.GET.get('check_out')
         
         if not check_in or not check_out:
-            return Response({
+            return json_response({
                 'error': _('Check-in and check-out dates must be specified')
             }, status=status.HTTP_400_BAD_REQUEST)
         
@@ -157,27 +176,57 @@ class CottageAvailabilityView(APIView):
             check_in_date = datetime.strptime(check_in, '%Y-%m-%d').date()
             check_out_date = datetime.strptime(check_out, '%Y-%m-%d').date()
         except ValueError:
-            return Response({
+            return json_response({
                 'error': _('Invalid date format. Use YYYY-MM-DD')
             }, status=status.HTTP_400_BAD_REQUEST)
         
         if check_in_date >= check_out_date:
-            return Response({
+            return json_response({
                 'error': _('Check-in date must be earlier than check-out date')
             }, status=status.HTTP_400_BAD_REQUEST)
         
         if check_in_date < date.today():
-            return Response({
+            return json_response({
                 'error': _('Check-in date cannot be in the past')
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        # Удержания в Redis проверяются первыми — без запроса к БД
+        # Пользователь уже загружен в AsyncAPIView.dispatch; свое удержание не мешает
+        owner = f'user:{request.user.pk}'
+        if await sync_to_async(holds.is_held)(cottage_id, check_in_date, check_out_date, owner):
+            return json_response({
+                'available': False,
+                'held': True,
+                'message': _('These dates are being booked by another guest')
+            })
+        
+        booked = await Booking.objects.filter(
+            cottage_id=cottage_id,
+            status__in=[BookingStatus.PENDING, BookingStatus.CONFIRMED],
+            check_in__lt=check_out_date,
+            check_out__gt=check_in_date,
+        ).aexists()
+        if booked:
+            return json_response({
+                'available': False,
+                'message': _('Cottage is not available for selected dates')
+            })
 
-        return Response({
+        return json_response({
             'available': True,
             'message': _('Cottage is available for booking')
         })
 
 
+def _parse_price(value):
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+@cache_response(300, tags=[html_namespace])
+@query_budget(5)
 class cottages_page(TemplateView):
     template_name = 'cottages/cottages.html'
     
@@ -186,49 +235,29 @@ class cottages_page(TemplateView):
         
         min_price = self.request.GET.get('min_price')
         max_price = self.request.GET.get('max_price')
+        # Некорректные значения фильтра игнорируются и не плодят ключи кэша
+        min_value = _parse_price(min_price)
+        max_value = _parse_price(max_price)
         
-        cache_key = f'cottages_html_{min_price}_{max_price}'
-        cottage_ids = None
-        
-        try:
-            cottage_ids = cache.get(cache_key)
-        except (ConnectionInterrupted, InvalidCacheBackendError) as e:
-            logger.warning(f"Cache read error: {e}")
-        
-        if cottage_ids is None:
+        def render_grid():
             cottages = Cottage.objects.filter(is_active=True).prefetch_related(
                 'images', 'amenities__amenity'
             )
+            if min_value is not None:
+                cottages = cottages.filter(price_per_night__gte=min_value)
+            if max_value is not None:
+                cottages = cottages.filter(price_per_night__lte=max_value)
             
-            if min_price:
-                try:
-                    cottages = cottages.filter(
-                        price_per_night__gte=float(min_price)
-                    )
-                except ValueError:
-                    pass
-            
-            if max_price:
-                try:
-                    cottages = cottages.filter(
-                        price_per_night__lte=float(max_price)
-                    )
-                except ValueError:
-                    pass
-            
-            cottage_ids = list(cottages.values_list('id', flat=True))
-            try:
-                cache.set(cache_key, cottage_ids, 300)
-            except (ConnectionInterrupted, InvalidCacheBackendError) as e:
-                logger.warning(f"Cache write error: {e}")
+            return render_to_string(
+                'cottages/cottages_grid.html', {'cottages': cottages}, request=self.request
+            )
         
-        cottages = Cottage.objects.filter(
-            id__in=cottage_ids, 
-            is_active=True
-        ).prefetch_related('images', 'amenities__amenity')
+        cottages_grid = catalog_cache.get_or_compute(
+            cottages_html_cache_key(min_value, max_value, get_language()), render_grid, 300
+        )
         
         context.update({
-            'cottages': cottages,
+            'cottages_grid': mark_safe(cottages_grid),
             'min_price': min_price,
             'max_price': max_price,
         })
@@ -236,47 +265,39 @@ class cottages_page(TemplateView):
         return context
 
 
+@cache_response(600, tags=lambda cottage_id: [detail_namespace(cottage_id)])
+@query_budget(6)
 class CottageDetailView(TemplateView):
     template_name = 'cottages/detail.html'
     
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
         
         cottage_id = kwargs.get('cottage_id')
+        snapshot = await aget_cottage_snapshot(cottage_id)
+        if snapshot is None:
+            raise Http404(_("Cottage with ID %(id)s not found or inactive") % {'id': cottage_id})
         
-        cache_key = f'cottage_detail_html_{cottage_id}'
-        cottage_data = None
+        cottage = snapshot_template_context(snapshot)
         
-        try:
-            cottage_data = cache.get(cache_key)
-        except (ConnectionInterrupted, InvalidCacheBackendError) as e:
-            logger.warning(f"Cache read error: {e}")
+        async def render_content():
+            return await sync_to_async(render_to_string)(
+                'cottages/detail_content.html',
+                {'cottage': cottage, 'images': cottage['images'], 'amenities': cottage['amenities']},
+                request=self.request,
+            )
         
-        if cottage_data is None:
-            try:
-                cottage = Cottage.objects.prefetch_related(
-                    'images', 'amenities__amenity'
-                ).get(id=cottage_id, is_active=True)
-                
-                images = cottage.images.all().order_by('order', 'id')
-                
-                amenities = cottage.amenities.all()
-                
-                cottage_data = {
-                    "cottage_id": cottage.id,
-                    'cottage': cottage,
-                    'images': list(images),
-                    'amenities': list(amenities),
-                }
-                
-                # cache.set(cache_key, cottage_data, 600)
-                
-            except Cottage.DoesNotExist:
-                from django.http import Http404
-                raise Http404(_("Cottage with ID %(id)s not found or inactive") % {'id': cottage_id})
+        # Фрагмент зависит от языка: переводы и префиксы URL
+        content = await catalog_cache.aget_or_compute(
+            await acottage_detail_html_cache_key(cottage_id, get_language()), render_content, 600
+        )
         
-        context.update(cottage_data)
-        return context
+        context.update({
+            'cottage': cottage,
+            'cottage_content': mark_safe(content),
+        })
+        # TemplateResponse рендерится обработчиком Django в потоке
+        return self.render_to_response(context)
 
 
 class CottageDebugView(APIView):
@@ -1,5 +1,7 @@
 from django.views.generic import TemplateView
+from apps.core.response_cache import cache_response
 
 
+@cache_response(300)
 class ContactView(TemplateView):
     template_name = 'info/contacts.html'
\ No newline at end of file
@@ -1,9 +1,11 @@
 from django.contrib import admin
 from .models import CallbackRequest
+from apps.operator.exports import export_action
+from apps.users.admin import PhoneSearchMixin
 
 
 @admin.register(CallbackRequest)
-class CallbackRequestAdmin(admin.ModelAdmin):    
+class CallbackRequestAdmin(PhoneSearchMixin, admin.ModelAdmin):    
     list_display = [
         'full_name', 'phone', 'email', 'status', 'cottage', 'created_at', 'is_new'
     ]
@@ -12,6 +14,7 @@ class CallbackRequestAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at']
     list_editable = ['status']
     ordering = ['-created_at']
+    actions = [export_action('callbacks')]
     
     fieldsets = (
         ('Контактные данные', {
@@ -1,6 +1,7 @@
 from django import forms
 from django.utils.translation import gettext_lazy as _
 from .models import CallbackRequest
+from apps.users.phones import normalize_phone
 
 
 class CallbackRequestForm(forms.ModelForm):   
@@ -81,4 +82,10 @@ class CallbackRequestForm(forms.ModelForm):
         self.fields['cottage'].required = False
         self.fields['email'].required = False
         
-        self.fields['cottage'].empty_label = _("Выберите коттедж (необязательно)")
\ No newline at end of file
+        self.fields['cottage'].empty_label = _("Выберите коттедж (необязательно)")
+    
+    def clean_phone(self):
+        phone = normalize_phone(self.cleaned_data.get('phone'))
+        if phone is None:
+            raise forms.ValidationError(_('Введите корректный номер телефона'))
+        return phone
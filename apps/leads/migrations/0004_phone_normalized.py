@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0003_alter_callbackrequest_first_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='callbackrequest',
+            name='phone_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=16, null=True, verbose_name='Телефон (E.164)'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.core.validators import RegexValidator
 
+from apps.users.phones import normalize_phone
+
 
 class CallbackRequest(models.Model):
     
@@ -18,6 +20,10 @@ class CallbackRequest(models.Model):
         max_length=20, 
         verbose_name='Телефон'
     )
+    phone_normalized = models.CharField(
+        max_length=16, blank=True, null=True, db_index=True, editable=False,
+        verbose_name='Телефон (E.164)'
+    )
     email = models.EmailField(blank=True, verbose_name='Email')
     
     message = models.TextField(blank=True, verbose_name='Сообщение')
@@ -56,6 +62,10 @@ class CallbackRequest(models.Model):
             full_name += f" {self.middle_name}"
         return f"{full_name} - {self.phone} ({self.get_status_display()})"
     
+    def save(self, *args, **kwargs):
+        self.phone_normalized = normalize_phone(self.phone)
+        super().save(*args, **kwargs)
+    
     @property
     def full_name(self):
         full_name = f"{self.last_name} {self.first_name}"
@@ -10,6 +10,7 @@ import logging
 from .models import CallbackRequest
 from .forms import CallbackRequestForm
 from apps.cottages.models import Cottage
+from apps.core.response_cache import cache_response
 
 logger = logging.getLogger(__name__)
 
@@ -70,6 +71,7 @@ class CallbackRequestView(TemplateView):
             traceback.print_exc()
 
 
+@cache_response(300)
 class CallbackSuccessView(TemplateView):
     template_name = 'leads/success.html'
 
@@ -12,16 +12,13 @@ logger = logging.getLogger(__name__)
 def send_telegram_notification(self, booking_id, notification_type):
     try:
         from apps.bookings.models import Booking
-        from apps.telegram_bot.models import TelegramUser
+        from apps.telegram_bot.registry import notification_recipients
         
         booking = Booking.objects.select_related('user', 'cottage').get(id=booking_id)
         
-        active_users = TelegramUser.objects.filter(
-            is_active=True,
-            user__is_staff=True
-        )
+        recipients = notification_recipients()
         
-        if not active_users:
+        if not recipients:
             logger.warning("No active staff users for notifications")
             return False
         
@@ -29,8 +26,8 @@ def send_telegram_notification(self, booking_id, notification_type):
             message = f"""
 🆕 **Новое бронирование!**
 
-👤 **Клиент:** {booking.user.get_full_name() or booking.user.email}
-📞 **Телефон:** {booking.user.phone or 'Не указан'}
+👤 **Клиент:** {booking.client_name}
+📞 **Телефон:** {booking.client_phone or 'Не указан'}
 🏠 **Коттедж:** {booking.cottage.name}
 📅 **Даты:** {booking.check_in} - {booking.check_out}
 👥 **Гостей:** {booking.guests}
@@ -41,7 +38,7 @@ def send_telegram_notification(self, booking_id, notification_type):
 ❌ **Отмена бронирования**
 
 🏠 **Коттедж:** {booking.cottage.name}
-👤 **Клиент:** {booking.user.get_full_name() or booking.user.email}
+👤 **Клиент:** {booking.client_name}
 📅 **Даты:** {booking.check_in} - {booking.check_out}
             """
         else:  # status_change
@@ -49,17 +46,17 @@ def send_telegram_notification(self, booking_id, notification_type):
 🔄 **Изменение статуса бронирования**
 
 🏠 **Коттедж:** {booking.cottage.name}
-👤 **Клиент:** {booking.user.get_full_name() or booking.user.email}
+👤 **Клиент:** {booking.client_name}
 📅 **Даты:** {booking.check_in} - {booking.check_out}
 📝 **Новый статус:** {booking.get_status_display()}
             """
         
         sent_count = 0
-        for tg_user in active_users:
+        for telegram_id in recipients:
             try:
                 url = f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage"
                 data = {
-                    'chat_id': tg_user.telegram_id,
+                    'chat_id': telegram_id,
                     'text': message,
                     'parse_mode': 'Markdown'
                 }
@@ -67,14 +64,14 @@ def send_telegram_notification(self, booking_id, notification_type):
                 response = requests.post(url, data=data, timeout=10)
                 if response.status_code == 200:
                     sent_count += 1
-                    logger.info(f"Message sent to user {tg_user.telegram_id}")
+                    logger.info(f"Message sent to user {telegram_id}")
                 else:
-                    logger.error(f"Error sending message to user {tg_user.telegram_id}: {response.text}")
+                    logger.error(f"Error sending message to user {telegram_id}: {response.text}")
                     
             except Exception as e:
-                logger.error(f"Error sending message to user {tg_user.telegram_id}: {e}")
+                logger.error(f"Error sending message to user {telegram_id}: {e}")
         
-        logger.info(f"Sent {sent_count} of {len(active_users)} notifications")
+        logger.info(f"Sent {sent_count} of {len(recipients)} notifications")
         return sent_count > 0
         
     except Exception as e:
@@ -133,16 +130,13 @@ def send_email_notification(self, booking_id, notification_type):
 def send_callback_request_notification(self, callback_id):
     try:
         from apps.leads.models import CallbackRequest
-        from apps.telegram_bot.models import TelegramUser
+        from apps.telegram_bot.registry import notification_recipients
         
         callback = CallbackRequest.objects.select_related('cottage').get(id=callback_id)
         
-        active_users = TelegramUser.objects.filter(
-            is_active=True,
-            user__is_staff=True
-        )
+        recipients = notification_recipients()
         
-        if not active_users:
+        if not recipients:
             logger.warning("No active staff users for callback notifications")
             return False
         
@@ -159,11 +153,11 @@ def send_callback_request_notification(self, callback_id):
         """
         
         sent_count = 0
-        for tg_user in active_users:
+        for telegram_id in recipients:
             try:
                 url = f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage"
                 data = {
-                    'chat_id': tg_user.telegram_id,
+                    'chat_id': telegram_id,
                     'text': message,
                     'parse_mode': 'Markdown'
                 }
@@ -171,16 +165,125 @@ def send_callback_request_notification(self, callback_id):
                 response = requests.post(url, data=data, timeout=10)
                 if response.status_code == 200:
                     sent_count += 1
-                    logger.info(f"Callback notification sent to user {tg_user.telegram_id}")
+                    logger.info(f"Callback notification sent to user {telegram_id}")
                 else:
-                    logger.error(f"Error sending callback notification to user {tg_user.telegram_id}: {response.text}")
+                    logger.error(f"Error sending callback notification to user {telegram_id}: {response.text}")
                     
             except Exception as e:
-                logger.error(f"Error sending callback notification to user {tg_user.telegram_id}: {e}")
+                logger.error(f"Error sending callback notification to user {telegram_id}: {e}")
         
-        logger.info(f"Sent {sent_count} of {len(active_users)} callback notifications")
+        logger.info(f"Sent {sent_count} of {len(recipients)} callback notifications")
         return sent_count > 0
         
     except Exception as e:
         logger.error(f"Error in send_callback_request_notification: {e}")
         raise self.retry(countdown=60, exc=e)
+
+
+@shared_task(bind=True, max_retries=3)
+def send_lifecycle_summary(self, completed_count, expired_count, expired_sample=()):
+    """
+    Одна сводка персоналу за запуск sweep_booking_lifecycle вместо сообщения на каждую бронь.
+    В сообщение задачи попадает только число отмененных и первые LIFECYCLE_SUMMARY_SAMPLE id.
+    """
+    try:
+        from apps.bookings.models import Booking
+        from apps.telegram_bot.registry import notification_recipients
+        
+        recipients = notification_recipients()
+        if not recipients:
+            logger.warning("No active staff users for lifecycle summary")
+            return False
+        
+        message = f"""
+🧹 **Обновление статусов бронирований**
+
+🏁 **Завершено:** {completed_count}
+⌛ **Отменено неподтвержденных:** {expired_count}
+        """
+        expired = Booking.objects.filter(id__in=list(expired_sample)).select_related('user', 'cottage')
+        for booking in expired:
+            message += f"\n• #{booking.id} {booking.cottage.name}, {booking.client_name}, {booking.check_in} - {booking.check_out}"
+        if expired_count > len(expired_sample):
+            message += f"\n… и еще {expired_count - len(expired_sample)}"
+        
+        sent_count = 0
+        for telegram_id in recipients:
+            try:
+                url = f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage"
+                data = {
+                    'chat_id': telegram_id,
+                    'text': message,
+                    'parse_mode': 'Markdown'
+                }
+                
+                response = requests.post(url, data=data, timeout=10)
+                if response.status_code == 200:
+                    sent_count += 1
+                else:
+                    logger.error(f"Error sending lifecycle summary to user {telegram_id}: {response.text}")
+                    
+            except Exception as e:
+                logger.error(f"Error sending lifecycle summary to user {telegram_id}: {e}")
+        
+        logger.info(f"Sent {sent_count} of {len(recipients)} lifecycle summaries")
+        return sent_count > 0
+        
+    except Exception as e:
+        logger.error(f"Error in send_lifecycle_summary: {e}")
+        raise self.retry(countdown=60, exc=e)
+
+
+@shared_task(bind=True, max_retries=3)
+def send_export_ready(self, user_id, filename, rows):
+    """Готовая выгрузка: файлом автору (или всему персоналу), если он не больше лимита Telegram."""
+    try:
+        from django.urls import reverse
+        from apps.operator.exports import export_path
+        from apps.telegram_bot.models import TelegramUser
+        from apps.telegram_bot.registry import notification_recipients
+        
+        recipients = list(
+            TelegramUser.objects.filter(user_id=user_id, is_active=True).values_list('telegram_id', flat=True)
+        ) or notification_recipients()
+        if not recipients:
+            logger.warning("No Telegram recipients for export")
+            return False
+        
+        path = export_path(filename)
+        if path is None:
+            logger.error(f"Export file {filename} not found")
+            return False
+        
+        caption = f"📤 Выгрузка готова: {filename}, строк: {rows}"
+        send_file = path.stat().st_size <= settings.TELEGRAM_DOCUMENT_MAX_SIZE
+        if not send_file:
+            caption += f"\nФайл большой, скачать: {reverse('operator_web:export_download', args=[filename])}"
+        
+        sent_count = 0
+        for telegram_id in recipients:
+            try:
+                if send_file:
+                    url = f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendDocument"
+                    with open(path, 'rb') as document:
+                        response = requests.post(
+                            url, data={'chat_id': telegram_id, 'caption': caption},
+                            files={'document': (filename, document)}, timeout=60,
+                        )
+                else:
+                    url = f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage"
+                    response = requests.post(url, data={'chat_id': telegram_id, 'text': caption}, timeout=10)
+                
+                if response.status_code == 200:
+                    sent_count += 1
+                else:
+                    logger.error(f"Error sending export to user {telegram_id}: {response.text}")
+                    
+            except Exception as e:
+                logger.error(f"Error sending export to user {telegram_id}: {e}")
+        
+        return sent_count > 0
+        
+    except Exception as e:
+        logger.error(f"Error in send_export_ready: {e}")
+        raise self.retry(countdown=60, exc=e)
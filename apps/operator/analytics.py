@@ -0,0 +1,205 @@
+"""
+Загрузка и выручка коттеджей по дням, неделям или месяцам.
+
+Все считает один SQL-запрос: проданные ночи (BookingNight подтвержденных
+и завершенных броней, см. apps.bookings.occupancy) читаются диапазоном по
+дате, группируются по коттеджу и периоду и соединяются с числом дней в
+периоде (generate_series в PostgreSQL, рекурсивный CTE в SQLite).
+
+Неактивные коттеджи попадают в период, только если в нем есть их
+проданные ночи (с пометкой is_active=False): выручка прошлых периодов
+не теряется, а загрузку не занижает простаивающий коттедж.
+
+Результат кэшируется по периодам: запрос за другой диапазон берет
+готовые периоды из кэша и считает только недостающие (одним запросом
+на их общий интервал). В ключе — поколения бронирований и списка
+коттеджей, поэтому устаревшие периоды не читаются. Запрос идет на
+primary: результат отстающей реплики закрепился бы под новым поколением.
+"""
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from apps.bookings.cache import bookings_namespace
+from apps.bookings.models import BookingNight
+from apps.bookings.occupancy import SOLD_STATUSES
+from apps.core.cache import TieredCache
+from apps.cottages.cache import list_namespace
+from apps.cottages.models import Cottage
+
+GRANULARITIES = ('day', 'week', 'month')
+
+analytics_cache = TieredCache(
+    'analytics',
+    max_entries=settings.ANALYTICS_L1_MAX_ENTRIES,
+    timeout=settings.ANALYTICS_CACHE_TIMEOUT,
+)
+
+# Начало периода для дня {day}
+BUCKETS = {
+    'postgresql': {
+        'day': '{day}',
+        'week': "date_trunc('week', {day}::timestamp)::date",
+        'month': "date_trunc('month', {day}::timestamp)::date",
+    },
+    'sqlite': {
+        'day': '{day}',
+        'week': "date({day}, 'weekday 0', '-6 days')",
+        'month': "strftime('%%Y-%%m-01', {day})",
+    },
+}
+
+# Все дни диапазона — для числа доступных ночей в периоде
+DAYS_SQL = {
+    'postgresql': """
+        SELECT day::date AS day
+        FROM generate_series(%s::date, %s::date - 1, interval '1 day') AS day
+    """,
+    'sqlite': """
+        SELECT date(%s) AS day
+        UNION ALL
+        SELECT date(day, '+1 day') FROM days WHERE day < date(%s, '-1 day')
+    """,
+}
+
+REPORT_SQL = """
+WITH RECURSIVE days AS ({days}),
+capacity AS (
+    SELECT {days_bucket} AS period, COUNT(*) AS nights FROM days d GROUP BY 1
+),
+sold AS (
+    SELECT n.cottage_id, {nights_bucket} AS period, COUNT(*) AS nights, SUM(n.revenue) AS revenue
+    FROM {night} n
+    WHERE n.date >= %s AND n.date < %s AND n.status IN ({statuses})
+    GROUP BY 1, 2
+)
+SELECT c.id, c.name, c.is_active, p.period, p.nights, COALESCE(s.nights, 0), COALESCE(s.revenue, 0)
+FROM {cottage} c
+CROSS JOIN capacity p
+LEFT JOIN sold s ON s.cottage_id = c.id AND s.period = p.period
+WHERE c.is_active OR s.nights IS NOT NULL
+ORDER BY p.period, c.id
+"""
+
+
+def period_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _next_period(start, granularity):
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if granularity == 'month':
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def periods(date_from, date_to, granularity):
+    """Периоды [начало, конец) внутри [date_from, date_to): (метка, начало, конец)."""
+    result = []
+    label = period_start(date_from, granularity)
+    while label < date_to:
+        end = _next_period(label, granularity)
+        result.append((label, max(label, date_from), min(end, date_to)))
+        label = end
+    return result
+
+
+def _money(value):
+    return Decimal(str(value)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def _query(date_from, date_to, granularity):
+    """Один запрос за [date_from, date_to): {метка периода: [строки коттеджей]}."""
+    connection = connections[DEFAULT_DB_ALIAS]
+    vendor = 'postgresql' if connection.vendor == 'postgresql' else 'sqlite'
+    bucket = BUCKETS[vendor][granularity]
+    sql = REPORT_SQL.format(
+        days=DAYS_SQL[vendor],
+        days_bucket=bucket.format(day='d.day'),
+        nights_bucket=bucket.format(day='n.date'),
+        night=connection.ops.quote_name(BookingNight._meta.db_table),
+        statuses=', '.join(['%s'] * len(SOLD_STATUSES)),
+        cottage=connection.ops.quote_name(Cottage._meta.db_table),
+    )
+    sold_statuses = [status.value for status in SOLD_STATUSES]
+    params = [date_from, date_to, date_from, date_to, *sold_statuses]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    result = {}
+    for cottage_id, name, is_active, period, available, sold, revenue in rows:
+        label = period if isinstance(period, date) else date.fromisoformat(period)
+        result.setdefault(label, []).append({
+            'cottage_id': cottage_id,
+            'cottage': name,
+            'is_active': bool(is_active),
+            'nights_available': available,
+            'nights_sold': sold,
+            # Строкой: кэш сериализуется в JSON
+            'revenue': str(_money(revenue)),
+        })
+    return result
+
+
+def _cache_key(generations, granularity, start, end):
+    bookings, cottages = generations
+    return f'analytics:g{bookings}:c{cottages}:{granularity}:{start}:{end}'
+
+
+def _with_rates(row):
+    revenue = Decimal(row['revenue'])
+    sold = row['nights_sold']
+    return {
+        **row,
+        'occupancy': round(sold * 100 / row['nights_available'], 1) if row['nights_available'] else 0,
+        'adr': str(_money(revenue / sold)) if sold else '0.00',
+    }
+
+
+def occupancy_report(date_from, date_to, granularity='month'):
+    """
+    Ночи, загрузка (%), выручка и ADR по коттеджам за каждый период
+    [date_from, date_to). Первый и последний периоды обрезаются по диапазону.
+    """
+    buckets = periods(date_from, date_to, granularity)
+    generations = bookings_namespace.generation(), list_namespace.generation()
+    cached = {
+        label: analytics_cache.get(_cache_key(generations, granularity, start, end))
+        for label, start, end in buckets
+    }
+
+    missing = [bucket for bucket in buckets if cached[bucket[0]] is None]
+    if missing:
+        computed = _query(missing[0][1], missing[-1][2], granularity)
+        for label, start, end in missing:
+            cached[label] = computed.get(label, [])
+            analytics_cache.set(
+                _cache_key(generations, granularity, start, end),
+                cached[label],
+                settings.ANALYTICS_CACHE_TIMEOUT,
+            )
+
+    report = []
+    for label, start, end in buckets:
+        cottages = [_with_rates(row) for row in cached[label]]
+        totals = {
+            'nights_available': sum(row['nights_available'] for row in cottages),
+            'nights_sold': sum(row['nights_sold'] for row in cottages),
+            'revenue': str(sum((Decimal(row['revenue']) for row in cottages), Decimal('0.00'))),
+        }
+        report.append({
+            'period': label.isoformat(),
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'cottages': cottages,
+            'totals': _with_rates(totals),
+        })
+    return report
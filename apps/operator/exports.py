@@ -0,0 +1,246 @@
+"""
+Выгрузка бронирований, платежей и заявок в CSV/XLSX.
+
+Строки читаются проекцией values_list() пачками по EXPORT_CHUNK_SIZE с
+keyset-пагинацией по id (id > последнего прочитанного). Серверный курсор
+не используется: за PgBouncer в transaction mode он отключен
+(DB_DISABLE_SERVER_SIDE_CURSORS), и .iterator() получил бы весь результат
+в память клиента.
+
+Итератор HTTP-ответа выбирается по серверу: Django 4.2 читает целиком
+перед отправкой синхронный итератор StreamingHttpResponse под ASGI и
+async-итератор под WSGI. Поэтому под ASGI строки отдаются async-генератором
+(arows -> astream_csv), под WSGI — синхронным (rows -> stream_csv);
+готовые файлы — async-чтением по блокам или FileResponse. В памяти
+одновременно держится одна пачка строк.
+
+Большие выгрузки и XLSX строятся в фоне (задача export_to_file): файл
+пишется в EXPORTS_ROOT синхронным rows(), а готовность приходит в Telegram.
+XLSX требует openpyxl и пишется в режиме write_only — тоже построчно.
+"""
+import csv
+import mimetypes
+import re
+from datetime import date, datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from apps.bookings.models import Booking
+from apps.leads.models import CallbackRequest
+from apps.payments.models import Payment
+
+FORMATS = ('csv', 'xlsx')
+FILE_CHUNK_SIZE = 64 * 1024
+FILENAME_RE = re.compile(r'^[a-z]+-\d{8}-\d{6}\.(csv|xlsx)$')
+
+
+class Export:
+
+    def __init__(self, model, columns, date_field):
+        self.model = model
+        # (lookup для values_list, заголовок)
+        self.columns = columns
+        self.date_field = date_field
+
+    def queryset(self, filters=None, base=None):
+        queryset = self.model.objects.all() if base is None else base
+        filters = filters or {}
+        if filters.get('date_from'):
+            queryset = queryset.filter(**{f'{self.date_field}__gte': filters['date_from']})
+        if filters.get('date_to'):
+            queryset = queryset.filter(**{f'{self.date_field}__lte': filters['date_to']})
+        if filters.get('status'):
+            queryset = queryset.filter(status=filters['status'])
+        return queryset.order_by('id')
+
+    def _values(self, queryset):
+        # pk первым — для keyset-пагинации, в файл не выводится
+        return queryset.values_list('pk', *(lookup for lookup, _ in self.columns)).order_by('pk')
+
+    def header(self):
+        return [header for _, header in self.columns]
+
+    def rows(self, queryset):
+        """Заголовок, затем строки пачками — без загрузки всего результата в память."""
+        yield self.header()
+        values = self._values(queryset)
+        chunk = list(values[:settings.EXPORT_CHUNK_SIZE])
+        while chunk:
+            for row in chunk:
+                yield [_format(value) for value in row[1:]]
+            chunk = list(values.filter(pk__gt=chunk[-1][0])[:settings.EXPORT_CHUNK_SIZE])
+
+    async def arows(self, queryset):
+        """То же, что rows(), для потокового ответа под ASGI."""
+        yield self.header()
+        values = self._values(queryset)
+        chunk = [row async for row in values[:settings.EXPORT_CHUNK_SIZE]]
+        while chunk:
+            for row in chunk:
+                yield [_format(value) for value in row[1:]]
+            chunk = [row async for row in values.filter(pk__gt=chunk[-1][0])[:settings.EXPORT_CHUNK_SIZE]]
+
+
+def _format(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return timezone.localtime(value).strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+EXPORTS = {
+    'bookings': Export(Booking, [
+        ('id', 'ID'),
+        ('cottage__name', 'Коттедж'),
+        ('check_in', 'Заезд'),
+        ('check_out', 'Выезд'),
+        ('guests', 'Гостей'),
+        ('total_price', 'Стоимость'),
+        ('status', 'Статус'),
+        ('user__last_name', 'Фамилия'),
+        ('user__first_name', 'Имя'),
+        ('user__email', 'Email'),
+        ('user__phone', 'Телефон'),
+        ('guest_name', 'Гость'),
+        ('guest_email', 'Email гостя'),
+        ('created_at', 'Создано'),
+    ], date_field='check_in'),
+    'payments': Export(Payment, [
+        ('id', 'ID'),
+        ('booking_id', 'Бронирование'),
+        ('booking__cottage__name', 'Коттедж'),
+        ('amount', 'Сумма'),
+        ('status', 'Статус'),
+        ('payment_method', 'Способ оплаты'),
+        ('transaction_id', 'ID транзакции'),
+        ('created_at', 'Создано'),
+        ('updated_at', 'Обновлено'),
+    ], date_field='created_at__date'),
+    'callbacks': Export(CallbackRequest, [
+        ('id', 'ID'),
+        ('last_name', 'Фамилия'),
+        ('first_name', 'Имя'),
+        ('middle_name', 'Отчество'),
+        ('phone', 'Телефон'),
+        ('email', 'Email'),
+        ('cottage__name', 'Коттедж'),
+        ('status', 'Статус'),
+        ('message', 'Сообщение'),
+        ('created_at', 'Создано'),
+        ('processed_at', 'Обработано'),
+    ], date_field='created_at__date'),
+}
+
+
+def parse_filters(params):
+    """date_from, date_to (YYYY-MM-DD) и status из GET; ValueError при неверной дате."""
+    filters = {}
+    for key in ('date_from', 'date_to'):
+        if params.get(key):
+            filters[key] = date.fromisoformat(params[key]).isoformat()
+    if params.get('status'):
+        filters['status'] = params['status']
+    return filters
+
+
+class _Echo:
+    """Псевдофайл для csv.writer: writerow возвращает строку, а не пишет ее."""
+
+    def write(self, value):
+        return value
+
+
+# BOM, чтобы Excel открыл UTF-8 с кириллицей
+BOM = '\ufeff'
+
+
+def stream_csv(rows):
+    yield BOM
+    writer = csv.writer(_Echo())
+    for row in rows:
+        yield writer.writerow(row)
+
+
+async def astream_csv(rows):
+    yield BOM
+    writer = csv.writer(_Echo())
+    async for row in rows:
+        yield writer.writerow(row)
+
+
+def csv_response(request, name, queryset):
+    """Потоковый CSV выгрузки name по queryset — итератором под сервер запроса."""
+    export = EXPORTS[name]
+    if isinstance(request, ASGIRequest):
+        content = astream_csv(export.arows(queryset))
+    else:
+        content = stream_csv(export.rows(queryset))
+    response = StreamingHttpResponse(content, content_type='text/csv; charset=utf-8')
+    filename = f"{name}-{timezone.localtime():%Y%m%d-%H%M%S}.csv"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_action(name):
+    """Действие админки: выбранные строки в CSV потоком."""
+    def action(modeladmin, request, queryset):
+        return csv_response(request, name, EXPORTS[name].queryset(base=queryset))
+    action.__name__ = f'export_{name}_csv'
+    action.short_description = 'Выгрузить выбранные в CSV'
+    return action
+
+
+def write_export(name, filters, fmt):
+    """Пишет выгрузку в файл EXPORTS_ROOT; (путь, число строк без заголовка)."""
+    export = EXPORTS[name]
+    root = settings.EXPORTS_ROOT
+    root.mkdir(parents=True, exist_ok=True)
+    path = root / f"{name}-{timezone.localtime():%Y%m%d-%H%M%S}.{fmt}"
+    rows = export.rows(export.queryset(filters))
+
+    if fmt == 'xlsx':
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(name)
+        for count, row in enumerate(rows):
+            sheet.append(row)
+        workbook.save(path)
+    else:
+        with open(path, 'w', newline='', encoding='utf-8-sig') as output:
+            writer = csv.writer(output)
+            for count, row in enumerate(rows):
+                writer.writerow(row)
+    return path, count
+
+
+def export_path(filename):
+    """Путь к готовому файлу выгрузки или None (имя проверяется, без выхода из каталога)."""
+    if not FILENAME_RE.match(filename):
+        return None
+    path = settings.EXPORTS_ROOT / filename
+    return path if path.is_file() else None
+
+
+async def _read_file(path):
+    with open(path, 'rb') as source:
+        while chunk := await sync_to_async(source.read, thread_sensitive=False)(FILE_CHUNK_SIZE):
+            yield chunk
+
+
+def file_response(request, path):
+    """Готовый файл выгрузки потоком по FILE_CHUNK_SIZE байт."""
+    if not isinstance(request, ASGIRequest):
+        # Под WSGI — wsgi.file_wrapper сервера
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=path.name)
+    response = StreamingHttpResponse(_read_file(path), content_type=mimetypes.guess_type(path.name)[0] or 'application/octet-stream')
+    response['Content-Length'] = path.stat().st_size
+    response['Content-Disposition'] = f'attachment; filename="{path.name}"'
+    return response
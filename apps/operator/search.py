@@ -0,0 +1,190 @@
+"""
+Единый поиск оператора по бронированиям, клиентам и заявкам на звонок.
+
+Каждая таблица ищется отдельным запросом по своим полям, чтобы в
+PostgreSQL условия шли по триграммным GIN-индексам (миграция
+bookings 0005): ILIKE '%...%' плюс нечеткое совпадение слов (%>) для
+опечаток, с сортировкой по сходству. Поиск бронирований по клиенту и
+коттеджу — через id, найденные первыми запросами, без JOIN с
+icontains по чужим таблицам. На других СУБД остается icontains и
+ранжирование в Python.
+
+Результаты всех типов ранжируются по одной шкале (score от 0 до 1).
+"""
+from difflib import SequenceMatcher
+
+from django.db import connection
+from django.db.models import Q
+from django.urls import reverse
+
+from apps.bookings.models import Booking
+from apps.cottages.models import Cottage
+from apps.leads.models import CallbackRequest
+from apps.users.models import User
+from apps.users.phones import looks_like_phone, normalize_phone
+
+MIN_QUERY_LENGTH = 3
+# Сколько кандидатов каждого типа берется до общего ранжирования
+CANDIDATES = 30
+
+USER_FIELDS = ['email', 'first_name', 'last_name']
+CALLBACK_FIELDS = ['email', 'first_name', 'last_name']
+BOOKING_FIELDS = ['guest_name', 'guest_email']
+
+
+def _use_trigrams():
+    return connection.vendor == 'postgresql'
+
+
+def _text_condition(fields, query):
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__icontains': query})
+        if _use_trigrams():
+            condition |= Q(**{f'{field}__trigram_word_similar': query})
+    return condition
+
+
+def _phone_condition(query):
+    phone = normalize_phone(query)
+    if phone:
+        return Q(phone_normalized=phone)
+    return Q(phone_normalized__contains=''.join(ch for ch in query if ch.isdigit()))
+
+
+def _ordered(queryset, fields, query, fallback):
+    """Лучшие по сходству кандидаты (PostgreSQL) или самые новые."""
+    if not _use_trigrams():
+        return queryset.order_by(*fallback)
+    from django.contrib.postgres.search import TrigramWordSimilarity
+    from django.db.models.functions import Coalesce, Greatest
+
+    similarity = Greatest(*[Coalesce(TrigramWordSimilarity(query, field), 0.0) for field in fields])
+    return queryset.annotate(similarity=similarity).order_by('-similarity', *fallback)
+
+
+def rank(query, *values):
+    """Сходство запроса со лучшим из значений: 1 — совпадение, 0 — ничего общего."""
+    query = query.lower()
+    best = 0.0
+    for value in values:
+        if not value:
+            continue
+        value = str(value).lower()
+        if value == query:
+            return 1.0
+        if value.startswith(query):
+            best = max(best, 0.9)
+        elif query in value:
+            best = max(best, 0.7)
+        else:
+            # Нечеткое совпадение с лучшим словом значения (опечатки)
+            words = value.replace('@', ' ').split()
+            ratio = max(SequenceMatcher(None, query, word).ratio() for word in words) if words else 0
+            best = max(best, ratio * 0.6)
+    return round(best, 3)
+
+
+def _matching_users(query, is_phone):
+    condition = _phone_condition(query) if is_phone else _text_condition(USER_FIELDS, query)
+    queryset = User.objects.filter(condition).only(
+        'id', 'email', 'first_name', 'last_name', 'middle_name', 'phone', 'phone_normalized'
+    )
+    fields = ['phone_normalized'] if is_phone else USER_FIELDS
+    return list(_ordered(queryset, fields, query, ['-date_joined'])[:CANDIDATES])
+
+
+def _matching_callbacks(query, is_phone):
+    condition = _phone_condition(query) if is_phone else _text_condition(CALLBACK_FIELDS, query)
+    queryset = CallbackRequest.objects.filter(condition)
+    fields = ['phone_normalized'] if is_phone else CALLBACK_FIELDS
+    return list(_ordered(queryset, fields, query, ['-created_at'])[:CANDIDATES])
+
+
+def _matching_cottage_ids(query):
+    return list(Cottage.objects.filter(_text_condition(['name'], query)).values_list('id', flat=True)[:CANDIDATES])
+
+
+def booking_condition(query, user_ids=None, cottage_ids=None):
+    """
+    Условие поиска бронирований: гость, клиент или коттедж. Клиенты и
+    коттеджи ищутся отдельными запросами по своим индексам.
+    """
+    query = ' '.join(query.split())
+    is_phone = looks_like_phone(query)
+    if user_ids is None:
+        user_ids = [user.id for user in _matching_users(query, is_phone)]
+    if cottage_ids is None:
+        cottage_ids = [] if is_phone else _matching_cottage_ids(query)
+    condition = Q(user_id__in=user_ids) | Q(cottage_id__in=cottage_ids)
+    if not is_phone:
+        condition |= _text_condition(BOOKING_FIELDS, query)
+    return condition
+
+
+def _user_result(user, query):
+    return {
+        'type': 'user',
+        'id': user.id,
+        'title': user.full_name or user.email,
+        'subtitle': ' · '.join(filter(None, [user.email, user.phone])),
+        'url': reverse('admin:users_user_change', args=[user.id]),
+        'score': rank(query, user.email, user.first_name, user.last_name, user.full_name, user.phone_normalized),
+    }
+
+
+def _callback_result(callback, query):
+    return {
+        'type': 'callback',
+        'id': callback.id,
+        'title': callback.full_name,
+        'subtitle': ' · '.join(filter(None, [callback.phone, callback.email, callback.get_status_display()])),
+        'url': reverse('admin:leads_callbackrequest_change', args=[callback.id]),
+        'score': rank(
+            query, callback.email, callback.first_name, callback.last_name,
+            callback.full_name, callback.phone_normalized,
+        ),
+    }
+
+
+def _booking_result(booking, query):
+    user = booking.user
+    user_values = [user.email, user.full_name, user.first_name, user.last_name, user.phone_normalized] if user else []
+    return {
+        'type': 'booking',
+        'id': booking.id,
+        'title': f"#{booking.id} {booking.cottage.name}",
+        'subtitle': f"{booking.client_name} · {booking.check_in:%d.%m.%Y} - {booking.check_out:%d.%m.%Y} · "
+                    f"{booking.get_status_display()}",
+        'url': reverse('admin:bookings_booking_change', args=[booking.id]),
+        # Совпадение по коттеджу слабее совпадения по клиенту
+        'score': max(
+            rank(query, booking.guest_name, booking.guest_email, *user_values),
+            rank(query, booking.cottage.name) * 0.8,
+        ),
+    }
+
+
+def operator_search(query, limit=20):
+    """Смешанные результаты поиска, лучшие первыми."""
+    query = ' '.join(query.split())
+    if len(query) < MIN_QUERY_LENGTH:
+        return []
+    is_phone = looks_like_phone(query)
+
+    users = {user.id: user for user in _matching_users(query, is_phone)}
+    callbacks = _matching_callbacks(query, is_phone)
+    bookings = (
+        Booking.objects
+        .filter(booking_condition(query, user_ids=list(users)))
+        .select_related('user', 'cottage')
+        .order_by('-created_at', '-id')[:CANDIDATES]
+    )
+
+    results = (
+        [_user_result(user, query) for user in users.values()]
+        + [_callback_result(callback, query) for callback in callbacks]
+        + [_booking_result(booking, query) for booking in bookings]
+    )
+    results.sort(key=lambda result: result['score'], reverse=True)
+    return results[:limit]
@@ -0,0 +1,18 @@
+import logging
+
+from celery import shared_task
+
+from .exports import write_export
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def export_to_file(name, filters, fmt, user_id):
+    """Фоновая выгрузка в файл EXPORTS_ROOT; готовый файл уходит в Telegram."""
+    from apps.notifications.tasks import send_export_ready
+
+    path, rows = write_export(name, filters, fmt)
+    logger.info(f"Export {name} ({fmt}) written to {path}: {rows} rows")
+    send_export_ready.delay(user_id, path.name, rows)
+    return {'file': path.name, 'rows': rows}
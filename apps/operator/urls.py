@@ -6,6 +6,11 @@ app_name = 'operator'
 urlpatterns = [
     path('', views.operator_dashboard, name='dashboard'),
     path('quick-booking/', views.quick_booking_view, name='quick_booking'),
+    path('api/search/', views.operator_search_view, name='search'),
+    path('analytics/', views.analytics_page, name='analytics'),
+    path('api/analytics/', views.analytics_api, name='analytics_api'),
+    path('export/<str:name>/', views.export_view, name='export'),
+    path('exports/<str:filename>', views.export_download, name='export_download'),
     path('api/cottage/<int:cottage_id>/availability/', views.get_cottage_availability, name='cottage_availability'),
     path('api/change-booking-status/', 
          views.change_booking_status, 
@@ -13,4 +18,6 @@ urlpatterns = [
     path('api/change-callback-status/', 
          views.change_callback_status, 
          name='change_callback_status'),
+    path('profiles/', views.profiles_list, name='profiles'),
+    path('profiles/<str:profile_id>/', views.profile_detail, name='profile_detail'),
 ]
@@ -1,6 +1,7 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse, Http404
+from django.conf import settings
 from django.utils import timezone
 from datetime import datetime, timedelta
 from django.views.decorators.csrf import csrf_exempt
@@ -10,9 +11,21 @@ import logging
 
 from apps.cottages.models import Cottage
 from apps.bookings.models import Booking, BookingStatus
-from apps.users.models import User
+from apps.bookings import occupancy
+from apps.users.customers import customers_by_phone, resolve_customer
+from apps.users.phones import normalize_phone
 from apps.leads.models import CallbackRequest
 from django.utils.safestring import mark_safe
+from asgiref.sync import sync_to_async
+from apps.core.async_views import async_user_passes_test, json_response, not_modified
+from apps.core.cache import agenerations_etag
+from apps.core.db.routers import read_replica
+from apps.core.query_budget import query_budget
+from apps.cottages.cache import availability_namespace, detail_namespace
+from apps.core.profiling import list_profiles, get_profile, summarize
+from .analytics import GRANULARITIES, occupancy_report, periods
+from .exports import EXPORTS, FORMATS, csv_response, export_path, file_response, parse_filters
+from .search import operator_search
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +34,7 @@ def is_operator(user):
     return user.is_staff or user.is_superuser
 
 
+@query_budget(15)
 @login_required
 @user_passes_test(is_operator)
 def quick_booking_view(request):
@@ -50,41 +64,14 @@ def quick_booking_view(request):
             if not all([first_name, last_name, phone, cottage_id, check_in, check_out]):
                 return render(request, 'operator/quick_booking.html', {'cottages': cottages})
             
-            user = None
-            try:
-                user = User.objects.get(phone=phone)
-                user.first_name = first_name
-                user.last_name = last_name
-                if email and user.email != email:
-                    if not User.objects.filter(email=email).exists():
-                        user.email = email
-                user.save()
-            except User.DoesNotExist:
-                if email:
-                    try:
-                        user = User.objects.get(email=email)
-                        user.first_name = first_name
-                        user.last_name = last_name
-                        user.phone = phone
-                        user.save()
-                    except User.DoesNotExist:
-                        username = f"client_{phone.replace('+', '').replace(' ', '').replace('-', '')}"
-                        user = User.objects.create(
-                            username=username,
-                            first_name=first_name,
-                            last_name=last_name,
-                            email=email,
-                            phone=phone
-                        )
-                else:
-                    username = f"client_{phone.replace('+', '').replace(' ', '').replace('-', '')}"
-                    user = User.objects.create(
-                        username=username,
-                        first_name=first_name,
-                        last_name=last_name,
-                        email=f"{username}@example.com",
-                        phone=phone
-                    )
+            if normalize_phone(phone) is None:
+                return render(request, 'operator/quick_booking.html', {
+                    'cottages': cottages,
+                    'form_data': {'first_name': first_name, 'last_name': last_name, 'phone': phone, 'email': email},
+                    'phone_error': 'Не удалось распознать номер телефона',
+                })
+            
+            user = resolve_customer(first_name, last_name, phone, email)
             
             cottage = Cottage.objects.get(id=cottage_id)
             
@@ -163,47 +150,50 @@ def quick_booking_view(request):
     })
 
 
-@login_required
-@user_passes_test(is_operator)
-def get_cottage_availability(request, cottage_id):
+async def aget_availability_data(cottage_id):
+    cottage = await Cottage.objects.aget(id=cottage_id)
+    
+    start_date = timezone.now().date()
+    end_date = start_date + timedelta(days=365)
+    
+    unavailable_dates = [
+        day.isoformat() async for day in occupancy.occupied_dates(cottage.id, start_date, end_date)
+    ]
+    
+    logger.debug(f"Коттедж {cottage.name}, забронированные даты: {unavailable_dates}")
+    
+    return {
+        'success': True,
+        'unavailable_dates': unavailable_dates,
+        'cottage_name': cottage.name,
+        'price_per_night': float(cottage.price_per_night)
+    }
+
+
+@query_budget(4)
+@async_user_passes_test(is_operator)
+async def get_cottage_availability(request, cottage_id):
+    # Окно занятости начинается с сегодняшнего дня — дата входит в ETag
+    etag = await agenerations_etag(
+        [detail_namespace(cottage_id), availability_namespace(cottage_id)],
+        timezone.now().date().isoformat(),
+    )
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    
     try:
-        cottage = Cottage.objects.get(id=cottage_id)
-        
-        start_date = timezone.now().date()
-        end_date = start_date + timedelta(days=365)
-        
-        booked_dates = Booking.objects.filter(
-            cottage=cottage,
-            status__in=[BookingStatus.PENDING, BookingStatus.CONFIRMED],
-            check_in__lte=end_date,
-            check_out__gte=start_date
-        ).values_list('check_in', 'check_out')
-        
-        unavailable_dates = []
-        for check_in, check_out in booked_dates:
-            current_date = check_in
-            while current_date <= check_out:  # Включаем последний день
-                # Используем ISO формат даты
-                unavailable_dates.append(current_date.isoformat())
-                current_date += timedelta(days=1)
-        
-        logger.debug(f"Коттедж {cottage.name}, забронированные даты: {unavailable_dates}")
-        
-        return JsonResponse({
-            'success': True,
-            'unavailable_dates': unavailable_dates,
-            'cottage_name': cottage.name,
-            'price_per_night': float(cottage.price_per_night)
-        })
-        
+        return json_response(await aget_availability_data(cottage_id), etag=etag)
     except Cottage.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Коттедж не найден'})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)})
 
 
+@query_budget(12)
 @login_required
 @user_passes_test(is_operator)
+@read_replica
 def operator_dashboard(request):
     today = timezone.now().date()
     
@@ -227,6 +217,11 @@ def operator_dashboard(request):
         created_at__gte=week_ago
     ).select_related('cottage').order_by('-created_at')[:20]
     
+    # Заявки от уже известных клиентов: один запрос по phone_normalized
+    customers = customers_by_phone(callback.phone_normalized for callback in recent_callbacks)
+    for callback in recent_callbacks:
+        callback.customer = customers.get(callback.phone_normalized)
+    
     logger.debug(f"Найдено бронирований за 7 дней: {recent_bookings.count()}")
     for booking in recent_bookings:
         logger.debug(f"Бронирование {booking.id}: статус='{booking.status}', создано={booking.created_at}, get_status_display='{booking.get_status_display()}'")
@@ -245,6 +240,103 @@ def operator_dashboard(request):
     return render(request, 'operator/dashboard.html', context)
 
 
+@query_budget(5)
+@login_required
+@user_passes_test(is_operator)
+@read_replica
+def operator_search_view(request):
+    query = request.GET.get('q', '')
+    return JsonResponse({
+        'query': query,
+        'results': operator_search(query),
+    })
+
+
+def _analytics_params(params):
+    """(date_from, date_to, granularity) из GET; ValueError с текстом ошибки."""
+    today = timezone.localdate()
+    try:
+        date_from = datetime.strptime(params['date_from'], '%Y-%m-%d').date() if params.get('date_from') else today.replace(month=1, day=1)
+        date_to = datetime.strptime(params['date_to'], '%Y-%m-%d').date() if params.get('date_to') else date_from.replace(year=date_from.year + 1, month=1, day=1)
+    except ValueError:
+        raise ValueError('Даты в формате YYYY-MM-DD')
+    granularity = params.get('granularity', 'month')
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Периоды: {', '.join(GRANULARITIES)}")
+    if date_to <= date_from:
+        raise ValueError('date_to должна быть позже date_from')
+    if len(periods(date_from, date_to, granularity)) > settings.ANALYTICS_MAX_PERIODS:
+        raise ValueError('Слишком много периодов: укрупните период или сократите диапазон')
+    return date_from, date_to, granularity
+
+
+@query_budget(2)
+@login_required
+@user_passes_test(is_operator)
+def analytics_api(request):
+    try:
+        date_from, date_to, granularity = _analytics_params(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({
+        'date_from': date_from.isoformat(),
+        'date_to': date_to.isoformat(),
+        'granularity': granularity,
+        'periods': occupancy_report(date_from, date_to, granularity),
+    })
+
+
+@query_budget(2)
+@login_required
+@user_passes_test(is_operator)
+def analytics_page(request):
+    try:
+        date_from, date_to, granularity = _analytics_params(request.GET)
+        report, error = occupancy_report(date_from, date_to, granularity), None
+    except ValueError as e:
+        date_from = date_to = granularity = None
+        report, error = [], str(e)
+    return render(request, 'operator/analytics.html', {
+        'report': report,
+        'error': error,
+        'date_from': date_from,
+        'date_to': date_to,
+        'granularity': granularity,
+        'granularities': GRANULARITIES,
+    })
+
+
+@async_user_passes_test(is_operator)
+async def export_view(request, name):
+    """CSV потоком; ?background=1 или ?format=xlsx — файл в фоне с уведомлением в Telegram"""
+    export = EXPORTS.get(name)
+    if export is None:
+        raise Http404('Неизвестная выгрузка')
+    try:
+        filters = parse_filters(request.GET)
+    except ValueError:
+        return JsonResponse({'error': 'Даты в формате YYYY-MM-DD'}, status=400)
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in FORMATS:
+        return JsonResponse({'error': f"Форматы: {', '.join(FORMATS)}"}, status=400)
+    
+    if fmt == 'xlsx' or request.GET.get('background'):
+        from .tasks import export_to_file
+        await sync_to_async(export_to_file.delay)(name, filters, fmt, request.user.id)
+        return JsonResponse({'status': 'queued', 'message': 'Файл придет в Telegram'}, status=202)
+    
+    # Строки уходят клиенту по мере чтения пачек
+    return csv_response(request, name, export.queryset(filters))
+
+
+@async_user_passes_test(is_operator)
+async def export_download(request, filename):
+    path = export_path(filename)
+    if path is None:
+        raise Http404('Файл выгрузки не найден')
+    return file_response(request, path)
+
+
 @login_required
 @user_passes_test(is_operator)
 @require_POST
@@ -281,18 +373,7 @@ def generate_availability_calendar(cottage):
     today = date.today()
     end_date = today + timedelta(days=365)  # Год вперед
     
-    bookings = Booking.objects.filter(
-        cottage=cottage,
-        status__in=[BookingStatus.PENDING, BookingStatus.CONFIRMED],
-        check_out__gte=today
-    ).order_by('check_in')
-    
-    booked_dates = set()
-    for booking in bookings:
-        current_date = booking.check_in
-        while current_date <= booking.check_out:  # Включаем последний день
-            booked_dates.add(current_date)
-            current_date += timedelta(days=1)
+    booked_dates = set(occupancy.occupied_dates(cottage.id, today, end_date))
     
     calendar_html = f'''
     <div style="margin: 20px 0;">
@@ -402,3 +483,32 @@ def change_booking_status(request):
         return JsonResponse({'success': False, 'error': 'Неверный формат данных'})
     except Exception as e:
         return JsonResponse({'success': False, 'error': f'Ошибка: {str(e)}'})
+
+
+
+@login_required
+@user_passes_test(is_operator)
+def profiles_list(request):
+    return render(request, 'operator/profiles.html', {
+        'profiles': list_profiles(),
+    })
+
+
+@login_required
+@user_passes_test(is_operator)
+def profile_detail(request, profile_id):
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise Http404('Профиль не найден или удален по сроку хранения')
+    
+    if request.GET.get('format') == 'collapsed':
+        # Формат flamegraph.pl / speedscope
+        lines = [f"{stack} {count}" for stack, count in profile['stacks'].items()]
+        response = HttpResponse('\n'.join(lines), content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="profile_{profile_id}.txt"'
+        return response
+    
+    return render(request, 'operator/profile_detail.html', {
+        'profile': profile,
+        'summary': summarize(profile['stacks']),
+    })
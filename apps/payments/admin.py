@@ -0,0 +1,25 @@
+from django.contrib import admin
+
+from apps.operator.exports import export_action
+from .models import Payment, PaymentEvent
+
+
+@admin.register(Payment)
+class PaymentAdmin(admin.ModelAdmin):
+    list_display = ['id', 'booking', 'amount', 'status', 'payment_method', 'transaction_id', 'created_at']
+    list_filter = ['status', 'payment_method', 'created_at']
+    search_fields = ['transaction_id']
+    list_select_related = ['booking__cottage', 'booking__user']
+    raw_id_fields = ['booking']
+    readonly_fields = ['provider_event_at', 'created_at', 'updated_at']
+    ordering = ['-created_at']
+    actions = [export_action('payments')]
+
+
+@admin.register(PaymentEvent)
+class PaymentEventAdmin(admin.ModelAdmin):
+    list_display = ['event_id', 'provider', 'event_type', 'transaction_id', 'status', 'occurred_at', 'processed_at']
+    list_filter = ['status', 'provider', 'event_type']
+    search_fields = ['event_id', 'transaction_id']
+    readonly_fields = ['received_at', 'processed_at']
+    ordering = ['-occurred_at']
@@ -0,0 +1,248 @@
+"""
+Прием и применение событий платежного провайдера.
+
+Webhook (PaymentWebhookView) только проверяет подпись и сохраняет сырое
+событие одним INSERT ... ON CONFLICT DO NOTHING: повтор с тем же
+(provider, event_id) отбрасывает уникальный индекс, ответ уходит сразу.
+Без ID события ключом служит "<transaction_id>:<тип>" — каждый переход
+транзакции провайдер присылает один раз.
+
+Задача process_payment_events забирает необработанные события пачками
+по PAYMENT_EVENTS_BATCH_SIZE (SELECT ... FOR UPDATE SKIP LOCKED) в
+порядке времени события и применяет переходы к Payment и Booking.
+Событие старше уже примененного (Payment.provider_event_at) пропускается,
+поэтому порядок доставки не важен.
+
+Формат события:
+
+    {"id": "evt_1", "type": "payment.succeeded", "created": "2025-01-01T12:00:00Z",
+     "data": {"transaction_id": "tx_1", "amount": "10000.00", "booking_id": 42}}
+
+booking_id нужен, только если платеж для транзакции еще не создан.
+"""
+import hashlib
+import hmac
+import json
+import logging
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.bookings import occupancy
+from apps.bookings.cache import bookings_namespace
+from apps.bookings.models import Booking, BookingStatus
+from apps.cottages.cache import availability_namespace
+
+from .models import Payment, PaymentEvent, PaymentEventStatus, PaymentStatus
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = 'X-Payment-Signature'
+CONSUMER_KEY = 'payments:consumer_scheduled'
+
+EVENT_STATUSES = {
+    'payment.processing': PaymentStatus.PROCESSING,
+    'payment.succeeded': PaymentStatus.COMPLETED,
+    'payment.failed': PaymentStatus.FAILED,
+    'payment.refunded': PaymentStatus.REFUNDED,
+}
+
+# Статус платежа → (из каких статусов брони, в какой)
+BOOKING_TRANSITIONS = {
+    PaymentStatus.COMPLETED: ({BookingStatus.PENDING}, BookingStatus.CONFIRMED),
+    PaymentStatus.REFUNDED: ({BookingStatus.PENDING, BookingStatus.CONFIRMED}, BookingStatus.CANCELLED),
+}
+
+
+def sign(body, secret=None):
+    secret = settings.PAYMENT_WEBHOOK_SECRET if secret is None else secret
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def signature_matches(body, signature):
+    # Пустой секрет — webhook выключен
+    if not settings.PAYMENT_WEBHOOK_SECRET:
+        return False
+    # Байты: compare_digest падает на str с не-ASCII символами
+    return hmac.compare_digest(sign(body).encode(), signature.encode('utf-8', 'surrogateescape'))
+
+
+def _occurred_at(value):
+    if value is None:
+        return timezone.now()
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+    parsed = parse_datetime(str(value))
+    if parsed is None:
+        raise ValueError(f'invalid created: {value}')
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed, dt_timezone.utc)
+
+
+def parse_events(body):
+    """Тело webhook (событие или список событий) → несохраненные PaymentEvent."""
+    try:
+        payload = json.loads(body)
+    except (TypeError, ValueError):
+        raise ValueError('invalid JSON')
+
+    events = []
+    for raw in payload if isinstance(payload, list) else [payload]:
+        if not isinstance(raw, dict):
+            raise ValueError('event must be an object')
+        data = raw.get('data') or {}
+        event_type = raw.get('type')
+        transaction_id = data.get('transaction_id')
+        if not event_type or not transaction_id:
+            raise ValueError('type and data.transaction_id are required')
+        events.append(PaymentEvent(
+            provider=settings.PAYMENT_PROVIDER,
+            event_id=str(raw.get('id') or f'{transaction_id}:{event_type}'),
+            event_type=event_type,
+            transaction_id=str(transaction_id),
+            payload=raw,
+            occurred_at=_occurred_at(raw.get('created')),
+        ))
+    return events
+
+
+def ingest(events):
+    """Сохраняет события одним запросом (повторы отбрасываются) и планирует обработку."""
+    PaymentEvent.objects.bulk_create(events, ignore_conflicts=True)
+    transaction.on_commit(schedule_processing)
+
+
+def schedule_processing():
+    # Всплеск событий собирается в одну задачу через PAYMENT_EVENTS_BATCH_DELAY секунд
+    delay = settings.PAYMENT_EVENTS_BATCH_DELAY
+    if not cache.add(CONSUMER_KEY, 1, timeout=delay + 60):
+        return
+    from .tasks import process_payment_events
+
+    try:
+        process_payment_events.apply_async(countdown=delay)
+    except Exception as e:
+        # Задача по расписанию подберет события позже
+        cache.delete(CONSUMER_KEY)
+        logger.error(f"Failed to schedule payment events processing: {e}")
+
+
+def _create_missing_payments(events, payments):
+    """Платежи для транзакций, о которых мы еще не знаем, но событие указывает бронь."""
+    missing = {}
+    for event in events:
+        data = event.payload.get('data') or {}
+        if event.transaction_id in payments or not data.get('booking_id'):
+            continue
+        try:
+            booking_id = int(data['booking_id'])
+            amount = Decimal(str(data.get('amount')))
+        except (TypeError, ValueError, InvalidOperation):
+            continue
+        missing.setdefault(event.transaction_id, Payment(
+            booking_id=booking_id,
+            amount=amount,
+            payment_method=event.provider,
+            transaction_id=event.transaction_id,
+        ))
+    if not missing:
+        return
+    booking_ids = set(Booking.objects.filter(
+        id__in=[payment.booking_id for payment in missing.values()]
+    ).values_list('id', flat=True))
+    # У брони уже есть платеж или транзакция уже известна — конфликт игнорируется
+    Payment.objects.bulk_create(
+        [payment for payment in missing.values() if payment.booking_id in booking_ids],
+        ignore_conflicts=True,
+    )
+    for payment in (
+        Payment.objects.select_for_update().select_related('booking')
+        .filter(transaction_id__in=list(missing)).order_by('id')
+    ):
+        payments[payment.transaction_id] = payment
+
+
+def apply_event_batch(chunk_size):
+    """Применяет одну пачку событий; Counter статусов событий или None, если очередь пуста."""
+    with transaction.atomic():
+        events = list(
+            PaymentEvent.objects.filter(status=PaymentEventStatus.RECEIVED)
+            .select_for_update(skip_locked=True)
+            .order_by('occurred_at', 'id')[:chunk_size]
+        )
+        if not events:
+            return None
+
+        payments = {
+            payment.transaction_id: payment
+            for payment in Payment.objects.select_for_update().select_related('booking')
+            .filter(transaction_id__in={event.transaction_id for event in events}).order_by('id')
+        }
+        _create_missing_payments(events, payments)
+        original = {payment.booking.pk: payment.booking.status for payment in payments.values()}
+
+        now = timezone.now()
+        changed = {}
+        for event in events:
+            payment = payments.get(event.transaction_id)
+            new_status = EVENT_STATUSES.get(event.event_type)
+            event.processed_at = now
+            if payment is None:
+                event.status = PaymentEventStatus.UNMATCHED
+            elif new_status is None or (
+                payment.provider_event_at and event.occurred_at < payment.provider_event_at
+            ):
+                event.status = PaymentEventStatus.SKIPPED
+            else:
+                payment.status = new_status
+                payment.provider_event_at = event.occurred_at
+                payment.updated_at = now
+                changed[payment.pk] = payment
+                apply_booking_transition(payment.booking, new_status, now)
+                event.status = PaymentEventStatus.APPLIED
+
+        bookings = [
+            payment.booking for payment in changed.values()
+            if payment.booking.status != original[payment.booking.pk]
+        ]
+        Payment.objects.bulk_update(changed.values(), ['status', 'provider_event_at', 'updated_at'])
+        Booking.objects.bulk_update(bookings, ['status', 'updated_at'])
+        occupancy.sync_statuses(bookings)
+        PaymentEvent.objects.bulk_update(events, ['status', 'processed_at'])
+
+    if bookings:
+        after_booking_changes(bookings)
+    return Counter(event.status for event in events)
+
+
+def apply_booking_transition(booking, payment_status, now):
+    """Меняет статус брони (в памяти) вслед за статусом платежа; True, если изменился."""
+    if payment_status not in BOOKING_TRANSITIONS:
+        return False
+    allowed, booking_status = BOOKING_TRANSITIONS[payment_status]
+    if booking.status not in allowed:
+        return False
+    booking.status = booking_status
+    booking.updated_at = now
+    return True
+
+
+def after_booking_changes(bookings):
+    # bulk_update минует сигналы: кэши и уведомления — как в apps.bookings.signals
+    from apps.notifications.tasks import send_email_notification, send_telegram_notification
+
+    for cottage_id in {booking.cottage_id for booking in bookings}:
+        availability_namespace(cottage_id).bump()
+    bookings_namespace.bump()
+    for booking in bookings:
+        if booking.status == BookingStatus.CANCELLED:
+            send_telegram_notification.delay(booking.id, 'cancelled')
+            send_email_notification.delay(booking.id, 'cancelled')
+        else:
+            send_telegram_notification.delay(booking.id, 'status_change')
+            send_email_notification.delay(booking.id, 'confirmed')
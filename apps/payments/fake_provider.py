@@ -0,0 +1,60 @@
+"""
+Локальный платежный провайдер для тестов и ручной проверки webhook.
+
+Генерирует подписанные события в формате apps.payments.events и
+воспроизводит их всплесками: с повторами, в перемешанном порядке,
+пачками — так, как их на самом деле доставляют провайдеры.
+"""
+import json
+import random
+from datetime import timedelta
+from itertools import count
+
+from django.urls import reverse
+from django.utils import timezone
+
+from .events import SIGNATURE_HEADER, sign
+
+
+class FakePaymentProvider:
+
+    def __init__(self, secret, seed=0):
+        self.secret = secret
+        self.rng = random.Random(seed)
+        self._ids = count(1)
+
+    def event(self, transaction_id, event_type, created=None, **data):
+        return {
+            'id': f'evt_{next(self._ids)}',
+            'type': event_type,
+            'created': (created or timezone.now()).isoformat(),
+            'data': {'transaction_id': transaction_id, **data},
+        }
+
+    def lifecycle(self, transaction_id, *event_types, start=None, **data):
+        """События одной транзакции с возрастающим временем."""
+        start = start or timezone.now()
+        return [
+            self.event(transaction_id, event_type, created=start + timedelta(seconds=i), **data)
+            for i, event_type in enumerate(event_types)
+        ]
+
+    def burst(self, events, duplicates=0.3):
+        """Перемешанные события, часть — повторно (повторная доставка)."""
+        events = list(events)
+        events += [event for event in events if self.rng.random() < duplicates]
+        self.rng.shuffle(events)
+        return events
+
+    def deliver(self, client, events, batch_size=1, url=None):
+        """Отправляет события в webhook тестовым клиентом Django; ответы по порядку."""
+        url = url or reverse('payments_api:webhook')
+        responses = []
+        for start in range(0, len(events), batch_size):
+            batch = events[start:start + batch_size]
+            body = json.dumps(batch[0] if batch_size == 1 else batch).encode()
+            responses.append(client.post(
+                url, data=body, content_type='application/json',
+                **{f"HTTP_{SIGNATURE_HEADER.upper().replace('-', '_')}": sign(body, self.secret)},
+            ))
+        return responses
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.payments.reconciliation import reconcile_file
+
+SUMMARY_LABELS = [
+    ('rows', 'строк'),
+    ('matched', 'совпало'),
+    ('status', 'расхождений статуса'),
+    ('amount', 'расхождений суммы'),
+    ('missing', 'нет платежа'),
+    ('invalid', 'не разобрано'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Сверяет платежи с выпиской провайдера (CSV или JSON lines) и исправляет статусы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('statement', help='Файл выписки: .csv или .jsonl')
+        parser.add_argument(
+            '--report',
+            help='Куда записать CSV с расхождениями (по умолчанию <выписка>.discrepancies.csv)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.PAYMENT_RECONCILE_CHUNK_SIZE,
+            help='Сколько строк выписки сверять за один запрос',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только отчет, без исправления статусов',
+        )
+
+    def handle(self, *args, **options):
+        statement = options['statement']
+        report = options['report'] or f'{statement}.discrepancies.csv'
+        try:
+            summary = reconcile_file(statement, report, options['chunk_size'], dry_run=options['dry_run'])
+        except FileNotFoundError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(', '.join(f"{label}: {summary[key]}" for key, label in SUMMARY_LABELS))
+        self.stdout.write(f"Отчет: {report}")
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Пробный запуск: статусы не исправлены'))
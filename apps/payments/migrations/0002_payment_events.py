@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:41
+
+from django.db import migrations, models
+
+
+def blank_transaction_ids_to_null(apps, schema_editor):
+    # Пустые строки нарушили бы уникальность, NULL — нет
+    Payment = apps.get_model('payments', 'Payment')
+    Payment.objects.filter(transaction_id='').update(transaction_id=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='provider_event_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последнее событие провайдера'),
+        ),
+        migrations.RunPython(blank_transaction_ids_to_null, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='payment',
+            name='transaction_id',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True, verbose_name='ID транзакции'),
+        ),
+        migrations.CreateModel(
+            name='PaymentEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=50, verbose_name='Провайдер')),
+                ('event_id', models.CharField(max_length=150, verbose_name='ID события')),
+                ('event_type', models.CharField(max_length=50, verbose_name='Тип события')),
+                ('transaction_id', models.CharField(db_index=True, max_length=100, verbose_name='ID транзакции')),
+                ('payload', models.JSONField(verbose_name='Данные')),
+                ('occurred_at', models.DateTimeField(verbose_name='Время события')),
+                ('status', models.CharField(choices=[('received', 'Получено'), ('applied', 'Применено'), ('skipped', 'Устарело'), ('unmatched', 'Платеж не найден')], default='received', max_length=20, verbose_name='Статус')),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Событие платежа',
+                'verbose_name_plural': 'События платежей',
+                'ordering': ['occurred_at', 'id'],
+                'indexes': [models.Index(condition=models.Q(('status', 'received')), fields=['occurred_at', 'id'], name='payment_event_queue')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='paymentevent',
+            constraint=models.UniqueConstraint(fields=('provider', 'event_id'), name='payment_event_unique'),
+        ),
+    ]
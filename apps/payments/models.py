@@ -37,8 +37,15 @@ class Payment(models.Model):
         max_length=100,
         blank=True,
         null=True,
+        unique=True,
         verbose_name='ID транзакции'
     )
+    # Время последнего примененного события провайдера: более старые пропускаются
+    provider_event_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Последнее событие провайдера'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -49,3 +56,49 @@ class Payment(models.Model):
     
     def __str__(self):
         return f"Платеж {self.id} - {self.booking} ({self.amount})"
+
+
+class PaymentEventStatus(models.TextChoices):
+    RECEIVED = 'received', 'Получено'
+    APPLIED = 'applied', 'Применено'
+    SKIPPED = 'skipped', 'Устарело'
+    UNMATCHED = 'unmatched', 'Платеж не найден'
+
+
+class PaymentEvent(models.Model):
+    """Сырое событие webhook провайдера; применяется к Payment задачей process_payment_events"""
+
+    provider = models.CharField(max_length=50, verbose_name='Провайдер')
+    # ID события провайдера, а без него — "<transaction_id>:<event_type>"
+    event_id = models.CharField(max_length=150, verbose_name='ID события')
+    event_type = models.CharField(max_length=50, verbose_name='Тип события')
+    transaction_id = models.CharField(max_length=100, db_index=True, verbose_name='ID транзакции')
+    payload = models.JSONField(verbose_name='Данные')
+    occurred_at = models.DateTimeField(verbose_name='Время события')
+    status = models.CharField(
+        max_length=20,
+        choices=PaymentEventStatus.choices,
+        default=PaymentEventStatus.RECEIVED,
+        verbose_name='Статус'
+    )
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Событие платежа'
+        verbose_name_plural = 'События платежей'
+        ordering = ['occurred_at', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'event_id'], name='payment_event_unique'),
+        ]
+        indexes = [
+            # Очередь необработанных событий в порядке их возникновения
+            models.Index(
+                fields=['occurred_at', 'id'],
+                name='payment_event_queue',
+                condition=models.Q(status='received'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.provider}:{self.event_id} ({self.event_type})"
@@ -0,0 +1,166 @@
+"""
+Сверка платежей с выпиской провайдера.
+
+Выписка (CSV с заголовком или JSON lines) читается построчно и
+обрабатывается пачками по PAYMENT_RECONCILE_CHUNK_SIZE строк: на пачку —
+один запрос платежей по transaction_id и один bulk_update исправлений.
+Отчет о расхождениях пишется в CSV по мере чтения, поэтому память не
+зависит от размера выписки.
+
+Поля строки выписки: transaction_id, status, amount (необязательно).
+
+Виды расхождений в отчете:
+- missing — транзакции из выписки нет среди платежей;
+- status — статус отличается: платеж исправляется по выписке;
+- amount — сумма отличается: только в отчет, суммы правит человек;
+- invalid — строку не удалось разобрать.
+"""
+import csv
+import json
+import logging
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from pathlib import Path
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.bookings import occupancy
+from apps.bookings.models import Booking
+
+from .events import after_booking_changes, apply_booking_transition
+from .models import Payment, PaymentStatus
+
+logger = logging.getLogger(__name__)
+
+JSON_LINES_SUFFIXES = {'.jsonl', '.ndjson', '.json'}
+
+# Статусы провайдера, которые называются не так, как у нас
+STATEMENT_STATUSES = {
+    **{status.value: status for status in PaymentStatus},
+    'succeeded': PaymentStatus.COMPLETED,
+    'paid': PaymentStatus.COMPLETED,
+    'refund': PaymentStatus.REFUNDED,
+    'declined': PaymentStatus.FAILED,
+}
+
+REPORT_FIELDS = [
+    'line', 'transaction_id', 'kind',
+    'statement_status', 'payment_status', 'statement_amount', 'payment_amount',
+]
+
+
+def read_statement(path):
+    """Строки выписки по одной: (номер строки в файле, dict или None)."""
+    # utf-8-sig: выгрузки из Excel начинаются с BOM
+    with open(path, newline='', encoding='utf-8-sig') as statement:
+        if Path(path).suffix.lower() in JSON_LINES_SUFFIXES:
+            for number, line in enumerate(statement, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield number, row if isinstance(row, dict) else None
+        else:
+            # Строка 1 — заголовок
+            for number, row in enumerate(csv.DictReader(statement), 2):
+                yield number, row
+
+
+def _parse_row(row):
+    if not row or not row.get('transaction_id'):
+        return None
+    status = STATEMENT_STATUSES.get(str(row.get('status', '')).strip().lower())
+    if status is None:
+        return None
+    amount = row.get('amount')
+    try:
+        amount = Decimal(str(amount)) if amount not in (None, '') else None
+    except InvalidOperation:
+        return None
+    return str(row['transaction_id']).strip(), status, amount
+
+
+def reconcile(rows, report, chunk_size, dry_run=False):
+    """Сверяет строки выписки с платежами и пишет расхождения в report; Counter итогов."""
+    writer = csv.DictWriter(report, fieldnames=REPORT_FIELDS)
+    writer.writeheader()
+    summary = Counter()
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        summary.update(_reconcile_chunk(chunk, writer, dry_run))
+    return summary
+
+
+def _reconcile_chunk(chunk, writer, dry_run):
+    summary = Counter(rows=len(chunk))
+    entries = []
+    for number, row in chunk:
+        parsed = _parse_row(row)
+        if parsed is None:
+            summary['invalid'] += 1
+            writer.writerow({'line': number, 'transaction_id': (row or {}).get('transaction_id', ''), 'kind': 'invalid'})
+        else:
+            entries.append((number, *parsed))
+
+    with transaction.atomic():
+        payments = {
+            payment.transaction_id: payment
+            for payment in Payment.objects.select_for_update().select_related('booking')
+            .filter(transaction_id__in={entry[1] for entry in entries})
+            .only('id', 'transaction_id', 'status', 'amount', 'booking', 'booking__id', 'booking__status', 'booking__cottage_id')
+        }
+
+        now = timezone.now()
+        fixed = {}
+        bookings = {}
+        for number, transaction_id, status, amount in entries:
+            payment = payments.get(transaction_id)
+            line = {
+                'line': number, 'transaction_id': transaction_id,
+                'statement_status': status, 'statement_amount': amount if amount is not None else '',
+            }
+            if payment is None:
+                summary['missing'] += 1
+                writer.writerow({**line, 'kind': 'missing'})
+                continue
+
+            line.update(payment_status=payment.status, payment_amount=payment.amount)
+            matched = True
+            if amount is not None and amount != payment.amount:
+                matched = False
+                summary['amount'] += 1
+                writer.writerow({**line, 'kind': 'amount'})
+            if status != payment.status:
+                matched = False
+                summary['status'] += 1
+                writer.writerow({**line, 'kind': 'status'})
+                if not dry_run:
+                    payment.status = status
+                    payment.updated_at = now
+                    fixed[payment.pk] = payment
+                    if apply_booking_transition(payment.booking, status, now):
+                        bookings[payment.booking.pk] = payment.booking
+            if matched:
+                summary['matched'] += 1
+
+        Payment.objects.bulk_update(fixed.values(), ['status', 'updated_at'])
+        Booking.objects.bulk_update(bookings.values(), ['status', 'updated_at'])
+        occupancy.sync_statuses(bookings.values())
+
+    if bookings:
+        after_booking_changes(list(bookings.values()))
+    return summary
+
+
+def reconcile_file(statement_path, report_path, chunk_size, dry_run=False):
+    with open(report_path, 'w', newline='', encoding='utf-8') as report:
+        summary = reconcile(read_statement(statement_path), report, chunk_size, dry_run)
+    logger.info(f"Payment reconciliation of {statement_path}: {dict(summary)}")
+    return summary
@@ -0,0 +1,36 @@
+import logging
+from collections import Counter
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+
+from .events import CONSUMER_KEY, apply_event_batch
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def process_payment_events():
+    """Применяет накопленные события webhook пачками, пока очередь не опустеет."""
+    # Новые события после этой точки запланируют следующий запуск
+    cache.delete(CONSUMER_KEY)
+    total = Counter()
+    while True:
+        processed = apply_event_batch(settings.PAYMENT_EVENTS_BATCH_SIZE)
+        if processed is None:
+            break
+        total.update(processed)
+    if total:
+        logger.info(f"Payment events processed: {dict(total)}")
+    return dict(total)
+
+
+@shared_task
+def reconcile_payments(statement_path, report_path, dry_run=False):
+    """Сверка платежей с выпиской провайдера (см. apps.payments.reconciliation)."""
+    from .reconciliation import reconcile_file
+
+    return dict(reconcile_file(
+        statement_path, report_path, settings.PAYMENT_RECONCILE_CHUNK_SIZE, dry_run=dry_run
+    ))
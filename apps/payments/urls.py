@@ -8,6 +8,7 @@ router = DefaultRouter()
 router.register(r'', views.PaymentViewSet)
 
 urlpatterns = [
-    path('', include(router.urls)),
+    # До роутера: иначе 'webhook/' совпадает с '<pk>/' PaymentViewSet
     path('webhook/', views.PaymentWebhookView.as_view(), name='webhook'),
+    path('', include(router.urls)),
 ]
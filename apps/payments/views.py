@@ -1,7 +1,9 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from apps.core.query_budget import query_budget
+from .events import SIGNATURE_HEADER, ingest, parse_events, signature_matches
 from .models import Payment
 from .serializers import PaymentSerializer
 
@@ -17,7 +19,19 @@ class PaymentViewSet(viewsets.ReadOnlyModelViewSet):
         return Payment.objects.filter(booking__user=self.request.user)
 
 
+@query_budget(1)
 class PaymentWebhookView(APIView):
+    """Только сохраняет событие провайдера; применяет его задача process_payment_events"""
+    authentication_classes = []
+    permission_classes = [AllowAny]
     
     def post(self, request):
+        if not signature_matches(request.body, request.headers.get(SIGNATURE_HEADER, '')):
+            return Response({'error': 'invalid signature'}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            events = parse_events(request.body)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        ingest(events)
         return Response({'status': 'ok'})
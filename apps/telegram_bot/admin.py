@@ -26,7 +26,7 @@ class TelegramUserAdmin(admin.ModelAdmin):
     )
     
     def get_queryset(self, request):
-        return super().get_queryset(request)
+        return super().get_queryset(request).select_related('user')
     
     def has_add_permission(self, request):
         """Только суперпользователи могут добавлять новых пользователей"""
@@ -0,0 +1,152 @@
+"""
+Постраничный просмотр бронирований в боте.
+
+Keyset-пагинация по (created_at, id): курсор — ключ первой или последней
+брони на странице, поэтому каждая страница — один запрос по индексу
+без OFFSET. Фильтры и курсор целиком живут в callback_data кнопок
+(лимит Telegram — 64 байта), состояние на сервере не хранится.
+
+    bk:<n|p>:<status>:<cottage_id>:<YYYYMMDD>:<cursor>
+"""
+import re
+from datetime import date, datetime, timedelta, timezone
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from apps.bookings.models import BookingStatus
+
+CALLBACK_PREFIX = 'bk'
+CALLBACK_PATTERN = rf'^{CALLBACK_PREFIX}:'
+PAGE_SIZE = 5
+
+NEXT = 'n'
+PREV = 'p'
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+STATUS_EMOJI = {
+    BookingStatus.PENDING: "⏳",
+    BookingStatus.CONFIRMED: "✅",
+    BookingStatus.CANCELLED: "❌",
+    BookingStatus.COMPLETED: "🏁",
+}
+
+USAGE = (
+    "Использование: /bookings [статус] [id коттеджа] [ГГГГ-ММ-ДД]\n"
+    f"Статусы: {', '.join(BookingStatus.values)}"
+)
+
+
+class BookingFilters:
+    def __init__(self, status='', cottage_id=None, on_date=None):
+        self.status = status
+        self.cottage_id = cottage_id
+        self.on_date = on_date
+
+    @classmethod
+    def from_args(cls, args):
+        """Фильтры из аргументов команды; ValueError — непонятный аргумент."""
+        filters = cls()
+        for arg in args:
+            if arg in BookingStatus.values:
+                filters.status = arg
+            elif arg.isdigit():
+                filters.cottage_id = int(arg)
+            elif _DATE_RE.match(arg):
+                filters.on_date = date.fromisoformat(arg)
+            else:
+                raise ValueError(arg)
+        return filters
+
+    def pack(self):
+        return ':'.join([
+            self.status,
+            str(self.cottage_id or ''),
+            self.on_date.strftime('%Y%m%d') if self.on_date else '',
+        ])
+
+    @classmethod
+    def unpack(cls, status, cottage_id, on_date):
+        return cls(
+            status=status if status in BookingStatus.values else '',
+            cottage_id=int(cottage_id) if cottage_id else None,
+            on_date=datetime.strptime(on_date, '%Y%m%d').date() if on_date else None,
+        )
+
+    def with_status(self, status):
+        return BookingFilters(status, self.cottage_id, self.on_date)
+
+    def describe(self):
+        parts = []
+        if self.status:
+            parts.append(BookingStatus(self.status).label)
+        if self.cottage_id:
+            parts.append(f"коттедж #{self.cottage_id}")
+        if self.on_date:
+            parts.append(f"на {self.on_date:%d.%m.%Y}")
+        return ', '.join(parts) or 'все'
+
+
+def encode_cursor(created_at, booking_id):
+    # Микросекунды целым числом: timestamp() во float теряет точность
+    micros = (created_at - _EPOCH) // timedelta(microseconds=1)
+    return f"{micros:x}.{booking_id:x}"
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    micros, booking_id = cursor.split('.')
+    return _EPOCH + timedelta(microseconds=int(micros, 16)), int(booking_id, 16)
+
+
+def callback_data(direction, filters, cursor=''):
+    return f"{CALLBACK_PREFIX}:{direction}:{filters.pack()}:{cursor}"
+
+
+def parse_callback(data):
+    """(направление, фильтры, курсор) из callback_data; ValueError при порче."""
+    prefix, direction, status, cottage_id, on_date, cursor = data.split(':')
+    if prefix != CALLBACK_PREFIX or direction not in (NEXT, PREV):
+        raise ValueError(data)
+    return direction, BookingFilters.unpack(status, cottage_id, on_date), cursor
+
+
+def render_page(page, filters):
+    text = f"📋 **Бронирования** ({filters.describe()})\n\n"
+    if not page['rows']:
+        text += "Нет бронирований по заданным условиям."
+    for row in page['rows']:
+        text += (
+            f"{STATUS_EMOJI.get(row['status'], '❓')} **{row['cottage']}** · #{row['id']}\n"
+            f"👤 {row['client']}\n"
+            f"📅 {row['check_in']} - {row['check_out']} ({row['nights']} ночей)\n"
+            f"👥 {row['guests']} гостей · 💰 {row['total_price']} ₽\n"
+            f"📝 {row['status_display']}\n\n"
+        )
+    return text, _keyboard(page, filters)
+
+
+def _keyboard(page, filters):
+    paging = []
+    if page['has_prev'] and page['rows']:
+        paging.append(InlineKeyboardButton(
+            "◀️ Назад", callback_data=callback_data(PREV, filters, page['rows'][0]['cursor'])
+        ))
+    if page['has_next'] and page['rows']:
+        paging.append(InlineKeyboardButton(
+            "Вперед ▶️", callback_data=callback_data(NEXT, filters, page['rows'][-1]['cursor'])
+        ))
+
+    statuses = [InlineKeyboardButton(
+        f"{'• ' if not filters.status else ''}Все",
+        callback_data=callback_data(NEXT, filters.with_status('')),
+    )]
+    for status, emoji in STATUS_EMOJI.items():
+        marker = '• ' if filters.status == status else ''
+        statuses.append(InlineKeyboardButton(
+            f"{marker}{emoji}", callback_data=callback_data(NEXT, filters.with_status(status))
+        ))
+
+    return InlineKeyboardMarkup([row for row in (paging, statuses) if row])
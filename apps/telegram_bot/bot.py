@@ -5,11 +5,13 @@ from telegram.ext import (
     ContextTypes, CallbackQueryHandler
 )
 from django.conf import settings
-from django.contrib.auth import get_user_model
-from asgiref.sync import sync_to_async
+from apps.core.metrics import start_metrics_server
+from . import data
+from .booking_pages import CALLBACK_PATTERN, USAGE, BookingFilters, parse_callback, render_page
 from .models import TelegramUser
-from apps.bookings.models import Booking, BookingStatus
-from datetime import datetime, timedelta
+from .registry import ais_staff_member, anotification_recipients
+from apps.bookings.models import Booking
+from datetime import datetime
 
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -17,16 +19,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-User = get_user_model()
-
 
 class CottageBookingBot:    
-    def __init__(self):
+    def __init__(self, request=None):
         self.token = getattr(settings, 'TELEGRAM_BOT_TOKEN', None)
         if not self.token:
             raise ValueError("TELEGRAM_BOT_TOKEN не настроен в settings.py")
         
-        self.application = Application.builder().token(self.token).build()
+        # Апдейты разных чатов обрабатываются параллельно; ORM — в пуле data.py
+        builder = Application.builder().token(self.token).concurrent_updates(
+            settings.TELEGRAM_BOT_CONCURRENT_UPDATES
+        )
+        if request is not None:
+            builder = builder.request(request).get_updates_request(request)
+        self.application = builder.build()
         self._setup_handlers()
     
     def _setup_handlers(self):
@@ -37,6 +43,9 @@ class CottageBookingBot:
         self.application.add_handler(CommandHandler("subscribe", self.subscribe_command))
         self.application.add_handler(CommandHandler("unsubscribe", self.unsubscribe_command))
         
+        self.application.add_handler(
+            CallbackQueryHandler(self.bookings_page_callback, pattern=CALLBACK_PATTERN)
+        )
         self.application.add_handler(CallbackQueryHandler(self.button_callback))
         
         self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message))
@@ -92,7 +101,7 @@ class CottageBookingBot:
 /start - Запуск бота и регистрация
 /help - Показать это сообщение
 /stats - Статистика бронирований
-/bookings - Список активных бронирований
+/bookings [статус] [id коттеджа] [ГГГГ-ММ-ДД] - Бронирования по страницам
 /subscribe - Подписаться на уведомления
 /unsubscribe - Отписаться от уведомлений
 
@@ -120,8 +129,31 @@ class CottageBookingBot:
             await update.message.reply_text("❌ Доступ запрещен!")
             return
         
-        bookings = await self._get_recent_bookings()
-        await update.message.reply_text(bookings, parse_mode='Markdown')
+        try:
+            booking_filters = BookingFilters.from_args(context.args or [])
+        except ValueError:
+            await update.message.reply_text(USAGE)
+            return
+        
+        text, reply_markup = render_page(await data.booking_page(booking_filters), booking_filters)
+        await update.message.reply_text(text, parse_mode='Markdown', reply_markup=reply_markup)
+    
+    async def bookings_page_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        if not await self._is_staff_member(update.effective_user.id):
+            await query.answer("❌ Доступ запрещен!")
+            return
+        
+        try:
+            direction, booking_filters, cursor = parse_callback(query.data)
+        except ValueError:
+            await query.answer("Устаревшая кнопка, повторите /bookings")
+            return
+        
+        await query.answer()
+        page = await data.booking_page(booking_filters, cursor, direction)
+        text, reply_markup = render_page(page, booking_filters)
+        await query.edit_message_text(text, parse_mode='Markdown', reply_markup=reply_markup)
     
     async def subscribe_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         if not await self._is_staff_member(update.effective_user.id):
@@ -143,12 +175,9 @@ class CottageBookingBot:
             await update.message.reply_text("❌ Доступ запрещен!")
             return
         
-        try:
-            telegram_user = TelegramUser.objects.get(telegram_id=update.effective_user.id)
-            telegram_user.is_active = False
-            telegram_user.save()
+        if await data.unsubscribe(update.effective_user.id):
             await update.message.reply_text("✅ Вы отписались от уведомлений.")
-        except TelegramUser.DoesNotExist:
+        else:
             await update.message.reply_text("❌ Вы не были подписаны на уведомления.")
     
     async def button_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -159,8 +188,9 @@ class CottageBookingBot:
             stats = await self._get_booking_stats()
             await query.edit_message_text(stats, parse_mode='Markdown')
         elif query.data == "bookings":
-            bookings = await self._get_recent_bookings()
-            await query.edit_message_text(bookings, parse_mode='Markdown')
+            booking_filters = BookingFilters()
+            text, reply_markup = render_page(await data.booking_page(booking_filters), booking_filters)
+            await query.edit_message_text(text, parse_mode='Markdown', reply_markup=reply_markup)
         elif query.data == "help":
             await self.help_command(update, context)
     
@@ -170,140 +200,38 @@ class CottageBookingBot:
         )
     
     async def _is_staff_member(self, telegram_id: int) -> bool:
-        from asgiref.sync import sync_to_async
-        
-        @sync_to_async
-        def check_staff():
-            try:
-                telegram_user = TelegramUser.objects.get(telegram_id=telegram_id)
-                logger.debug(f"Found TelegramUser {telegram_id}, is_staff: {telegram_user.user.is_staff}")
-                logger.debug(f"User email: {telegram_user.user.email}")
-                return telegram_user.user.is_staff or telegram_user.user.is_superuser
-            except TelegramUser.DoesNotExist:
-                logger.debug(f"TelegramUser {telegram_id} not found in database")
-                return False
-        
-        return await check_staff()
+        return await ais_staff_member(telegram_id)
     
     async def _register_telegram_user(self, telegram_user) -> TelegramUser:
-        from asgiref.sync import sync_to_async
-        
-        @sync_to_async
-        def create_or_activate_user():
-            try:
-                tg_user = TelegramUser.objects.get(telegram_id=telegram_user.id)
-                logger.debug(f"Activating existing TelegramUser {telegram_user.id}")
-                tg_user.is_active = True
-                tg_user.save()
-                return tg_user
-            except TelegramUser.DoesNotExist:
-                logger.debug(f"Creating new TelegramUser {telegram_user.id} WITHOUT staff privileges")
-                
-                logger.debug(f"About to create user with is_staff=False")
-                user = User.objects.create(
-                    username=f"tg_{telegram_user.id}",
-                    email=f"tg_{telegram_user.id}@example.com",
-                    first_name=telegram_user.first_name or '',
-                    last_name=telegram_user.last_name or '',
-                    is_staff=False,
-                    is_superuser=False,
-                    is_active=True
-                )
-                
-                logger.debug(f"User created! username={user.username}, is_staff={user.is_staff}, is_superuser={user.is_superuser}")
-                
-                user_from_db = User.objects.get(id=user.id)
-                logger.debug(f"User from DB: username={user_from_db.username}, is_staff={user_from_db.is_staff}, is_superuser={user_from_db.is_superuser}")
-                
-                tg_user = TelegramUser.objects.create(
-                    user=user,
-                    telegram_id=telegram_user.id,
-                    username=telegram_user.username,
-                    first_name=telegram_user.first_name,
-                    last_name=telegram_user.last_name,
-                    is_active=True
-                )
-                return tg_user
-        
-        return await create_or_activate_user()
+        return await data.register_user(telegram_user)
     
     async def _get_booking_stats(self) -> str:
-        from asgiref.sync import sync_to_async
-        
-        @sync_to_async
-        def get_stats():
-            today = datetime.now().date()
-            week_ago = today - timedelta(days=7)
-            
-            total_bookings = Booking.objects.count()
-            pending_bookings = Booking.objects.filter(status=BookingStatus.PENDING).count()
-            confirmed_bookings = Booking.objects.filter(status=BookingStatus.CONFIRMED).count()
-            recent_bookings = Booking.objects.filter(created_at__gte=week_ago).count()
-            
-            return f"""
+        stats = await data.booking_stats()
+        return f"""
 📊 **Статистика бронирований**
 
 📅 **Общая статистика:**
-• Всего бронирований: {total_bookings}
-• Ожидают подтверждения: {pending_bookings}
-• Подтверждены: {confirmed_bookings}
+• Всего бронирований: {stats['total']}
+• Ожидают подтверждения: {stats['pending']}
+• Подтверждены: {stats['confirmed']}
+
+🏠 **Загрузка:**
+• Занято коттеджей сегодня: {stats['occupied_today']}
+• Продано ночей с начала месяца: {stats['month_nights']}
+• Выручка с начала месяца: {stats['month_revenue']:,.0f} ₽
 
 📈 **За последнюю неделю:**
-• Новых бронирований: {recent_bookings}
+• Новых бронирований: {stats['recent']}
 
 🕐 Обновлено: {datetime.now().strftime('%d.%m.%Y %H:%M')}
-            """
-        
-        return await get_stats()
-    
-    async def _get_recent_bookings(self) -> str:
-        from asgiref.sync import sync_to_async
-        
-        @sync_to_async
-        def get_bookings():
-            recent_bookings = Booking.objects.select_related('user', 'cottage').order_by('-created_at')[:10]
-            
-            if not recent_bookings:
-                return "📋 **Последние бронирования**\n\nНет активных бронирований."
-            
-            bookings_text = "📋 **Последние бронирования:**\n\n"
-            
-            for booking in recent_bookings:
-                status_emoji = {
-                    BookingStatus.PENDING: "⏳",
-                    BookingStatus.CONFIRMED: "✅",
-                    BookingStatus.CANCELLED: "❌",
-                    BookingStatus.COMPLETED: "🏁"
-                }.get(booking.status, "❓")
-                
-                bookings_text += f"""
-{status_emoji} **{booking.cottage.name}**
-👤 {booking.user.get_full_name() or booking.user.email}
-📅 {booking.check_in} - {booking.check_out} ({booking.nights} ночей)
-👥 {booking.guests} гостей
-💰 {booking.total_price} ₽
-📝 Статус: {booking.get_status_display()}
----
-                """
-            
-            return bookings_text
-        
-        return await get_bookings()
+        """
     
     async def send_booking_notification(self, booking: Booking, notification_type: str = "new"):
-        from asgiref.sync import sync_to_async
-        
         logger.info(f"Starting notification send: {notification_type}")
         
-        @sync_to_async
-        def get_active_users():
-            users = list(TelegramUser.objects.filter(is_active=True))
-            logger.info(f"Found active users: {len(users)}")
-            return users
+        recipients = await anotification_recipients()
         
-        active_users = await get_active_users()
-        
-        if not active_users:
+        if not recipients:
             logger.warning("No active users for notifications")
             return
         
@@ -320,28 +248,27 @@ class CottageBookingBot:
         logger.debug(f"Message to send:\n{message[:100]}...")
         
         sent_count = 0
-        for tg_user in active_users:
+        for telegram_id in recipients:
             try:
-                logger.debug(f"Sending message to user {tg_user.telegram_id}")
+                logger.debug(f"Sending message to user {telegram_id}")
                 await self.application.bot.send_message(
-                    chat_id=tg_user.telegram_id,
+                    chat_id=telegram_id,
                     text=message,
                     parse_mode='Markdown'
                 )
                 sent_count += 1
-                logger.info(f"Message sent to user {tg_user.telegram_id}")
+                logger.info(f"Message sent to user {telegram_id}")
             except Exception as e:
-                logger.error(f"Error sending message to user {tg_user.telegram_id}: {e}")
-                logger.error(f"Error sending message to user {tg_user.telegram_id}: {e}")
+                logger.error(f"Error sending message to user {telegram_id}: {e}")
         
-        logger.info(f"Sent {sent_count} of {len(active_users)} notifications")
+        logger.info(f"Sent {sent_count} of {len(recipients)} notifications")
     
     def _format_new_booking_message(self, booking: Booking) -> str:
         return f"""
 🆕 **Новое бронирование!**
 
-👤 **Клиент:** {booking.user.get_full_name() or booking.user.email}
-📞 **Телефон:** {booking.user.phone or 'Не указан'}
+👤 **Клиент:** {booking.client_name}
+📞 **Телефон:** {booking.client_phone or 'Не указан'}
 🏠 **Коттедж:** {booking.cottage.name}
 📅 **Даты:** {booking.check_in} - {booking.check_out} ({booking.nights} ночей)
 👥 **Гости:** {booking.guests} человек
@@ -357,7 +284,7 @@ class CottageBookingBot:
 🔄 **Изменение статуса бронирования**
 
 🏠 **Коттедж:** {booking.cottage.name}
-👤 **Клиент:** {booking.user.get_full_name() or booking.user.email}
+👤 **Клиент:** {booking.client_name}
 📅 **Даты:** {booking.check_in} - {booking.check_out}
 
 📝 **Новый статус:** {booking.get_status_display()}
@@ -365,7 +292,7 @@ class CottageBookingBot:
     
     def _format_cancelled_booking_message(self, booking: Booking) -> str:
         cottage_name = getattr(booking.cottage, 'name', 'Неизвестный коттедж')
-        user_name = getattr(booking.user, 'get_full_name', lambda: None)() or getattr(booking.user, 'email', 'Неизвестный пользователь')
+        user_name = booking.client_name
         
         return f"""
 ❌ **Отмена бронирования**
@@ -378,6 +305,7 @@ class CottageBookingBot:
     def run(self):
         """Запускает бота"""
         logger.info("Starting Telegram bot...")
+        start_metrics_server(settings.METRICS_PORT)
         self.application.run_polling()
 
 
@@ -394,14 +322,9 @@ def get_bot():
 async def send_callback_notification(callback_request):
     try:
         # Получаем активных пользователей с правами персонала
-        active_users = await sync_to_async(list)(
-            TelegramUser.objects.filter(
-                is_active=True,
-                user__is_staff=True
-            ).select_related('user')
-        )
+        recipients = await anotification_recipients()
         
-        if not active_users:
+        if not recipients:
             logger.warning("No active staff users found for callback notification")
             return False
         
@@ -410,17 +333,17 @@ async def send_callback_notification(callback_request):
         bot = get_bot()
         
         sent_count = 0
-        for telegram_user in active_users:
+        for telegram_id in recipients:
             try:
                 await bot.application.bot.send_message(
-                    chat_id=telegram_user.telegram_id,
+                    chat_id=telegram_id,
                     text=message,
                     parse_mode='HTML'
                 )
                 sent_count += 1
-                logger.info(f"Callback notification sent to user {telegram_user.telegram_id}")
+                logger.info(f"Callback notification sent to user {telegram_id}")
             except Exception as e:
-                logger.error(f"Failed to send callback notification to {telegram_user.telegram_id}: {e}")
+                logger.error(f"Failed to send callback notification to {telegram_id}: {e}")
         
         logger.info(f"Sent {sent_count} callback notifications")
         return sent_count > 0
@@ -0,0 +1,204 @@
+"""
+Доступ Telegram-бота к БД.
+
+sync_to_async по умолчанию (thread_sensitive=True) выполняет весь ORM бота
+в одном потоке: медленный запрос одного чата задерживает команды всех
+остальных. Здесь ORM-функции выполняются в ограниченном пуле потоков
+(TELEGRAM_BOT_DB_THREADS): у каждого потока свое соединение, поэтому
+размер пула — это и максимум соединений бота с БД.
+
+Функции слоя возвращают простые данные; форматирование — в bot.py.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.bookings import occupancy
+from apps.bookings.cache import bookings_cache, bookings_namespace
+from apps.bookings.models import Booking, BookingNight, BookingStatus
+from apps.core.db.routers import read_replica
+
+from .booking_pages import NEXT, PAGE_SIZE, decode_cursor, encode_cursor
+from .models import TelegramUser
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.TELEGRAM_BOT_DB_THREADS,
+    thread_name_prefix='telegram-bot-db',
+)
+
+
+def _call(func, args, kwargs):
+    # Вне HTTP-запроса некому закрывать устаревшие и сломанные соединения
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_db(func, *args, **kwargs):
+    """Выполняет синхронную ORM-функцию в пуле бота, не блокируя event loop."""
+    return await sync_to_async(_call, thread_sensitive=False, executor=_executor)(func, args, kwargs)
+
+
+@read_replica
+def _booking_stats():
+    today = timezone.localdate()
+    week_ago = timezone.now().date() - timedelta(days=7)
+    # Занятость и выручка — по таблице ночей (индекс по дате)
+    month = BookingNight.objects.filter(
+        date__gte=today.replace(day=1), date__lte=today, status__in=occupancy.SOLD_STATUSES
+    ).aggregate(nights=Count('id'), revenue=Sum('revenue'))
+    return {
+        'total': Booking.objects.count(),
+        'pending': Booking.objects.filter(status=BookingStatus.PENDING).count(),
+        'confirmed': Booking.objects.filter(status=BookingStatus.CONFIRMED).count(),
+        'recent': Booking.objects.filter(created_at__gte=week_ago).count(),
+        'occupied_today': BookingNight.objects.filter(
+            date=today, status__in=occupancy.ACTIVE_STATUSES
+        ).values('cottage_id').distinct().count(),
+        'month_nights': month['nights'],
+        'month_revenue': month['revenue'] or 0,
+    }
+
+
+def _booking_page(filters, cursor, direction, size):
+    """
+    Страница бронирований после (NEXT) или перед (PREV) курсором.
+
+    Один запрос: size + 1 строк по индексу (..., created_at, id), лишняя
+    строка лишь говорит, есть ли следующая страница. Читается с primary:
+    страница кладется в общий кэш под текущим поколением, и отстающая
+    реплика закрепила бы в нем данные до изменения.
+    """
+    queryset = Booking.objects.select_related('user', 'cottage')
+    if filters.status:
+        queryset = queryset.filter(status=filters.status)
+    if filters.cottage_id:
+        queryset = queryset.filter(cottage_id=filters.cottage_id)
+    if filters.on_date:
+        queryset = queryset.filter(check_in__lte=filters.on_date, check_out__gt=filters.on_date)
+
+    key = decode_cursor(cursor)
+    if key is not None:
+        created_at, booking_id = key
+        if direction == NEXT:
+            queryset = queryset.filter(
+                Q(created_at__lte=created_at) & (Q(created_at__lt=created_at) | Q(id__lt=booking_id))
+            )
+        else:
+            queryset = queryset.filter(
+                Q(created_at__gte=created_at) & (Q(created_at__gt=created_at) | Q(id__gt=booking_id))
+            )
+
+    ordering = ('-created_at', '-id') if direction == NEXT else ('created_at', 'id')
+    bookings = list(queryset.order_by(*ordering)[:size + 1])
+    has_more = len(bookings) > size
+    bookings = bookings[:size]
+    if direction == NEXT:
+        has_next, has_prev = has_more, key is not None
+    else:
+        bookings.reverse()
+        has_next, has_prev = True, has_more
+
+    return {
+        'rows': [_booking_row(booking) for booking in bookings],
+        'has_next': has_next,
+        'has_prev': has_prev,
+    }
+
+
+def _booking_row(booking):
+    # Простые данные: страница кэшируется в Redis (JSON)
+    return {
+        'id': booking.id,
+        'cottage': booking.cottage.name,
+        'client': booking.client_name,
+        'check_in': booking.check_in.isoformat(),
+        'check_out': booking.check_out.isoformat(),
+        'nights': booking.nights,
+        'guests': booking.guests,
+        'total_price': str(booking.total_price),
+        'status': booking.status,
+        'status_display': str(booking.get_status_display()),
+        'cursor': encode_cursor(booking.created_at, booking.id),
+    }
+
+
+def _register_user(telegram_id, username, first_name, last_name):
+    try:
+        tg_user = TelegramUser.objects.get(telegram_id=telegram_id)
+        logger.debug(f"Activating existing TelegramUser {telegram_id}")
+        # Лишнее сохранение сбросило бы реестр персонала во всех процессах
+        if not tg_user.is_active:
+            tg_user.is_active = True
+            tg_user.save()
+        return tg_user
+    except TelegramUser.DoesNotExist:
+        logger.debug(f"Creating new TelegramUser {telegram_id} WITHOUT staff privileges")
+        user = User.objects.create(
+            username=f"tg_{telegram_id}",
+            email=f"tg_{telegram_id}@example.com",
+            first_name=first_name or '',
+            last_name=last_name or '',
+            is_staff=False,
+            is_superuser=False,
+            is_active=True
+        )
+        return TelegramUser.objects.create(
+            user=user,
+            telegram_id=telegram_id,
+            username=username,
+            first_name=first_name,
+            last_name=last_name,
+            is_active=True
+        )
+
+
+def _unsubscribe(telegram_id):
+    tg_user = TelegramUser.objects.filter(telegram_id=telegram_id).first()
+    if tg_user is None:
+        return False
+    if tg_user.is_active:
+        tg_user.is_active = False
+        tg_user.save()
+    return True
+
+
+async def booking_stats():
+    return await run_db(_booking_stats)
+
+
+async def booking_page(filters, cursor='', direction=NEXT):
+    """Страница бронирований; кэш сбрасывается поколением при изменении любой брони."""
+    key = await bookings_namespace.akey('bot', filters.pack(), cursor or '-', direction)
+
+    async def compute():
+        return await run_db(_booking_page, filters, cursor, direction, PAGE_SIZE)
+
+    return await bookings_cache.aget_or_compute(key, compute, settings.TELEGRAM_BOOKING_PAGE_TIMEOUT)
+
+
+async def register_user(telegram_user):
+    return await run_db(
+        _register_user,
+        telegram_user.id,
+        telegram_user.username,
+        telegram_user.first_name,
+        telegram_user.last_name,
+    )
+
+
+async def unsubscribe(telegram_id):
+    return await run_db(_unsubscribe, telegram_id)
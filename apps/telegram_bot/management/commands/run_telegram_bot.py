@@ -1,13 +1,43 @@
-from django.core.management.base import BaseCommand
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from telegram import Update
+
 from apps.telegram_bot.bot import get_bot
 
 
 class Command(BaseCommand):
+    help = 'Запускает Telegram-бота (long polling) или управляет его webhook'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--set-webhook',
+            metavar='URL',
+            help='Зарегистрировать webhook (https://<домен>/telegram/webhook/) и выйти',
+        )
+        parser.add_argument(
+            '--delete-webhook',
+            action='store_true',
+            help='Удалить webhook, чтобы вернуться к long polling',
+        )
+
     def handle(self, *args, **options):
+        if options['set_webhook']:
+            if not settings.TELEGRAM_WEBHOOK_SECRET:
+                raise CommandError('TELEGRAM_WEBHOOK_SECRET не настроен')
+            asyncio.run(self._set_webhook(options['set_webhook']))
+            self.stdout.write(self.style.SUCCESS(f"Webhook зарегистрирован: {options['set_webhook']}"))
+            return
+        if options['delete_webhook']:
+            asyncio.run(self._delete_webhook())
+            self.stdout.write(self.style.SUCCESS('Webhook удален'))
+            return
+
         self.stdout.write(
             self.style.SUCCESS('Запуск Telegram бота...')
         )
-        
+
         try:
             bot = get_bot()
             bot.run()
@@ -19,3 +49,15 @@ class Command(BaseCommand):
             self.stdout.write(
                 self.style.ERROR(f'Ошибка запуска бота: {e}')
             )
+
+    async def _set_webhook(self, url):
+        async with get_bot().application.bot as bot:
+            await bot.set_webhook(
+                url=url,
+                secret_token=settings.TELEGRAM_WEBHOOK_SECRET,
+                allowed_updates=Update.ALL_TYPES,
+            )
+
+    async def _delete_webhook(self):
+        async with get_bot().application.bot as bot:
+            await bot.delete_webhook()
@@ -0,0 +1,72 @@
+"""
+Реестр персонала Telegram-бота.
+
+Список Telegram-аккаунтов персонала загружается одним запросом и живет
+в L1 каждого процесса (бот, воркеры Celery) и в Redis. Сигналы сохранения
+TelegramUser/User сбрасывают его через pub/sub TieredCache, так что
+проверки прав и рассылки не ходят в БД на каждую команду и сообщение.
+"""
+from django.conf import settings
+from django.db.models import F, Q
+
+from apps.core.cache import TieredCache
+
+from .data import run_db
+
+STAFF_KEY = 'telegram_staff:members'
+
+staff_cache = TieredCache('telegram_staff', max_entries=1, timeout=settings.TELEGRAM_STAFF_REGISTRY_TIMEOUT)
+
+
+def _load_members():
+    from .models import TelegramUser
+
+    return list(
+        TelegramUser.objects.filter(Q(user__is_staff=True) | Q(user__is_superuser=True))
+        .values('telegram_id', 'is_active', is_staff=F('user__is_staff'))
+    )
+
+
+def get_staff_members():
+    return staff_cache.get_or_compute(
+        STAFF_KEY, _load_members, settings.TELEGRAM_STAFF_REGISTRY_TIMEOUT
+    )
+
+
+async def aget_staff_members():
+    async def load():
+        return await run_db(_load_members)
+
+    return await staff_cache.aget_or_compute(STAFF_KEY, load, settings.TELEGRAM_STAFF_REGISTRY_TIMEOUT)
+
+
+def _is_staff(members, telegram_id):
+    return any(member['telegram_id'] == telegram_id for member in members)
+
+
+def _recipients(members):
+    # Уведомления получают подписанные (is_active) сотрудники с is_staff
+    return [
+        member['telegram_id'] for member in members
+        if member['is_active'] and member['is_staff']
+    ]
+
+
+def is_staff_member(telegram_id):
+    return _is_staff(get_staff_members(), telegram_id)
+
+
+async def ais_staff_member(telegram_id):
+    return _is_staff(await aget_staff_members(), telegram_id)
+
+
+def notification_recipients():
+    return _recipients(get_staff_members())
+
+
+async def anotification_recipients():
+    return _recipients(await aget_staff_members())
+
+
+def invalidate_staff_registry():
+    staff_cache.delete(STAFF_KEY)
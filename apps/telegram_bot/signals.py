@@ -1,7 +1,11 @@
 import logging
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from apps.bookings.models import Booking, BookingStatus
+from apps.users.models import User
+from .models import TelegramUser
+from .registry import invalidate_staff_registry
 
 logger = logging.getLogger(__name__)
 
@@ -21,4 +25,20 @@ def booking_deleted(sender, instance, **kwargs):
     """Отправляет уведомление при удалении бронирования"""
     # Отключено: уведомления теперь отправляются через Celery
     logger.debug(f"Booking {instance.id} deleted, notifications handled by Celery")
-    return
\ No newline at end of file
+    return
+
+
+@receiver(post_save, sender=TelegramUser)
+@receiver(post_delete, sender=TelegramUser)
+def telegram_user_changed(sender, instance, **kwargs):
+    # После коммита: иначе другой процесс успеет перечитать старые данные
+    transaction.on_commit(invalidate_staff_registry)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # Вход в систему обновляет только last_login — реестр не меняется
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    transaction.on_commit(invalidate_staff_registry)
@@ -0,0 +1,79 @@
+"""
+Подмена Telegram Bot API для тестов и нагрузочных прогонов бота.
+
+FakeTelegramRequest отвечает на вызовы API без сети, с настраиваемой
+задержкой, и записывает их — можно проверить, что и кому бот отправил.
+"""
+import asyncio
+import json
+import time
+
+from telegram.request import BaseRequest
+
+BOT_USER = {
+    'id': 100000,
+    'is_bot': True,
+    'first_name': 'Cottage Booking',
+    'username': 'cottage_booking_bot',
+}
+
+
+class FakeTelegramRequest(BaseRequest):
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = []
+        self._message_id = 0
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        endpoint = url.rsplit('/', 1)[-1]
+        parameters = request_data.parameters if request_data else {}
+        self.calls.append((endpoint, parameters, time.perf_counter()))
+        return 200, json.dumps({'ok': True, 'result': self._result(endpoint, parameters)}).encode()
+
+    def _result(self, endpoint, parameters):
+        if endpoint == 'getMe':
+            return BOT_USER
+        if endpoint in ('sendMessage', 'editMessageText'):
+            self._message_id += 1
+            return {
+                'message_id': self._message_id,
+                'date': int(time.time()),
+                'chat': {'id': int(parameters.get('chat_id', 0)), 'type': 'private'},
+                'text': parameters.get('text', ''),
+            }
+        return True
+
+    def sent_messages(self):
+        return [
+            (int(parameters['chat_id']), parameters['text'])
+            for endpoint, parameters, _ in self.calls
+            if endpoint == 'sendMessage'
+        ]
+
+
+def command_update(update_id, chat_id, command):
+    """JSON апдейта с командой в личном чате, как его присылает Telegram."""
+    user = {'id': chat_id, 'is_bot': False, 'first_name': f'User {chat_id}'}
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private', 'first_name': user['first_name']},
+            'from': user,
+            'text': command,
+            'entities': [{'offset': 0, 'length': len(command.split()[0]), 'type': 'bot_command'}],
+        },
+    }
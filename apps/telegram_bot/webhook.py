@@ -0,0 +1,121 @@
+"""
+Прием апдейтов Telegram через webhook внутри ASGI-приложения.
+
+Вместо отдельного процесса с long polling Telegram сам присылает апдейты
+на TELEGRAM_WEBHOOK_PATH. Маршрут проверяет секрет из заголовка
+X-Telegram-Bot-Api-Secret-Token, отбрасывает повторы по update_id (Redis)
+и кладет апдейт в update_queue приложения бота, не дожидаясь обработки.
+Обработчики работают в том же event loop, что и воркер uvicorn.
+
+Регистрация webhook: ``python manage.py run_telegram_bot --set-webhook <url>``.
+"""
+import asyncio
+import hmac
+import json
+import logging
+
+from django.conf import settings
+from telegram import Update
+
+from apps.core.cache import aclaim_key
+
+from .bot import get_bot
+
+logger = logging.getLogger(__name__)
+
+UPDATE_KEY = 'telegram:update:{}'
+SECRET_HEADER = b'x-telegram-bot-api-secret-token'
+MAX_BODY_SIZE = 1024 * 1024
+
+_start_lock = asyncio.Lock()
+
+
+async def _respond(send, status, body=b''):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _read_body(receive):
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_SIZE:
+            return None
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def ensure_application_running(application):
+    # Приложение бота поднимается в воркере при первом апдейте
+    if application.running:
+        return
+    async with _start_lock:
+        if not application.running:
+            await application.initialize()
+            await application.start()
+
+
+async def stop_application():
+    from . import bot
+
+    application = bot.bot_instance.application if bot.bot_instance else None
+    if application is not None and application.running:
+        await application.stop()
+        await application.shutdown()
+
+
+def _secret_matches(scope):
+    # Байты: compare_digest падает на str с не-ASCII символами
+    received = dict(scope['headers']).get(SECRET_HEADER, b'')
+    return hmac.compare_digest(received, settings.TELEGRAM_WEBHOOK_SECRET.encode())
+
+
+async def telegram_webhook(scope, receive, send):
+    if not settings.TELEGRAM_WEBHOOK_SECRET:
+        return await _respond(send, 404)
+    if scope['method'] != 'POST':
+        return await _respond(send, 405)
+    if not _secret_matches(scope):
+        logger.warning("Telegram webhook: неверный секретный токен")
+        return await _respond(send, 403)
+
+    body = await _read_body(receive)
+    try:
+        payload = json.loads(body)
+        update_id = int(payload['update_id'])
+    except (TypeError, ValueError, KeyError):
+        return await _respond(send, 400)
+
+    application = get_bot().application
+    # Сначала поднимаем приложение: если это не удалось, Telegram повторит
+    # апдейт, и он не должен быть уже отмечен как принятый
+    await ensure_application_running(application)
+
+    if await aclaim_key(UPDATE_KEY.format(update_id), settings.TELEGRAM_UPDATE_DEDUP_TIMEOUT):
+        await application.update_queue.put(Update.de_json(payload, application.bot))
+    else:
+        logger.info(f"Telegram webhook: повтор апдейта {update_id} пропущен")
+    return await _respond(send, 200)
+
+
+async def telegram_lifespan(scope, receive, send):
+    """Останавливает приложение бота вместе с воркером, дообработав очередь."""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            try:
+                await stop_application()
+            except Exception as e:
+                logger.error(f"Ошибка остановки Telegram-бота: {e}")
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
@@ -1,8 +1,10 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db.models import Count
 from django.utils.html import format_html
 from django.urls import reverse
 from .models import User
+from .phones import looks_like_phone, normalize_phone
 from apps.bookings.models import Booking
 
 
@@ -19,6 +21,9 @@ class BookingInline(admin.TabularInline):
     ]
     ordering = ['-created_at']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('cottage')
+
     def has_add_permission(self, request, obj=None):
         return False
 
@@ -26,8 +31,22 @@ class BookingInline(admin.TabularInline):
         return False
 
 
+class PhoneSearchMixin:
+    """
+    Поиск по номеру телефона в любом формате: если запрос распознается
+    как телефон, ищем точным совпадением по индексу phone_normalized
+    вместо icontains по всем полям.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        phone = normalize_phone(search_term) if looks_like_phone(search_term) else None
+        if phone:
+            return queryset.filter(phone_normalized=phone), False
+        return super().get_search_results(request, queryset, search_term)
+
+
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(PhoneSearchMixin, BaseUserAdmin):
     list_display = [
         'email', 'username', 'full_name',
         'phone', 'is_verified', 'is_active', 'is_staff',
@@ -86,17 +105,19 @@ class UserAdmin(BaseUserAdmin):
     readonly_fields = ['date_joined', 'last_login']
 
     def bookings_count(self, obj):
-        count = obj.bookings.count()
+        count = obj.bookings_total
         if count > 0:
             url = reverse('admin:bookings_booking_changelist') + \
                 f'?user__id__exact={obj.id}'
             return format_html('<a href="{}">{} бронирований</a>', url, count)
         return '0 бронирований'
     bookings_count.short_description = 'Бронирования'
-    bookings_count.admin_order_field = 'bookings__count'
+    bookings_count.admin_order_field = 'bookings_total'
 
     def get_queryset(self, request):
-        return super().get_queryset(request).prefetch_related('bookings')
+        return super().get_queryset(request).annotate(
+            bookings_total=Count('bookings')
+        )
 
     actions = [
         'verify_users', 'unverify_users', 'activate_users', 'deactivate_users'
@@ -0,0 +1,76 @@
+"""
+Поиск клиента по телефону и email.
+
+Единая точка для быстрого бронирования оператором, заявок на звонок и
+поиска в админке: телефон сравнивается в E.164 по индексу
+phone_normalized, а не по сырому вводу.
+"""
+from django.db.models import Q
+
+from .models import User
+from .phones import normalize_phone
+
+
+def find_customer(phone=None, email=None):
+    """
+    Клиент с этим телефоном, иначе с этим email; одним запросом.
+    Из нескольких совпадений по телефону берется самый новый аккаунт.
+    """
+    phone = normalize_phone(phone)
+    condition = Q()
+    if phone:
+        condition |= Q(phone_normalized=phone)
+    if email:
+        condition |= Q(email__iexact=email)
+    if not condition:
+        return None
+
+    candidates = list(User.objects.filter(condition).order_by('-date_joined')[:10])
+    for user in candidates:
+        if phone and user.phone_normalized == phone:
+            return user
+    return candidates[0] if candidates else None
+
+
+def customers_by_phone(phones):
+    """{E.164: клиент} для списка номеров — одним запросом."""
+    normalized = {normalize_phone(phone) for phone in phones} - {None}
+    if not normalized:
+        return {}
+    customers = {}
+    # Самый новый аккаунт перекрывает старые с тем же номером
+    for user in User.objects.filter(phone_normalized__in=normalized).order_by('date_joined'):
+        customers[user.phone_normalized] = user
+    return customers
+
+
+def resolve_customer(first_name, last_name, phone, email=''):
+    """
+    Находит клиента (find_customer) и обновляет его данные либо создает нового.
+    Телефон сохраняется в E.164.
+    """
+    normalized = normalize_phone(phone)
+    if normalized is None:
+        raise ValueError(f"Не удалось распознать номер телефона: {phone}")
+
+    user = find_customer(normalized, email)
+    if user is None:
+        username = f"client_{normalized[1:]}"
+        return User.objects.create(
+            username=username,
+            first_name=first_name,
+            last_name=last_name,
+            email=email or f"{username}@example.com",
+            phone=normalized,
+        )
+
+    user.first_name = first_name
+    user.last_name = last_name
+    if user.phone_normalized != normalized:
+        user.phone = normalized
+    if email and user.email.lower() != email.lower():
+        # Email уникален: чужой адрес не присваиваем
+        if not User.objects.filter(email__iexact=email).exists():
+            user.email = email
+    user.save()
+    return user
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+
+from apps.leads.models import CallbackRequest
+from apps.users.models import User
+from apps.users.phones import normalize_phone
+
+MODELS = {
+    'users': User,
+    'leads': CallbackRequest,
+}
+
+
+class Command(BaseCommand):
+    help = 'Заполняет phone_normalized (E.164) у существующих пользователей и заявок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько строк читать и обновлять за раз',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать, ничего не записывая',
+        )
+
+    def handle(self, *args, **options):
+        for label, model in MODELS.items():
+            updated, unparsed = self._backfill(model, options['batch_size'], options['dry_run'])
+            self.stdout.write(
+                f"{label}: обновлено {updated}, не распознано {unparsed}"
+            )
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Пробный запуск: изменения не сохранены'))
+
+    def _backfill(self, model, batch_size, dry_run):
+        updated = unparsed = 0
+        last_id = 0
+        # Keyset по id: без OFFSET и без одной длинной транзакции на всю таблицу
+        while True:
+            batch = list(
+                model.objects.filter(id__gt=last_id)
+                .exclude(phone__isnull=True).exclude(phone='')
+                .order_by('id').only('id', 'phone', 'phone_normalized')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            changed = []
+            for obj in batch:
+                normalized = normalize_phone(obj.phone)
+                if normalized is None:
+                    unparsed += 1
+                if obj.phone_normalized != normalized:
+                    obj.phone_normalized = normalized
+                    changed.append(obj)
+            # bulk_update не вызывает save() и сигналы (реестр персонала не сбрасывается)
+            if changed and not dry_run:
+                model.objects.bulk_update(changed, ['phone_normalized'])
+            updated += len(changed)
+        return updated, unparsed
@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from .phones import normalize_phone
+
 
 class User(AbstractUser):    
     email = models.EmailField(unique=True)
@@ -8,6 +10,10 @@ class User(AbstractUser):
     last_name = models.CharField(max_length=150, blank=True)
     middle_name = models.CharField(max_length=150, blank=True, verbose_name='Отчество')
     phone = models.CharField(max_length=20, blank=True, null=True)
+    phone_normalized = models.CharField(
+        max_length=16, blank=True, null=True, db_index=True, editable=False,
+        verbose_name='Телефон (E.164)'
+    )
     date_of_birth = models.DateField(blank=True, null=True)
     is_verified = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -23,6 +29,13 @@ class User(AbstractUser):
     def __str__(self):
         return self.email
     
+    def save(self, *args, **kwargs):
+        self.phone_normalized = normalize_phone(self.phone)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'phone_normalized'}
+        super().save(*args, **kwargs)
+    
     @property
     def full_name(self):
         full_name = f"{self.last_name} {self.first_name}"
@@ -0,0 +1,42 @@
+"""
+Нормализация телефонов в E.164 (+79161234567).
+
+Операторы и клиенты вводят номера как угодно: «8 (916) 123-45-67»,
+«+7 916 1234567», «9161234567». Для поиска хранится нормализованная
+копия в индексируемом поле phone_normalized; исходный ввод не меняется.
+"""
+import re
+
+from django.conf import settings
+
+_NOT_DIGITS = re.compile(r'\D')
+_PHONE_LIKE = re.compile(r'^\+?[\d\s()\-]+$')
+
+
+def normalize_phone(value):
+    """E.164-строка или None, если номер не распознан."""
+    if not value:
+        return None
+    value = str(value).strip()
+    digits = _NOT_DIGITS.sub('', value)
+    country = settings.PHONE_DEFAULT_COUNTRY_CODE
+
+    if value.startswith('+'):
+        pass
+    elif value.startswith('00'):
+        digits = digits[2:]
+    elif len(digits) == 10:
+        digits = country + digits
+    elif len(digits) == 11 and country == '7' and digits[0] == '8':
+        # Российский междугородний формат 8XXXXXXXXXX
+        digits = country + digits[1:]
+
+    # E.164: до 15 цифр; короче 10 — не номер абонента
+    if not 10 <= len(digits) <= 15 or digits[0] == '0':
+        return None
+    return f'+{digits}'
+
+
+def looks_like_phone(value):
+    """Строка из одних цифр и символов оформления номера."""
+    return bool(value and _PHONE_LIKE.match(value.strip()))
@@ -0,0 +1,112 @@
+"""Микробенчмарки горячих путей (см. benchmarks/conftest.py)."""
+from datetime import date, timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory
+
+from apps.bookings.forms import BookingForm
+from apps.bookings.models import Booking
+from apps.bookings.serializers import BookingSerializer
+from apps.bookings.views import BookingCreateView, BookingDetailView
+from apps.cottages import cache as catalog_cache_keys
+from apps.cottages.models import Cottage
+from apps.cottages.serializers import CottageSerializer
+from apps.operator.views import generate_availability_calendar, get_cottage_availability
+
+from .datasets import SIZES, build_catalog, size_id
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(params=SIZES, ids=size_id)
+def catalog(request):
+    user, cottages = build_catalog(*request.param)
+    user.is_staff = True
+    user.save()
+    return user, cottages
+
+
+def _busiest(cottages):
+    return max(cottages, key=lambda c: c.bookings.count())
+
+
+@pytest.mark.parametrize('variant', ['create_view', 'detail_view', 'operator_api'])
+def test_get_booked_dates(bench, catalog, variant):
+    user, cottages = catalog
+    cottage = _busiest(cottages)
+
+    if variant == 'create_view':
+        bench(BookingCreateView().get_booked_dates, cottage.id)
+    elif variant == 'detail_view':
+        bench(BookingDetailView().get_booked_dates, cottage.id, 0)
+    else:
+        request = RequestFactory().get(f'/operator/api/cottage/{cottage.id}/availability/')
+        request.user = user
+        bench(async_to_sync(get_cottage_availability), request, cottage.id)
+
+
+def test_generate_availability_calendar(bench, catalog):
+    _, cottages = catalog
+    bench(generate_availability_calendar, _busiest(cottages))
+
+
+def test_cottage_serializer_many(bench, catalog):
+    def serialize():
+        queryset = Cottage.objects.filter(is_active=True).prefetch_related(
+            'images', 'amenities__amenity'
+        )
+        return CottageSerializer(queryset, many=True).data
+
+    bench(serialize)
+
+
+def test_booking_serializer_many(bench, catalog):
+    def serialize():
+        queryset = Booking.objects.select_related('cottage').prefetch_related(
+            'cottage__images', 'cottage__amenities__amenity'
+        )[:200]
+        return BookingSerializer(queryset, many=True).data
+
+    bench(serialize)
+
+
+def test_booking_form_clean(bench, catalog):
+    user, cottages = catalog
+    cottage = _busiest(cottages)
+    check_in = date.today() + timedelta(days=10)
+    data = {
+        'check_in': check_in.isoformat(),
+        'check_out': (check_in + timedelta(days=3)).isoformat(),
+        'guests': 1,
+    }
+
+    def clean():
+        form = BookingForm(data=data, cottage=cottage, user=user)
+        form.is_valid()
+        return form
+
+    bench(clean)
+
+
+@pytest.mark.parametrize('builder', [
+    'cottages_list_cache_key',
+    'cottage_detail_cache_key',
+    'cottages_html_cache_key',
+    'cottage_detail_html_cache_key',
+])
+def test_cache_key_builders(bench, builder):
+    func = getattr(catalog_cache_keys, builder)
+    request = RequestFactory().get('/api/v1/cottages/', {'min_price': '3000', 'max_price': '9000'})
+    args = {
+        'cottages_list_cache_key': (request.GET,),
+        'cottage_detail_cache_key': (42,),
+        'cottages_html_cache_key': (3000.0, 9000.0, 'ru'),
+        'cottage_detail_html_cache_key': (42, 'ru'),
+    }[builder]
+
+    def build_many():
+        for _ in range(1000):
+            func(*args)
+
+    bench(build_many)
@@ -0,0 +1,136 @@
+"""
+Нагрузочный прогон Telegram-бота: одновременные апдейты от многих чатов.
+
+Бот работает без сети (FakeTelegramRequest с задержкой Bot API), апдейты
+идут через update_queue — тот же путь, что у webhook. Для каждого апдейта
+измеряется время до ответа бота; режимы:
+
+- serialized — как раньше: апдейты по одному, весь ORM в одном потоке;
+- concurrent — TELEGRAM_BOT_CONCURRENT_UPDATES и пул TELEGRAM_BOT_DB_THREADS.
+
+--slow-bookings-ms добавляет задержку в запрос /bookings, имитируя медленный
+запрос одного оператора, который не должен задерживать остальных:
+
+    python benchmarks/bot_concurrency.py --chats 50 --slow-bookings-ms 500
+
+Нужна БД проекта (как для http_concurrency.py). Проверка прав отключена:
+все чаты прогона считаются персоналом.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cottage_booking.settings')
+os.environ.setdefault('TELEGRAM_BOT_TOKEN', '123456:BENCHMARK')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from telegram import Update  # noqa: E402
+
+from apps.bookings.cache import bookings_namespace  # noqa: E402
+from apps.telegram_bot import data  # noqa: E402
+from apps.telegram_bot.bot import CottageBookingBot  # noqa: E402
+from apps.telegram_bot.testing import FakeTelegramRequest, command_update  # noqa: E402
+
+MODES = {
+    'serialized': {'concurrent_updates': 1, 'db_threads': 1},
+    'concurrent': {
+        'concurrent_updates': settings.TELEGRAM_BOT_CONCURRENT_UPDATES,
+        'db_threads': settings.TELEGRAM_BOT_DB_THREADS,
+    },
+}
+
+
+FIRST_CHAT_ID = 10_000
+
+
+async def allow_all(telegram_id):
+    return True
+
+
+def slow_down_bookings(delay):
+    original = data._booking_page
+
+    def slow(*args):
+        time.sleep(delay)
+        return original(*args)
+
+    data._booking_page = slow
+
+
+async def run_mode(mode, chats, latency):
+    settings.TELEGRAM_BOT_CONCURRENT_UPDATES = MODES[mode]['concurrent_updates']
+    data._executor = ThreadPoolExecutor(max_workers=MODES[mode]['db_threads'])
+    # Страница /bookings из кэша предыдущего режима не дошла бы до БД
+    bookings_namespace.bump()
+    request = FakeTelegramRequest(latency=latency)
+    bot = CottageBookingBot(request=request)
+    bot._is_staff_member = allow_all
+    application = bot.application
+
+    await application.initialize()
+    await application.start()
+    # Первым идет /bookings (медленный), затем /stats от остальных чатов
+    commands = ['/bookings'] + ['/stats'] * (chats - 1)
+    started = {}
+    for update_id, command in enumerate(commands, 1):
+        chat_id = FIRST_CHAT_ID + update_id
+        started[chat_id] = time.perf_counter()
+        await application.update_queue.put(
+            Update.de_json(command_update(update_id, chat_id, command), application.bot)
+        )
+
+    while len(request.sent_messages()) < len(commands):
+        await asyncio.sleep(0.01)
+    await application.stop()
+    await application.shutdown()
+
+    finished = {
+        int(parameters['chat_id']): at
+        for endpoint, parameters, at in request.calls if endpoint == 'sendMessage'
+    }
+    latencies = sorted(finished[chat_id] - started[chat_id] for chat_id in started)
+    total = max(finished.values()) - min(started.values())
+    return {
+        'updates': len(commands),
+        'total_s': round(total, 3),
+        'p50_ms': round(statistics.median(latencies) * 1000, 1),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+        'max_ms': round(latencies[-1] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chats', type=int, default=50)
+    parser.add_argument('--api-latency-ms', type=float, default=30, help='Задержка ответа Bot API')
+    parser.add_argument('--slow-bookings-ms', type=float, default=0)
+    parser.add_argument('--modes', default='serialized,concurrent')
+    parser.add_argument('--output', help='Сохранить результаты в JSON')
+    args = parser.parse_args()
+
+    if args.slow_bookings_ms:
+        slow_down_bookings(args.slow_bookings_ms / 1000)
+
+    results = {}
+    for mode in args.modes.split(','):
+        results[mode] = asyncio.run(run_mode(mode, args.chats, args.api_latency_ms / 1000))
+        print(f"{mode}: {results[mode]}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
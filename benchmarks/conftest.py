@@ -0,0 +1,190 @@
+"""
+Инфраструктура микробенчмарков горячих путей.
+
+Baseline записан на PostgreSQL (meta.db_vendor): сравнение на другой СУБД
+не проводится, а с --bench-compare прогон завершается ошибкой. Схема
+создается из моделей (--nomigrations), как в тестах. Медианы сравниваются
+с поправкой на скорость машины: перед каждым замером выполняется
+эталонная нагрузка, ее время тоже хранится в baseline.
+
+Запуск:
+    pytest benchmarks/bench_hot_paths.py --nomigrations --bench-output bench_results.json
+Сравнение с закоммиченным baseline (падает при регрессии):
+    pytest benchmarks/bench_hot_paths.py --nomigrations --bench-compare
+Обновление baseline — отдельным коммитом, в описании которого указаны
+изменения медиан и их причина:
+    pytest benchmarks/bench_hot_paths.py --nomigrations --bench-output benchmarks/baseline.json
+"""
+import json
+import platform
+import statistics
+import time
+from pathlib import Path
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'baseline.json'
+
+_results = {}
+_regressions = []
+_skipped = []
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmarks')
+    group.addoption(
+        '--bench-output', default=None,
+        help='Путь к JSON-файлу для сохранения результатов'
+    )
+    group.addoption(
+        '--bench-baseline', default=str(BASELINE_PATH),
+        help='Путь к baseline для сравнения'
+    )
+    group.addoption(
+        '--bench-tolerance', type=float, default=0.25,
+        help='Допустимое замедление медианы относительно baseline (0.25 = 25%%)'
+    )
+    group.addoption(
+        '--bench-rounds', type=int, default=7,
+        help='Количество замеров на один бенчмарк'
+    )
+    group.addoption(
+        '--bench-compare', action='store_true', default=False,
+        help='Завершать прогон с ошибкой при регрессии относительно baseline'
+    )
+
+
+class Benchmark:
+    def __init__(self, name, rounds):
+        self.name = name
+        self.rounds = rounds
+
+    def __call__(self, func, *args, **kwargs):
+        # Прогрев: первый вызов заполняет кэши Python/ORM и не учитывается
+        func(*args, **kwargs)
+
+        with CaptureQueriesContext(connection) as ctx:
+            func(*args, **kwargs)
+        queries = len(ctx.captured_queries)
+
+        timings = []
+        references = []
+        for _ in range(self.rounds):
+            references.append(_reference())
+            started = time.perf_counter()
+            func(*args, **kwargs)
+            timings.append(time.perf_counter() - started)
+
+        _results[self.name] = {
+            'median': statistics.median(timings),
+            'min': min(timings),
+            'max': max(timings),
+            'rounds': self.rounds,
+            'queries': queries,
+            'reference': statistics.median(references),
+        }
+        return _results[self.name]
+
+
+def _reference():
+    """Эталонная нагрузка на чистом Python: скорость машины рядом с замером."""
+    started = time.perf_counter()
+    data = {}
+    for i in range(20000):
+        data[f'key:{i % 500}'] = i * 2
+    sorted(data.items())
+    return time.perf_counter() - started
+
+
+@pytest.fixture
+def bench(request):
+    return Benchmark(request.node.name, request.config.getoption('--bench-rounds'))
+
+
+def _load_baseline(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _meta():
+    return {
+        'python': platform.python_version(),
+        'db_vendor': connection.vendor,
+    }
+
+
+def _compare(baseline, tolerance):
+    regressions = []
+    for name, current in sorted(_results.items()):
+        previous = baseline.get('results', {}).get(name)
+        if not previous:
+            continue
+        # Медиана baseline пересчитывается на скорость машины при замере:
+        # общий CPU (CI, виртуалки) замедляет весь прогон, а не код
+        speed = 1.0
+        if previous.get('reference') and current.get('reference'):
+            speed = current['reference'] / previous['reference']
+        expected = previous['median'] * speed
+        if current['median'] > expected * (1 + tolerance):
+            regressions.append(
+                f"{name}: медиана {current['median'] * 1000:.3f} мс "
+                f"> {expected * 1000:.3f} мс (+{tolerance:.0%}, "
+                f"скорость машины x{1 / speed:.2f} от baseline)"
+            )
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                f"{name}: запросов {current['queries']} > {previous['queries']}"
+            )
+    return regressions
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _results:
+        return
+    config = session.config
+
+    output = config.getoption('--bench-output')
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(
+                {'meta': _meta(), 'results': _results},
+                f, ensure_ascii=False, indent=2, sort_keys=True
+            )
+            f.write('\n')
+
+    path = config.getoption('--bench-baseline')
+    baseline = _load_baseline(path)
+    if baseline is None:
+        _skipped[:] = [f'baseline {path} не найден']
+    elif baseline.get('meta', {}).get('db_vendor') != connection.vendor:
+        _skipped[:] = [
+            f"baseline записан на {baseline.get('meta', {}).get('db_vendor')}, "
+            f"прогон на {connection.vendor}: сравнение не проводилось"
+        ]
+    else:
+        _regressions[:] = _compare(baseline, config.getoption('--bench-tolerance'))
+
+    if (_regressions or _skipped) and config.getoption('--bench-compare'):
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if not _results:
+        return
+    terminalreporter.section('benchmarks')
+    for name, result in sorted(_results.items()):
+        terminalreporter.write_line(
+            f"{name:<70} {result['median'] * 1000:>10.3f} мс  "
+            f"queries={result['queries']}"
+        )
+    for line in _skipped:
+        terminalreporter.write_line(line)
+    if _regressions:
+        terminalreporter.section('регрессии относительно baseline')
+        for line in _regressions:
+            terminalreporter.write_line(line)
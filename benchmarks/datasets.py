@@ -0,0 +1,90 @@
+"""Генераторы синтетических данных для бенчмарков."""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from apps.bookings import occupancy
+from apps.bookings.models import Booking, BookingStatus
+from apps.cottages.models import Amenity, Cottage, CottageAmenity, CottageImage
+from apps.users.models import User
+
+# (коттеджи, бронирования, горизонт в днях)
+SIZES = [
+    (5, 100, 90),
+    (20, 1000, 365),
+]
+
+
+def size_id(size):
+    cottages, bookings, horizon = size
+    return f'c{cottages}-b{bookings}-h{horizon}'
+
+
+def build_catalog(cottages, bookings, horizon, seed=42):
+    """Создает коттеджи с картинками и удобствами и бронирования на горизонте."""
+    rng = random.Random(seed)
+    today = date.today()
+
+    user = User.objects.create(
+        username='bench_user',
+        email='bench@example.com',
+        first_name='Иван',
+        last_name='Петров',
+        phone='+79990000000',
+    )
+
+    cottage_objs = Cottage.objects.bulk_create([
+        Cottage(
+            name=f'Коттедж {i}',
+            description='Уютный коттедж для бенчмарка ' * 5,
+            address=f'Лесная улица, {i}',
+            capacity=rng.randint(2, 12),
+            price_per_night=Decimal(rng.randint(30, 150) * 100),
+        )
+        for i in range(cottages)
+    ])
+
+    CottageImage.objects.bulk_create([
+        CottageImage(
+            cottage=cottage,
+            image=f'cottages/bench_{cottage.pk}_{order}.jpg',
+            is_primary=order == 1,
+            order=order,
+        )
+        for cottage in cottage_objs
+        for order in range(3)
+    ])
+
+    amenities = Amenity.objects.bulk_create([
+        Amenity(name=name, icon='fa-check')
+        for name in ('Wi-Fi', 'Баня', 'Мангал', 'Парковка', 'Камин')
+    ])
+    CottageAmenity.objects.bulk_create([
+        CottageAmenity(cottage=cottage, amenity=amenity)
+        for cottage in cottage_objs
+        for amenity in amenities
+    ])
+
+    statuses = [
+        BookingStatus.PENDING, BookingStatus.CONFIRMED,
+        BookingStatus.CONFIRMED, BookingStatus.CANCELLED,
+    ]
+    booking_objs = []
+    for _ in range(bookings):
+        cottage = rng.choice(cottage_objs)
+        check_in = today + timedelta(days=rng.randint(-7, horizon))
+        nights = rng.randint(1, 7)
+        booking_objs.append(Booking(
+            user=user,
+            cottage=cottage,
+            check_in=check_in,
+            check_out=check_in + timedelta(days=nights),
+            guests=1,
+            total_price=cottage.price_per_night * nights,
+            status=rng.choice(statuses),
+        ))
+    Booking.objects.bulk_create(booking_objs)
+    # bulk_create минует сигналы: ночи занятости — как после backfill
+    occupancy.rebuild(chunk_size=1000)
+
+    return user, cottage_objs
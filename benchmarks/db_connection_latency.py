@@ -0,0 +1,114 @@
+"""
+Задержка соединения с БД на запрос/задачу при разных политиках соединений.
+
+Каждый вариант запускается в отдельном процессе со своим окружением
+(настройки соединений читаются при импорте). Цикл повторяет то, что Django
+делает вокруг HTTP-запроса или задачи Celery: close_old_connections() до и
+после (сигналы request_started/request_finished) и один запрос SELECT 1
+между ними. Время цикла включает установку соединения, если политика ее
+требует, и проверку здоровья постоянного соединения (CONN_HEALTH_CHECKS):
+
+    python benchmarks/db_connection_latency.py --iterations 500
+    python benchmarks/db_connection_latency.py \\
+        --variant direct:PROCESS_TYPE=web,DB_HOST=localhost,DB_PORT=5432 \\
+        --variant pgbouncer:PROCESS_TYPE=web,DB_HOST=localhost,DB_PORT=6432,DB_DISABLE_SERVER_SIDE_CURSORS=True
+
+Без --variant сравниваются соединение на каждый цикл (как до пула:
+CONN_MAX_AGE=0) и постоянное соединение Celery/бота. Хост и порт БД —
+из окружения (DB_HOST, DB_PORT, ...), как у приложения.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_VARIANTS = [
+    'per_request:PROCESS_TYPE=celery,DB_CONN_MAX_AGE_CELERY=0',
+    'persistent:PROCESS_TYPE=celery,DB_CONN_MAX_AGE_CELERY=600',
+]
+
+
+def parse_variant(value):
+    name, _, assignments = value.partition(':')
+    env = dict(item.split('=', 1) for item in assignments.split(',') if item)
+    return name, env
+
+
+def measure(iterations):
+    """Выполняется в дочернем процессе: замер циклов на текущих настройках."""
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cottage_booking.settings')
+
+    import django
+
+    django.setup()
+
+    from django.core.signals import request_finished, request_started
+    from django.db import connection
+
+    def cycle():
+        request_started.send(sender=None)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        request_finished.send(sender=None)
+
+    # Прогрев: импорт драйвера и первое соединение не входят в замер
+    cycle()
+    opened = 0
+    timings = []
+    for _ in range(iterations):
+        before = connection.connection
+        started = time.perf_counter()
+        cycle()
+        timings.append((time.perf_counter() - started) * 1000)
+        opened += connection.connection is None or connection.connection is not before
+    timings.sort()
+    return {
+        'vendor': connection.vendor,
+        'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+        'iterations': iterations,
+        'connections_opened': opened,
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[max(int(len(timings) * 0.95) - 1, 0)], 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+    }
+
+
+def run_variant(env, iterations):
+    output = subprocess.run(
+        [sys.executable, __file__, '--child', '--iterations', str(iterations)],
+        env={**os.environ, **env}, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--variant', action='append', help='имя:КЛЮЧ=значение,... — переменные окружения варианта')
+    parser.add_argument('--output', help='Сохранить результаты в JSON')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.iterations)))
+        return
+
+    results = {}
+    for name, env in map(parse_variant, args.variant or DEFAULT_VARIANTS):
+        results[name] = run_variant(env, args.iterations)
+        print(f"{name}: {results[name]}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Нагрузочное сравнение WSGI (sync-воркеры gunicorn) и ASGI (uvicorn-воркеры)
+при одинаковом числе воркеров.
+
+Скрипт поднимает сервер в каждом режиме на окружении проекта (нужны
+Postgres и Redis, как в docker-compose), выполняет одинаковую серию
+параллельных запросов и печатает пропускную способность и перцентили:
+
+    python benchmarks/http_concurrency.py --workers 3 --concurrency 64 \\
+        --requests 2000 --cookie sessionid=<id> \\
+        --path '/api/v1/cottages/search/?q=дом' \\
+        --path '/operator/api/cottage/1/availability/'
+
+Эндпоинты API требуют входа — передайте cookie сессии через --cookie.
+
+Варианты окружения (--variant) сравнивают настройки при одном режиме,
+например задержку запросов до и после пула соединений:
+
+    python benchmarks/http_concurrency.py --modes asgi \
+        --variant direct:DB_HOST=localhost,DB_PORT=5432 \
+        --variant pgbouncer:DB_HOST=localhost,DB_PORT=6432,DB_DISABLE_SERVER_SIDE_CURSORS=True
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SERVERS = {
+    'wsgi': ['cottage_booking.wsgi:application'],
+    'asgi': ['cottage_booking.asgi:application', '-k', 'uvicorn.workers.UvicornWorker'],
+}
+
+
+def start_server(mode, workers, port, env=None):
+    command = [
+        sys.executable, '-m', 'gunicorn', *SERVERS[mode],
+        '--workers', str(workers), '--bind', f'127.0.0.1:{port}',
+        '--log-level', 'warning',
+    ]
+    return subprocess.Popen(command, cwd=BASE_DIR, env={**os.environ, **(env or {})})
+
+
+def wait_until_ready(server, base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'Сервер завершился с кодом {server.returncode}')
+        try:
+            if httpx.get(f'{base_url}/api/v1/health/', timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'Сервер {base_url} не поднялся за {timeout} с')
+
+
+async def run_load(base_url, paths, total, concurrency, cookies):
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, cookies=cookies, limits=limits, timeout=30) as client:
+        async def one(index):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(paths[index % len(paths)])
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(index) for index in range(total)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': total,
+        'errors': errors,
+        'rps': round(total / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+        'p99_ms': round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+def parse_cookies(values):
+    return dict(value.split('=', 1) for value in values)
+
+
+def parse_variants(values):
+    """``name:KEY=VALUE,KEY=VALUE`` -> {name: {KEY: VALUE}}; без вариантов — одно пустое окружение."""
+    variants = {}
+    for value in values:
+        name, _, assignments = value.partition(':')
+        variants[name] = dict(item.split('=', 1) for item in assignments.split(',') if item)
+    return variants or {'': {}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--path', action='append', dest='paths', help='Путь для запросов (можно несколько)')
+    parser.add_argument('--cookie', action='append', default=[], help='name=value')
+    parser.add_argument('--modes', default='wsgi,asgi')
+    parser.add_argument('--variant', action='append', default=[], help='name:KEY=VALUE,KEY=VALUE')
+    parser.add_argument('--output', help='Сохранить результаты в JSON')
+    args = parser.parse_args()
+
+    paths = args.paths or ['/api/v1/cottages/search/']
+    cookies = parse_cookies(args.cookie)
+    results = {}
+
+    for mode in args.modes.split(','):
+        for variant, env in parse_variants(args.variant).items():
+            label = f'{mode}/{variant}' if variant else mode
+            server = start_server(mode, args.workers, args.port, env)
+            base_url = f'http://127.0.0.1:{args.port}'
+            try:
+                wait_until_ready(server, base_url)
+                # Прогрев: соединения с БД и кэш
+                asyncio.run(run_load(base_url, paths, args.concurrency, args.concurrency, cookies))
+                results[label] = asyncio.run(
+                    run_load(base_url, paths, args.requests, args.concurrency, cookies)
+                )
+            finally:
+                server.terminate()
+                server.wait()
+            print(f"{label}: {results[label]}")
+
+    if 'wsgi' in results and 'asgi' in results:
+        gain = results['asgi']['rps'] / results['wsgi']['rps']
+        print(f"ASGI/WSGI по RPS при {args.workers} воркерах: x{gain:.2f}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            'workers': args.workers,
+            'concurrency': args.concurrency,
+            'paths': paths,
+            'results': results,
+        }, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
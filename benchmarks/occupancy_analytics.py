@@ -0,0 +1,153 @@
+"""
+Время отчета загрузки и выручки (apps.operator.analytics) на многолетних данных.
+
+Заполняет БД коттеджами и бронированиями за --years лет (пакетами через
+bulk_create, без сигналов; таблица ночей — occupancy.rebuild) и замеряет occupancy_report() без кэша
+(поколение bookings_namespace сбрасывается перед каждым замером) и из
+кэша по периодам:
+
+    python benchmarks/occupancy_analytics.py --years 5 --cottages 50
+    python benchmarks/occupancy_analytics.py --skip-seed --rounds 10
+
+Отчет по дням строится за последний год (не больше ANALYTICS_MAX_PERIODS
+периодов), по неделям и месяцам — за весь период. Данные добавляются к
+существующим — запускать на отдельной БД.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cottage_booking.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+
+from apps.bookings import occupancy  # noqa: E402
+from apps.bookings.cache import bookings_namespace  # noqa: E402
+from apps.bookings.models import Booking, BookingStatus  # noqa: E402
+from apps.cottages.models import Cottage  # noqa: E402
+from apps.operator.analytics import occupancy_report  # noqa: E402
+
+BATCH = 10_000
+STATUSES = [BookingStatus.CONFIRMED, BookingStatus.COMPLETED, BookingStatus.CANCELLED, BookingStatus.PENDING]
+
+
+def seed(years, cottages, rng):
+    start = date.today().replace(month=1, day=1).replace(year=date.today().year - years + 1)
+    end = start.replace(year=start.year + years)
+    cottage_objs = Cottage.objects.bulk_create([
+        Cottage(
+            name=f'Коттедж {i}', description='Синтетический коттедж', address=f'Лесная, {i}',
+            capacity=6, price_per_night=Decimal(5000),
+        )
+        for i in range(cottages)
+    ])
+
+    batch = []
+    total = 0
+    for cottage in cottage_objs:
+        # Брони коттеджа идут подряд без пересечений, с промежутками
+        check_in = start + timedelta(days=rng.randint(0, 5))
+        while check_in < end:
+            nights = rng.randint(1, 7)
+            batch.append(Booking(
+                cottage=cottage, guest_name='Гость', guests=2,
+                check_in=check_in, check_out=check_in + timedelta(days=nights),
+                total_price=Decimal(5000 * nights), status=rng.choices(STATUSES, weights=[5, 3, 1, 1])[0],
+            ))
+            check_in += timedelta(days=nights + rng.randint(0, 4))
+            if len(batch) >= BATCH:
+                Booking.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+                print(f"  бронирования: {total}", end='\r', flush=True)
+    Booking.objects.bulk_create(batch)
+    print(f"  бронирования: {total + len(batch)}")
+    # bulk_create минует сигналы: таблица ночей заполняется как при backfill
+    print(f"  ночи: {occupancy.rebuild(BATCH)}")
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+
+def _timed(func, rounds):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'p50_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(timings[max(int(len(timings) * 0.95) - 1, 0)], 2),
+    }
+
+
+def measure(years, rounds):
+    today = date.today()
+    end = today.replace(year=today.year + 1, month=1, day=1)
+    start = end.replace(year=end.year - years)
+    cases = {
+        'month': (start, end, 'month'),
+        'week': (start, end, 'week'),
+        'day': (end.replace(year=end.year - 1), end, 'day'),
+    }
+
+    results = {}
+    for name, (date_from, date_to, granularity) in cases.items():
+        def cold():
+            bookings_namespace.bump()
+            return occupancy_report(date_from, date_to, granularity)
+
+        periods = len(cold())
+        results[name] = {
+            'periods': periods,
+            'cold': _timed(cold, rounds),
+            'cached': _timed(lambda: occupancy_report(date_from, date_to, granularity), rounds),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--cottages', type=int, default=50)
+    parser.add_argument('--skip-seed', action='store_true', help='Использовать уже заполненную БД')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=500, help='Допустимый p95 без кэша')
+    parser.add_argument('--output', help='Сохранить результаты в JSON')
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        seed(args.years, args.cottages, random.Random(42))
+
+    print(f"БД: {connection.vendor}, бронирований: {Booking.objects.count()}")
+    results = measure(args.years, args.rounds)
+    over_budget = []
+    for name, result in results.items():
+        print(f"{name}: {result}")
+        if result['cold']['p95_ms'] > args.budget_ms:
+            over_budget.append(name)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2))
+    if over_budget:
+        print(f"p95 без кэша выше {args.budget_ms} мс: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
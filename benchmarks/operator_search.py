@@ -0,0 +1,166 @@
+"""
+Задержка поиска оператора (apps.operator.search) на большом наборе данных.
+
+Заполняет БД синтетическими клиентами, заявками и бронированиями (пакетами
+через bulk_create, без сигналов) и замеряет operator_search() для
+запросов разных типов: фамилия, опечатка, email, телефон, коттедж.
+Цель — p95 меньше --budget-ms на миллионе бронирований в PostgreSQL
+с триграммными индексами (миграция bookings 0005):
+
+    python benchmarks/operator_search.py --bookings 1000000
+    python benchmarks/operator_search.py --skip-seed --rounds 50
+
+Данные добавляются к существующим — запускать на отдельной БД.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cottage_booking.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+
+from apps.bookings.models import Booking, BookingStatus  # noqa: E402
+from apps.cottages.models import Cottage  # noqa: E402
+from apps.leads.models import CallbackRequest  # noqa: E402
+from apps.operator.search import operator_search  # noqa: E402
+from apps.users.models import User  # noqa: E402
+
+FIRST_NAMES = ['Иван', 'Мария', 'Олег', 'Анна', 'Павел', 'Елена', 'Сергей', 'Ольга', 'Дмитрий', 'Наталья']
+LAST_NAMES = ['Петров', 'Смирнов', 'Кузнецов', 'Попов', 'Волков', 'Соколов', 'Лебедев', 'Козлов', 'Новиков', 'Морозов']
+BATCH = 10_000
+
+QUERIES = {
+    'last_name': 'Лебедев',
+    'typo': 'Лебидев',
+    'email': 'client_4242',
+    'phone': '+7 916 000 42 42',
+    'cottage': 'Коттедж 7',
+}
+
+
+def _name(rng, index):
+    return rng.choice(FIRST_NAMES), f"{rng.choice(LAST_NAMES)}{'а' if index % 2 else ''}"
+
+
+def seed(bookings, users, callbacks, cottages, rng):
+    cottage_objs = Cottage.objects.bulk_create([
+        Cottage(
+            name=f'Коттедж {i}', description='Синтетический коттедж', address=f'Лесная, {i}',
+            capacity=6, price_per_night=Decimal(5000),
+        )
+        for i in range(cottages)
+    ])
+
+    offset = User.objects.count()
+    for start in range(0, users, BATCH):
+        batch = []
+        for i in range(offset + start, offset + min(start + BATCH, users)):
+            first_name, last_name = _name(rng, i)
+            phone = f'+7916{i:07d}'
+            batch.append(User(
+                username=f'client_{i}', email=f'client_{i}@example.com', first_name=first_name,
+                last_name=last_name, phone=phone, phone_normalized=phone,
+            ))
+        User.objects.bulk_create(batch)
+    user_ids = list(User.objects.values_list('id', flat=True))
+
+    for start in range(0, callbacks, BATCH):
+        batch = []
+        for i in range(start, min(start + BATCH, callbacks)):
+            first_name, last_name = _name(rng, i)
+            phone = f'+7903{i:07d}'
+            batch.append(CallbackRequest(
+                first_name=first_name, last_name=last_name, phone=phone, phone_normalized=phone,
+                email=f'lead_{i}@example.com',
+            ))
+        CallbackRequest.objects.bulk_create(batch)
+
+    today = date.today()
+    statuses = list(BookingStatus.values)
+    for start in range(0, bookings, BATCH):
+        batch = []
+        for i in range(start, min(start + BATCH, bookings)):
+            check_in = today + timedelta(days=rng.randint(-700, 365))
+            # Каждая пятая бронь — гостевая, без аккаунта
+            guest = i % 5 == 0
+            batch.append(Booking(
+                user_id=None if guest else rng.choice(user_ids),
+                guest_name=' '.join(_name(rng, i)) if guest else None,
+                guest_email=f'guest_{i}@example.com' if guest else None,
+                cottage=rng.choice(cottage_objs), check_in=check_in, check_out=check_in + timedelta(days=2),
+                guests=2, total_price=Decimal(10000), status=rng.choice(statuses),
+            ))
+        Booking.objects.bulk_create(batch)
+        print(f"  бронирования: {min(start + BATCH, bookings)}/{bookings}", end='\r', flush=True)
+    print()
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+
+def measure(rounds):
+    results = {}
+    for name, query in QUERIES.items():
+        operator_search(query)  # прогрев
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            found = operator_search(query)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        results[name] = {
+            'query': query,
+            'results': len(found),
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(timings[max(int(len(timings) * 0.95) - 1, 0)], 2),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bookings', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=200_000)
+    parser.add_argument('--callbacks', type=int, default=100_000)
+    parser.add_argument('--cottages', type=int, default=50)
+    parser.add_argument('--skip-seed', action='store_true', help='Использовать уже заполненную БД')
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--budget-ms', type=float, default=50)
+    parser.add_argument('--output', help='Сохранить результаты в JSON')
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        seed(args.bookings, args.users, args.callbacks, args.cottages, random.Random(42))
+
+    print(f"БД: {connection.vendor}, бронирований: {Booking.objects.count()}")
+    results = measure(args.rounds)
+    over_budget = []
+    for name, result in results.items():
+        print(f"{name}: {result}")
+        if result['p95_ms'] > args.budget_ms:
+            over_budget.append(name)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2))
+    if over_budget:
+        print(f"p95 выше {args.budget_ms} мс: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _test_settings(settings):
+    # Превышение бюджета SQL-запросов во view в тестах — ошибка
+    settings.QUERY_BUDGET_STRICT = True
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'tests',
+        }
+    }
+    settings.STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+
+    from django.core.cache import cache
+
+    from apps.core.cache import _clear_all_local
+    cache.clear()
+    _clear_all_local()
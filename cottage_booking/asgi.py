@@ -3,18 +3,26 @@ import os
 from channels.auth import AuthMiddlewareStack
 from channels.routing import ProtocolTypeRouter, URLRouter
 from django.core.asgi import get_asgi_application
+from django.urls import path, re_path
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cottage_booking.settings')
 
 django_asgi_app = get_asgi_application()
 
+from django.conf import settings
 from apps.notifications.routing import websocket_urlpatterns
+from apps.telegram_bot.webhook import telegram_lifespan, telegram_webhook
 
 application = ProtocolTypeRouter({
-    "http": django_asgi_app,
+    "http": URLRouter([
+        # Webhook Telegram обрабатывается до Django: без middleware и сессий
+        path(settings.TELEGRAM_WEBHOOK_PATH, telegram_webhook),
+        re_path(r'', django_asgi_app),
+    ]),
     "websocket": AuthMiddlewareStack(
         URLRouter(
             websocket_urlpatterns
         )
     ),
+    "lifespan": telegram_lifespan,
 })
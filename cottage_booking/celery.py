@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import celeryd_init, worker_process_shutdown
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cottage_booking.settings')
 
@@ -9,6 +10,23 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 
 app.autodiscover_tasks()
 
+
+@celeryd_init.connect
+def start_worker_metrics(**kwargs):
+    # Поднимается в главном процессе до форка, дочерние пишут
+    # метрики в PROMETHEUS_MULTIPROC_DIR
+    from django.conf import settings
+    from apps.core.metrics import start_metrics_server
+
+    start_metrics_server(settings.METRICS_PORT)
+
+
+@worker_process_shutdown.connect
+def cleanup_worker_metrics(pid=None, **kwargs):
+    from apps.core.metrics import mark_process_dead
+
+    mark_process_dead(pid)
+
 @app.task(bind=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
@@ -3,7 +3,7 @@ import os
 import sys
 from pathlib import Path
 from datetime import timedelta
-from decouple import config
+from decouple import Choices, config
 
 if sys.platform == 'win32':
     import codecs
@@ -26,6 +26,8 @@ DJANGO_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.sites',
+    # Триграммные lookups для поиска оператора (в PostgreSQL)
+    'django.contrib.postgres',
 ]
 
 THIRD_PARTY_APPS = [
@@ -38,6 +40,7 @@ THIRD_PARTY_APPS = [
     'allauth.socialaccount',
     'channels',
     'axes',
+    'django_celery_beat',
 ]
 
 LOCAL_APPS = [
@@ -57,14 +60,18 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'apps.core.middleware.QueryBudgetMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'apps.core.middleware.PrimaryPinMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'allauth.account.middleware.AccountMiddleware',
+    'apps.core.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'apps.core.middleware.ResponseCacheMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'axes.middleware.AxesMiddleware',
 ]
@@ -91,6 +98,29 @@ TEMPLATES = [
 WSGI_APPLICATION = 'cottage_booking.wsgi.application'
 ASGI_APPLICATION = 'cottage_booking.asgi.application'
 
+# Тип процесса: web, celery или bot. Определяет политику соединений с БД.
+# Неизвестное значение — ValueError со списком допустимых при импорте настроек
+PROCESS_TYPE = config('PROCESS_TYPE', default='web', cast=Choices(['web', 'celery', 'bot']))
+
+# Время жизни постоянного соединения (сек) по типу процесса.
+# Под ASGI (WEB_ASGI=1) каждый запрос web исполняет ORM в своем потоке,
+# и постоянные соединения там копились бы по одному на поток, поэтому
+# для web соединения короткие, а пулом служит PgBouncer (DB_HOST=pgbouncer).
+# Celery и бот держат соединения долго: Celery сам закрывает устаревшие
+# до и после задачи, бот — перед каждым апдейтом.
+DB_CONN_MAX_AGE = {
+    'web': config('DB_CONN_MAX_AGE_WEB', default=0, cast=int),
+    'celery': config('DB_CONN_MAX_AGE_CELERY', default=600, cast=int),
+    'bot': config('DB_CONN_MAX_AGE_BOT', default=600, cast=int),
+}
+
+# Порт HTTP-экспорта метрик для процессов без веб-сервера (Celery, бот)
+METRICS_PORT = config('METRICS_PORT', default=0, cast=int)
+# Сети, из которых /metrics отдается без входа (прямые запросы, не через прокси)
+METRICS_ALLOWED_NETWORKS = config(
+    'METRICS_ALLOWED_NETWORKS', default='127.0.0.1/32,::1/128,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16'
+).split(',')
+
 if config('USE_SQLITE', default=False, cast=bool):
     DATABASES = {
         'default': {
@@ -101,15 +131,44 @@ if config('USE_SQLITE', default=False, cast=bool):
 else:
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.postgresql',
+            # Стандартный бэкенд + метрики установки соединений
+            'ENGINE': 'apps.core.db.backends.postgresql',
             'NAME': config('DB_NAME', default='cottage_booking'),
             'USER': config('DB_USER', default='postgres'),
             'PASSWORD': config('DB_PASSWORD', default='password'),
             'HOST': config('DB_HOST', default='db'),
             'PORT': config('DB_PORT', default='5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE[PROCESS_TYPE],
+            'CONN_HEALTH_CHECKS': True,
+            # PgBouncer в режиме transaction не поддерживает серверные курсоры
+            'DISABLE_SERVER_SIDE_CURSORS': config(
+                'DB_DISABLE_SERVER_SIDE_CURSORS', default=False, cast=bool
+            ),
+            'OPTIONS': {
+                'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+            },
         }
     }
 
+# Реплики только для чтения: "host[:port]" для Postgres или имя файла для SQLite.
+# Запросы идут на реплику лишь внутри use_replica()/@read_replica.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(filter(None, config('DB_REPLICAS', default='').split(',')), 1):
+    alias = f'replica_{index}'
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+        overrides = {'NAME': BASE_DIR / replica}
+    else:
+        host, _, port = replica.partition(':')
+        overrides = {'HOST': host, 'PORT': port or DATABASES['default']['PORT']}
+    DATABASES[alias] = {**DATABASES['default'], **overrides, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['apps.core.db.routers.PrimaryReplicaRouter']
+
+# После записи чтения пользователя идут на primary столько секунд (cookie)
+DB_PRIMARY_PIN_SECONDS = config('DB_PRIMARY_PIN_SECONDS', default=15, cast=int)
+DB_PRIMARY_PIN_COOKIE = 'db_primary_pin'
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -131,6 +190,9 @@ USE_I18N = True
 USE_L10N = True
 USE_TZ = True
 
+# Код страны для номеров без "+" (нормализация телефонов в E.164)
+PHONE_DEFAULT_COUNTRY_CODE = config('PHONE_DEFAULT_COUNTRY_CODE', default='7')
+
 LANGUAGES = [
     ('ru', 'Русский'),
     ('en', 'English'),
@@ -157,6 +219,15 @@ STATICFILES_FINDERS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Выгрузки (apps.operator.exports): вне MEDIA_ROOT — не раздаются напрямую
+EXPORTS_ROOT = Path(config('EXPORTS_ROOT', default=str(BASE_DIR / 'exports')))
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Аналитика загрузки и выручки (apps.operator.analytics): кэш по периодам
+ANALYTICS_CACHE_TIMEOUT = config('ANALYTICS_CACHE_TIMEOUT', default=600, cast=int)
+ANALYTICS_L1_MAX_ENTRIES = config('ANALYTICS_L1_MAX_ENTRIES', default=1024, cast=int)
+ANALYTICS_MAX_PERIODS = config('ANALYTICS_MAX_PERIODS', default=400, cast=int)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'users.User'
@@ -226,6 +297,36 @@ CACHES = {
     }
 }
 
+# L1-кэш каталога в каждом процессе поверх Redis, инвалидация через pub/sub
+TIERED_CACHE_CHANNEL = config('TIERED_CACHE_CHANNEL', default='cottage_booking:cache-invalidation')
+CATALOG_L1_MAX_ENTRIES = config('CATALOG_L1_MAX_ENTRIES', default=256, cast=int)
+CATALOG_L1_TIMEOUT = config('CATALOG_L1_TIMEOUT', default=60, cast=int)
+
+# Защита от одновременных пересчетов кэша (TieredCache.get_or_compute)
+CACHE_LOCK_TIMEOUT = config('CACHE_LOCK_TIMEOUT', default=30, cast=int)
+CACHE_LOCK_WAIT = config('CACHE_LOCK_WAIT', default=2.0, cast=float)
+CACHE_EARLY_REFRESH_BETA = config('CACHE_EARLY_REFRESH_BETA', default=1.0, cast=float)
+
+# Кэш целых страниц для анонимных посетителей (apps.core.response_cache)
+RESPONSE_CACHE_ENABLED = config('RESPONSE_CACHE_ENABLED', default=True, cast=bool)
+RESPONSE_CACHE_L1_MAX_ENTRIES = config('RESPONSE_CACHE_L1_MAX_ENTRIES', default=128, cast=int)
+
+# Реестр персонала Telegram-бота (сбрасывается сигналами, TTL — страховка)
+TELEGRAM_STAFF_REGISTRY_TIMEOUT = config('TELEGRAM_STAFF_REGISTRY_TIMEOUT', default=300, cast=int)
+
+# Бот: параллельная обработка апдейтов и пул потоков для ORM (= максимум соединений с БД)
+TELEGRAM_BOT_CONCURRENT_UPDATES = config('TELEGRAM_BOT_CONCURRENT_UPDATES', default=16, cast=int)
+TELEGRAM_BOT_DB_THREADS = config('TELEGRAM_BOT_DB_THREADS', default=4, cast=int)
+# Страницы /bookings в боте (сбрасываются поколением при изменении брони)
+TELEGRAM_BOOKING_PAGE_TIMEOUT = config('TELEGRAM_BOOKING_PAGE_TIMEOUT', default=300, cast=int)
+
+# Webhook бота в ASGI-приложении: пустой секрет — webhook выключен
+TELEGRAM_WEBHOOK_SECRET = config('TELEGRAM_WEBHOOK_SECRET', default='')
+TELEGRAM_WEBHOOK_PATH = 'telegram/webhook/'
+TELEGRAM_UPDATE_DEDUP_TIMEOUT = config('TELEGRAM_UPDATE_DEDUP_TIMEOUT', default=24 * 60 * 60, cast=int)
+# Bot API принимает файлы до 50 МБ; выгрузки больше уходят ссылкой
+TELEGRAM_DOCUMENT_MAX_SIZE = 50 * 1024 * 1024
+
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
 SESSION_COOKIE_AGE = 86400  # 24 hours
@@ -343,6 +444,38 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+# DatabaseScheduler переносит эти задачи в БД при старте beat
+CELERY_BEAT_SCHEDULE = {
+    'booking-lifecycle-sweep': {
+        'task': 'apps.bookings.tasks.sweep_booking_lifecycle',
+        'schedule': timedelta(minutes=config('BOOKING_SWEEP_INTERVAL_MINUTES', default=15, cast=int)),
+    },
+    # Страховка: события, для которых не удалось поставить задачу из webhook
+    'payment-events': {
+        'task': 'apps.payments.tasks.process_payment_events',
+        'schedule': timedelta(minutes=1),
+    },
+}
+
+# Жизненный цикл бронирований: срок неподтвержденной брони и размер пачки
+BOOKING_PENDING_TTL_HOURS = config('BOOKING_PENDING_TTL_HOURS', default=48, cast=int)
+BOOKING_SWEEP_CHUNK_SIZE = config('BOOKING_SWEEP_CHUNK_SIZE', default=500, cast=int)
+
+# Пересборка таблицы занятости (rebuild_occupancy): броней за транзакцию
+OCCUPANCY_REBUILD_CHUNK_SIZE = config('OCCUPANCY_REBUILD_CHUNK_SIZE', default=1000, cast=int)
+
+# Удержание дат в Redis на время оформления брони (apps.bookings.holds)
+BOOKING_HOLD_TTL = config('BOOKING_HOLD_TTL', default=600, cast=int)
+BOOKING_OCCUPANCY_TIMEOUT = config('BOOKING_OCCUPANCY_TIMEOUT', default=600, cast=int)
+
+# Webhook платежного провайдера: пустой секрет — webhook выключен
+PAYMENT_PROVIDER = config('PAYMENT_PROVIDER', default='default')
+PAYMENT_WEBHOOK_SECRET = config('PAYMENT_WEBHOOK_SECRET', default='')
+# События копятся PAYMENT_EVENTS_BATCH_DELAY секунд и применяются пачками
+PAYMENT_EVENTS_BATCH_DELAY = config('PAYMENT_EVENTS_BATCH_DELAY', default=2, cast=int)
+PAYMENT_EVENTS_BATCH_SIZE = config('PAYMENT_EVENTS_BATCH_SIZE', default=500, cast=int)
+# Сверка с выпиской: строк выписки на один запрос платежей
+PAYMENT_RECONCILE_CHUNK_SIZE = config('PAYMENT_RECONCILE_CHUNK_SIZE', default=1000, cast=int)
 
 
 AXES_ENABLED = True
@@ -376,5 +509,19 @@ PROMETHEUS_EXPORT_MIGRATIONS = True
 PROMETHEUS_EXPORT_USE_SETTINGS = True
 PROMETHEUS_EXPORT_URL = '/metrics'
 
+# Бюджеты SQL-запросов на view и детектор N+1 (apps/core/query_budget.py)
+QUERY_BUDGET_ENABLED = config('QUERY_BUDGET_ENABLED', default=True, cast=bool)
+QUERY_BUDGET_STRICT = config('QUERY_BUDGET_STRICT', default=False, cast=bool)
+QUERY_BUDGET_N_PLUS_ONE_THRESHOLD = config('QUERY_BUDGET_N_PLUS_ONE_THRESHOLD', default=5, cast=int)
+
+# Семплирующий профайлер по запросу персонала и для Celery-задач (apps/core/profiling.py)
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=False, cast=bool)
+PROFILING_INTERVAL = config('PROFILING_INTERVAL', default=0.005, cast=float)
+PROFILING_MAX_PROFILES = config('PROFILING_MAX_PROFILES', default=50, cast=int)
+PROFILING_RETENTION = config('PROFILING_RETENTION', default=7 * 24 * 60 * 60, cast=int)
+PROFILING_CELERY_TASKS = [
+    name for name in config('PROFILING_CELERY_TASKS', default='').split(',') if name
+]
+
 MONITORING_ENABLED = config('MONITORING_ENABLED', default=True, cast=bool)
 PROMETHEUS_METRICS_EXPORT_PORT = config('PROMETHEUS_METRICS_EXPORT_PORT', default=8001, cast=int)
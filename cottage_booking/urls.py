@@ -4,10 +4,12 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.views.i18n import set_language
 from apps.bookings import views
+from apps.core.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('i18n/setlang/', set_language, name='set_language'),
+    path('metrics', metrics_view, name='prometheus-metrics'),
     path('api/v1/', include(('apps.core.urls', 'core'), namespace='core_api')),
     path('api/v1/auth/', include(('apps.users.urls', 'users'), namespace='users_api')),
     path('api/v1/cottages/', include(('apps.cottages.urls', 'cottages'), namespace='cottages_api')),